@@ -138,10 +138,6 @@ def compute_all_states(sol, bio_model: BiorbdModelCustomHolonomic, index_holonom
     """
     n = sol.states[index_holonomics_constraints]["q_u"].shape[1]
     nb_root = bio_model.nb_root
-    q = np.zeros((bio_model.nb_q, n))
-    qdot = np.zeros((bio_model.nb_q, n))
-    qddot = np.zeros((bio_model.nb_q, n))
-    lambdas = np.zeros((bio_model.nb_dependent_joints, n))
     tau = np.ones((bio_model.nb_tau, n))
     tau_independent = [element - 3 for element in bio_model.independent_joint_index[3:]]
     tau_dependent = [element - 3 for element in bio_model.dependent_joint_index]
@@ -151,49 +147,9 @@ def compute_all_states(sol, bio_model: BiorbdModelCustomHolonomic, index_holonom
     for i, dependent_joint_index in enumerate(bio_model.dependent_joint_index):
         tau[dependent_joint_index] = sol.controls[index_holonomics_constraints]["tau"][tau_dependent[i], :]
 
-    # Partitioned forward dynamics
-    q_u_sym = MX.sym("q_u_sym", bio_model.nb_independent_joints, 1)
-    qdot_u_sym = MX.sym("qdot_u_sym", bio_model.nb_independent_joints, 1)
-    tau_sym = MX.sym("tau_sym", bio_model.nb_tau, 1)
-    partitioned_forward_dynamics_func = Function(
-        "partitioned_forward_dynamics",
-        [q_u_sym, qdot_u_sym, tau_sym],
-        [bio_model.partitioned_forward_dynamics(q_u_sym, qdot_u_sym, tau_sym)],
+    q, qdot, qddot, lambdas, _ = bio_model.compute_all_states(
+        sol.states[index_holonomics_constraints]["q_u"], sol.states[index_holonomics_constraints]["qdot_u"], tau
     )
-    # Lagrangian multipliers
-    q_sym = MX.sym("q_sym", bio_model.nb_q, 1)
-    qdot_sym = MX.sym("qdot_sym", bio_model.nb_q, 1)
-    qddot_sym = MX.sym("qddot_sym", bio_model.nb_q, 1)
-    compute_lambdas_func = Function(
-        "compute_the_lagrangian_multipliers",
-        [q_sym, qdot_sym, qddot_sym, tau_sym],
-        [bio_model.compute_the_lagrangian_multipliers(q_sym, qdot_sym, qddot_sym, tau_sym)],
-    )
-
-    for i in range(n):
-        q_v_i = bio_model.compute_v_from_u_explicit_numeric(sol.states[index_holonomics_constraints]["q_u"][:, i]).toarray()
-        q[:, i] = bio_model.state_from_partition(sol.states[index_holonomics_constraints]["q_u"][:, i][:, np.newaxis], q_v_i).toarray().squeeze()
-        qdot[:, i] = bio_model.compute_qdot(q[:, i], sol.states[index_holonomics_constraints]["qdot_u"][:, i]).toarray().squeeze()
-        qddot_u_i = (
-            partitioned_forward_dynamics_func(
-                sol.states[index_holonomics_constraints]["q_u"][:, i],
-                sol.states[index_holonomics_constraints]["qdot_u"][:, i],
-                tau[:, i],
-            )
-            .toarray()
-            .squeeze()
-        )
-        qddot[:, i] = bio_model.compute_qddot(q[:, i], qdot[:, i], qddot_u_i).toarray().squeeze()
-        lambdas[:, i] = (
-            compute_lambdas_func(
-                q[:, i],
-                qdot[:, i],
-                qddot[:, i],
-                tau[:, i],
-            )
-            .toarray()
-            .squeeze()
-        )
 
     return q, qdot, qddot, lambdas
 
@@ -0,0 +1,185 @@
+"""
+Benchmark of the linear algebra backends of the holonomic model ("inverse" vs "solve", see linear_algebra.py).
+
+For each backend, we report:
+- the size of the graph of the partitioned forward dynamics (number of nodes and of instructions)
+- the evaluation time of the dynamics and of its jacobian on random admissible states
+- the time per IPOPT iteration on the 6-phase closed-loop salto (salto_builder.salto_6phases_spec)
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+from casadi import MX, Function, jacobian, vertcat
+from bioptim import HolonomicConstraintsList, HolonomicConstraintsFcn, Solver
+
+from biorbd_model_holonomic_updated import BiorbdModelCustomHolonomic
+from salto_builder import build_ocp, salto_6phases_spec
+
+# --- Parameters --- #
+name_folder_model = str(Path(__file__).parent.parent / "Model")
+model_name = "Model2D_7Dof_0C_5M_CL_V2.bioMod"
+independent_joint_index = [0, 1, 2, 5, 6, 7]
+dependent_joint_index = [3, 4]
+pose_salto_start_CL = [-0.6369, 1.0356, 1.5062, 2.1667, -1.9179, 0.0393]
+nb_evaluations = 1000
+solve_ocp = True
+max_iterations = 50
+
+
+def holonomic_model(model_path: str, backend: str) -> BiorbdModelCustomHolonomic:
+    """
+    Create the model of the tucked phase with the knee-hand closed loop
+
+    Parameters
+    ----------
+    model_path: str
+        Path of the model
+    backend: str
+        The linear algebra backend
+
+    Returns
+    -------
+    The holonomic model
+    """
+    bio_model = BiorbdModelCustomHolonomic(model_path)
+    bio_model.set_linear_algebra_backend(backend)
+    holonomic_constraints = HolonomicConstraintsList()
+    holonomic_constraints.add(
+        "holonomic_constraints",
+        HolonomicConstraintsFcn.superimpose_markers,
+        biorbd_model=bio_model,
+        marker_1="BELOW_KNEE",
+        marker_2="CENTER_HAND",
+        index=slice(1, 3),
+        local_frame_index=11,
+    )
+    bio_model.set_holonomic_configuration(
+        constraints_list=holonomic_constraints,
+        independent_joint_index=independent_joint_index,
+        dependent_joint_index=dependent_joint_index,
+    )
+    return bio_model
+
+
+def timeit(func: Function, inputs: list, nb_evaluations: int) -> float:
+    """
+    Mean evaluation time of a casadi Function, in seconds
+
+    Parameters
+    ----------
+    func: Function
+        The function to evaluate
+    inputs: list
+        The list of numerical inputs, one per evaluation
+    nb_evaluations: int
+        The number of evaluations
+    """
+    tic = time.perf_counter()
+    for i in range(nb_evaluations):
+        func(*inputs[i % len(inputs)])
+    return (time.perf_counter() - tic) / nb_evaluations
+
+
+def benchmark_dynamics(bio_model: BiorbdModelCustomHolonomic, nb_evaluations: int) -> dict:
+    """
+    Size and evaluation time of the partitioned forward dynamics and of its jacobian
+
+    Parameters
+    ----------
+    bio_model: BiorbdModelCustomHolonomic
+        The holonomic model
+    nb_evaluations: int
+        The number of evaluations
+
+    Returns
+    -------
+    The results of the benchmark
+    """
+    q_u = MX.sym("q_u", bio_model.nb_independent_joints, 1)
+    qdot_u = MX.sym("qdot_u", bio_model.nb_independent_joints, 1)
+    tau = MX.sym("tau", bio_model.nb_tau, 1)
+
+    qddot_u = bio_model.partitioned_forward_dynamics(q_u, qdot_u, tau)
+    dynamics_func = Function("partitioned_forward_dynamics", [q_u, qdot_u, tau], [qddot_u])
+    jacobian_func = Function(
+        "partitioned_forward_dynamics_jacobian",
+        [q_u, qdot_u, tau],
+        [jacobian(qddot_u, vertcat(q_u, qdot_u, tau))],
+    )
+
+    np.random.seed(0)
+    inputs = [
+        (
+            np.array(pose_salto_start_CL) + np.random.uniform(-0.05, 0.05, bio_model.nb_independent_joints),
+            np.random.uniform(-1, 1, bio_model.nb_independent_joints),
+            np.random.uniform(-50, 50, bio_model.nb_tau),
+        )
+        for _ in range(50)
+    ]
+
+    return {
+        "n_nodes": dynamics_func.n_nodes(),
+        "n_instructions": dynamics_func.n_instructions(),
+        "n_nodes_jacobian": jacobian_func.n_nodes(),
+        "time_dynamics": timeit(dynamics_func, inputs, nb_evaluations),
+        "time_jacobian": timeit(jacobian_func, inputs, nb_evaluations),
+    }
+
+
+def benchmark_salto_6phases(backend: str, max_iterations: int) -> dict:
+    """
+    Time per IPOPT iteration of the 6-phase closed-loop salto
+
+    Parameters
+    ----------
+    backend: str
+        The linear algebra backend
+    max_iterations: int
+        The maximal number of IPOPT iterations
+
+    Returns
+    -------
+    The results of the benchmark
+    """
+    spec = salto_6phases_spec(name_folder_model)
+    spec.linear_algebra_backend = backend
+
+    tic = time.perf_counter()
+    ocp, bio_model = build_ocp(spec)
+    time_build = time.perf_counter() - tic
+
+    solver = Solver.IPOPT(show_online_optim=False, _linear_solver="MA57")
+    solver.set_maximum_iterations(max_iterations)
+    solver.set_bound_frac(1e-8)
+    solver.set_bound_push(1e-8)
+    sol = ocp.solve(solver)
+
+    return {
+        "time_build": time_build,
+        "iterations": sol.iterations,
+        "time_per_iteration": sol.real_time_to_optimize / max(sol.iterations, 1),
+    }
+
+
+def main():
+    model_path = name_folder_model + "/" + model_name
+    for backend in ("inverse", "solve"):
+        results = benchmark_dynamics(holonomic_model(model_path, backend), nb_evaluations)
+        print(f"--- Backend: {backend} ---")
+        print(f"Graph size: {results['n_nodes']} nodes, {results['n_instructions']} instructions")
+        print(f"Graph size of the jacobian: {results['n_nodes_jacobian']} nodes")
+        print(f"Evaluation time of the dynamics: {results['time_dynamics'] * 1e6:.1f} us")
+        print(f"Evaluation time of the jacobian: {results['time_jacobian'] * 1e6:.1f} us")
+
+        if solve_ocp:
+            results = benchmark_salto_6phases(backend, max_iterations)
+            print(f"Build time of the 6-phase OCP: {results['time_build']:.2f} s")
+            print(
+                f"IPOPT: {results['iterations']} iterations, "
+                f"{results['time_per_iteration'] * 1e3:.1f} ms per iteration"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Drift of the closed-loop constraint of the three-bar model (see ocp_static_three_bar_custom.py) versus the step size,
+for a passive simulation of one second integrated with RK4:
+- without stabilization
+- with Baumgarte stabilization
+- with the projection of q and qdot after each step (see projection_integrator.py)
+"""
+import time
+
+import numpy as np
+
+from biorbd_model_holonomic import BiorbdModelCustomHolonomic
+from ocp_example import generate_close_loop_constraint
+from projection_integrator import ProjectedRK4Integrator
+
+# --- Parameters --- #
+model_path = "models/three_bar.bioMod"
+pose_at_first_node = [np.pi / 2, 0, 2, 2, 0]
+final_time = 1
+step_sizes = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05)
+gamma = 500
+
+
+def three_bar_model(stabilization: bool) -> BiorbdModelCustomHolonomic:
+    """
+    Create the three-bar model with its closed loop, as in ocp_static_three_bar_custom.py
+
+    Parameters
+    ----------
+    stabilization: bool
+        If the Baumgarte stabilization is used
+
+    Returns
+    -------
+    The holonomic model
+    """
+    bio_model = BiorbdModelCustomHolonomic(model_path)
+    constraint, constraint_jacobian, constraint_double_derivative = generate_close_loop_constraint(
+        bio_model,
+        "m1",
+        "m2",
+        index=slice(0, 2),
+        local_frame_index=1,
+    )
+    bio_model.add_holonomic_constraint(
+        constraint=constraint,
+        constraint_jacobian=constraint_jacobian,
+        constraint_double_derivative=constraint_double_derivative,
+    )
+    bio_model.stabilization = stabilization
+    bio_model.alpha = gamma**2
+    bio_model.beta = 2 * gamma
+    return bio_model
+
+
+def benchmark_drift(mode: str, dt: float) -> dict:
+    """
+    Maximal drift of the constraints along the simulation
+
+    Parameters
+    ----------
+    mode: str
+        "none", "baumgarte" or "projection"
+    dt: float
+        The step size
+
+    Returns
+    -------
+    The results of the benchmark
+    """
+    integrator = ProjectedRK4Integrator(three_bar_model(stabilization=mode == "baumgarte"), nb_position_iterations=10)
+    model = integrator.model
+
+    # consistent initial state
+    q0, qdot0 = integrator.projection_function(pose_at_first_node, np.zeros(model.nb_qdot))
+    q0, qdot0 = np.array(q0).squeeze(), np.array(qdot0).squeeze()
+
+    nb_steps = int(round(final_time / dt))
+    tic = time.perf_counter()
+    q, qdot = integrator.simulate(q0, qdot0, np.zeros((model.nb_tau, nb_steps)), dt, project=mode == "projection")
+    time_simulation = time.perf_counter() - tic
+
+    phi, phi_dot = integrator.constraint_drift(q, qdot)
+    return {
+        "max_phi": np.nanmax(phi),
+        "max_phi_dot": np.nanmax(phi_dot),
+        "time_simulation": time_simulation,
+    }
+
+
+def main():
+    print(f"{'mode':>12} {'dt':>8} {'max |phi|':>12} {'max |J qdot|':>14} {'time (s)':>10}")
+    for mode in ("none", "baumgarte", "projection"):
+        for dt in step_sizes:
+            results = benchmark_drift(mode, dt)
+            print(
+                f"{mode:>12} {dt:>8.3f} {results['max_phi']:>12.2e} {results['max_phi_dot']:>14.2e} "
+                f"{results['time_simulation']:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark of the evaluation of the holonomic dynamics as an MX graph or as an expanded SX Function
+(see BiorbdModelCustomHolonomic.expanded_dynamics).
+
+For MX and SX, we report:
+- the evaluation time of the partitioned forward dynamics, of its jacobian and of the hessian of lambda^T qddot_u
+  (the term of the dynamics in the hessian of the lagrangian used by IPOPT)
+- the build time, the number of iterations and the total solve time of the 3-, 5- and 6-phase closed-loop saltos
+"""
+import time
+
+import numpy as np
+from casadi import MX, Function, dot, hessian, jacobian, vertcat
+from bioptim import Solver
+
+from benchmark_linear_algebra import holonomic_model, name_folder_model, pose_salto_start_CL, timeit
+from salto_builder import build_ocp, salto_3phases_spec, salto_5phases_spec, salto_6phases_spec
+
+# --- Parameters --- #
+model_name = "Model2D_7Dof_0C_5M_CL_V2.bioMod"
+backend = "solve"
+nb_evaluations = 1000
+solve_ocp = True
+max_iterations = 100
+
+model_path = name_folder_model + "/" + model_name
+
+# The spec factory of each salto
+saltos = {
+    "salto_3phases": salto_3phases_spec,
+    "salto_5phases": salto_5phases_spec,
+    "salto_6phases": salto_6phases_spec,
+}
+
+
+def benchmark_dynamics(expand: bool, nb_evaluations: int) -> dict:
+    """
+    Evaluation time of the partitioned forward dynamics, of its jacobian and of its hessian
+
+    Parameters
+    ----------
+    expand: bool
+        If the dynamics is evaluated as an SX Function
+    nb_evaluations: int
+        The number of evaluations
+
+    Returns
+    -------
+    The results of the benchmark
+    """
+    bio_model = holonomic_model(model_path, backend)
+    bio_model.set_expand_dynamics(expand)
+
+    q_u = MX.sym("q_u", bio_model.nb_independent_joints, 1)
+    qdot_u = MX.sym("qdot_u", bio_model.nb_independent_joints, 1)
+    tau = MX.sym("tau", bio_model.nb_tau, 1)
+    lambdas = MX.sym("lambdas", bio_model.nb_independent_joints, 1)
+    x = vertcat(q_u, qdot_u, tau)
+
+    tic = time.perf_counter()
+    qddot_u = bio_model.partitioned_forward_dynamics(q_u, qdot_u, tau)
+    dynamics_func = Function("dynamics", [q_u, qdot_u, tau, lambdas], [qddot_u])
+    jacobian_func = Function("dynamics_jacobian", [q_u, qdot_u, tau, lambdas], [jacobian(qddot_u, x)])
+    hessian_func = Function("dynamics_hessian", [q_u, qdot_u, tau, lambdas], [hessian(dot(lambdas, qddot_u), x)[0]])
+    if expand:
+        dynamics_func = dynamics_func.expand()
+        jacobian_func = jacobian_func.expand()
+        hessian_func = hessian_func.expand()
+    time_build = time.perf_counter() - tic
+
+    np.random.seed(0)
+    inputs = [
+        (
+            np.array(pose_salto_start_CL) + np.random.uniform(-0.05, 0.05, bio_model.nb_independent_joints),
+            np.random.uniform(-1, 1, bio_model.nb_independent_joints),
+            np.random.uniform(-50, 50, bio_model.nb_tau),
+            np.random.uniform(-1, 1, bio_model.nb_independent_joints),
+        )
+        for _ in range(50)
+    ]
+
+    return {
+        "time_build": time_build,
+        "time_dynamics": timeit(dynamics_func, inputs, nb_evaluations),
+        "time_jacobian": timeit(jacobian_func, inputs, nb_evaluations),
+        "time_hessian": timeit(hessian_func, inputs, nb_evaluations),
+    }
+
+
+def benchmark_salto(salto: str, expand: bool, max_iterations: int) -> dict:
+    """
+    Build and solve time of a closed-loop salto
+
+    Parameters
+    ----------
+    salto: str
+        The name of the salto, a key of saltos
+    expand: bool
+        If the dynamics of the holonomic phase is evaluated as an SX Function
+    max_iterations: int
+        The maximal number of IPOPT iterations
+
+    Returns
+    -------
+    The results of the benchmark
+    """
+    spec = saltos[salto](name_folder_model)
+    spec.expand_dynamics = expand
+
+    tic = time.perf_counter()
+    ocp, bio_model = build_ocp(spec)
+    time_build = time.perf_counter() - tic
+
+    solver = Solver.IPOPT(show_online_optim=False, _linear_solver="MA57")
+    solver.set_maximum_iterations(max_iterations)
+    solver.set_bound_frac(1e-8)
+    solver.set_bound_push(1e-8)
+    sol = ocp.solve(solver)
+
+    return {
+        "time_build": time_build,
+        "iterations": sol.iterations,
+        "time_solve": sol.real_time_to_optimize,
+        "time_per_iteration": sol.real_time_to_optimize / max(sol.iterations, 1),
+    }
+
+
+def main():
+    for expand in (False, True):
+        graph = "SX" if expand else "MX"
+        results = benchmark_dynamics(expand, nb_evaluations)
+        print(f"--- {graph} ---")
+        print(f"Build time of the functions: {results['time_build']:.2f} s")
+        print(f"Evaluation time of the dynamics: {results['time_dynamics'] * 1e6:.1f} us")
+        print(f"Evaluation time of the jacobian: {results['time_jacobian'] * 1e6:.1f} us")
+        print(f"Evaluation time of the hessian: {results['time_hessian'] * 1e6:.1f} us")
+
+        if solve_ocp:
+            for salto in saltos:
+                results = benchmark_salto(salto, expand, max_iterations)
+                print(
+                    f"{salto}: build {results['time_build']:.2f} s, {results['iterations']} iterations, "
+                    f"solve {results['time_solve']:.2f} s ({results['time_per_iteration'] * 1e3:.1f} ms per iteration)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,42 @@ from biorbd_casadi import (
     GeneralizedTorque,
     GeneralizedAcceleration,
 )
-from biorbd import marker_index, segment_index
-from casadi import MX, DM, vertcat, horzcat, Function, solve, rootfinder, inv_minor, inv, fmod, pi, transpose
+from casadi import (
+    MX,
+    SX,
+    DM,
+    vertcat,
+    horzcat,
+    Function,
+    jtimes,
+    solve,
+    rootfinder,
+    inv_minor,
+    inv,
+    fmod,
+    pi,
+    transpose,
+)
 from bioptim import BiorbdModel
 import numpy as np
+from newton_solver import DependentJointsNewtonSolver
+from partition import CONDITION_NUMBER_THRESHOLD, check_partition_conditioning, select_partition
+from two_link_loop import (
+    DEFAULT_TWO_LINK_LOOP,
+    TwoLinkLoop,
+    has_default_two_link_loop,
+    inverse_kinematics_2d,
+    is_planar_yz,
+)
+from linear_algebra import (
+    CONSTRAINED_DYNAMICS_SOLVERS,
+    PartitionContext,
+    check_backend,
+    is_numeric,
+    numeric_vector,
+    schur_complement_solve,
+    spd_solve,
+)
 
 
 class BiorbdModelCustomHolonomic(BiorbdModel):
@@ -20,6 +52,13 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
     very experimental and not tested
     """
 
+    # "inverse" or "solve", see linear_algebra.py
+    linear_algebra_backend = "inverse"
+    # "symbolicqr" or "schur", see constrained_forward_dynamics
+    constrained_dynamics_solver = "symbolicqr"
+    # smooth clamp of the explicit inverse kinematics near full extension, see two_link_loop.inverse_kinematics_2d
+    ik_clamp_margin = None
+
     def __init__(self, bio_model: str | biorbd.Model):
         super().__init__(bio_model)
         self._holonomic_constraints = []
@@ -31,6 +70,14 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         self.beta = 0.01
         self._dependent_joint_index = []
         self._independent_joint_index = [i for i in range(self.nb_q)]
+        self._q_permutation = [i for i in range(self.nb_q)]
+        self._model_eigen = None
+        self._trajectory_functions = {}
+        self._newton_solver = None
+        self._two_link_loops = []
+        self._active_two_link_loops = None
+        self._is_planar = None
+        self._jacobian_dot_qdot = None
 
     def set_dependencies(self, dependent_joint_index: list, independent_joint_index: list):
         """Set the dependencies between the joints of the model"""
@@ -41,6 +88,129 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         self._dependent_joint_index = dependent_joint_index
         self._independent_joint_index = independent_joint_index
+        # q = vertcat(u, v)[self._q_permutation]
+        self._q_permutation = [int(i) for i in np.argsort(independent_joint_index + dependent_joint_index)]
+        self._newton_solver = None
+        self._active_two_link_loops = None
+        self._trajectory_functions = {}
+
+    def set_dependencies_from_pose(self, reference_q: np.ndarray, candidate_joints: list = None):
+        """
+        Select the dependent joints automatically by a column-pivoted QR of the constraint jacobian at a reference
+        pose (see partition.select_partition), the holonomic constraints must already be added
+
+        Parameters
+        ----------
+        reference_q: np.ndarray
+            The reference pose
+        candidate_joints: list
+            The joints that can be selected as dependent joints, all the joints if None
+        """
+        constraint_jacobian = np.array(self.holonomic_constraints_jacobian(DM(reference_q)))
+        dependent_joint_index, independent_joint_index = select_partition(constraint_jacobian, candidate_joints)
+        self.set_dependencies(dependent_joint_index, independent_joint_index)
+
+    def check_partition_conditioning(self, q: np.ndarray, threshold: float = CONDITION_NUMBER_THRESHOLD) -> np.ndarray:
+        """
+        Warn if Jv is badly conditioned somewhere along a trajectory, see partition.check_partition_conditioning
+
+        Parameters
+        ----------
+        q: np.ndarray
+            The generalized coordinates, of shape (nb_q, nb_nodes)
+        threshold: float
+            The condition number above which a warning is raised
+
+        Returns
+        -------
+        The condition numbers of Jv at each node
+        """
+        return check_partition_conditioning(self, q, threshold)
+
+    def mapped_holonomic_constraints_jacobian(self, nb_nodes: int) -> Function:
+        """
+        The constraint jacobian mapped on nb_nodes nodes, built once per number of nodes (see
+        partition.jacobian_v_condition_numbers)
+
+        Parameters
+        ----------
+        nb_nodes: int
+            The number of nodes of the map
+
+        Returns
+        -------
+        The Function q -> J(q), q of shape (nb_q, nb_nodes), the jacobians being concatenated horizontally
+        """
+        key = ("holonomic_constraints_jacobian", nb_nodes)
+        if key not in self._trajectory_functions:
+            q_sym = MX.sym("q", self.nb_q, 1)
+            self._trajectory_functions[key] = Function(
+                "holonomic_constraints_jacobian", [q_sym], [self.holonomic_constraints_jacobian(q_sym)]
+            ).map(nb_nodes)
+        return self._trajectory_functions[key]
+
+    def set_linear_algebra_backend(self, backend: str):
+        """
+        Choose how the partitioned formulation inverts the modified mass matrix and Jv
+
+        Parameters
+        ----------
+        backend: str
+            "inverse" to use casadi inv(), "solve" to use linear solves (Cholesky type for the modified mass matrix,
+            QR/LU for Jv) that give smaller expressions and are more robust near the tucked pose
+        """
+        check_backend(backend)
+        self.linear_algebra_backend = backend
+        # the Functions built with the previous backend are discarded
+        self._newton_solver = None
+        self._trajectory_functions = {}
+
+    def set_constrained_dynamics_solver(self, solver: str):
+        """
+        Choose how constrained_forward_dynamics solves the augmented system [M J^T; J 0]
+
+        Parameters
+        ----------
+        solver: str
+            "symbolicqr" to factorize the full augmented matrix, "schur" to use the range-space method
+            (factorization of the mass matrix and of the small Schur complement J M^-1 J^T)
+        """
+        if solver not in CONSTRAINED_DYNAMICS_SOLVERS:
+            raise ValueError(f"The constrained dynamics solver should be one of {CONSTRAINED_DYNAMICS_SOLVERS}")
+        self.constrained_dynamics_solver = solver
+
+    @property
+    def newton_solver(self) -> DependentJointsNewtonSolver:
+        """
+        The Newton solver of the dependent joints, built once for the current constraints and partition
+        """
+        if self._newton_solver is None:
+            self._newton_solver = DependentJointsNewtonSolver(self)
+        return self._newton_solver
+
+    @property
+    def model_eigen(self) -> biorbd_eigen.Model:
+        """
+        The numeric (Eigen) biorbd model of the same .bioMod, loaded once and reused by the numeric functions
+        """
+        if self._model_eigen is None:
+            self._model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
+        return self._model_eigen
+
+    @property
+    def dependent_joint_index(self) -> list:
+        return self._dependent_joint_index
+
+    @property
+    def independent_joint_index(self) -> list:
+        return self._independent_joint_index
+
+    @property
+    def _partition_order(self) -> list:
+        """
+        The joints in the order of the partitioned vectors and matrices, the independent joints first
+        """
+        return list(self._independent_joint_index) + list(self._dependent_joint_index)
 
     @property
     def nb_independent_joints(self):
@@ -71,6 +241,9 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         self._holonomic_constraints.append(constraint)
         self._holonomic_constraints_jacobians.append(constraint_jacobian)
         self._holonomic_constraints_double_derivatives.append(constraint_double_derivative)
+        self._newton_solver = None
+        self._jacobian_dot_qdot = None
+        self._trajectory_functions = {}
 
     @property
     def nb_holonomic_constraints(self):
@@ -93,12 +266,45 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
     def holonomic_constraints_derivative(self, q: MX, qdot: MX):
         return self.holonomic_constraints_jacobian(q) @ qdot
 
+    def holonomic_constraints_jacobian_dot_qdot(self, q: MX, qdot: MX) -> MX:
+        """
+        The velocity-product term of the constraints at the acceleration level Jdot(q, qdot) qdot, computed as the
+        directional derivative of J(q) qdot along qdot (forward mode AD) instead of evaluating J a second time at
+        qdot. The Function is built and expanded once.
+
+        Parameters
+        ----------
+        q: MX
+            The generalized coordinates
+        qdot: MX
+            The generalized velocities
+
+        Returns
+        -------
+        Jdot qdot, of size nb_holonomic_constraints
+        """
+        if self._jacobian_dot_qdot is None:
+            q_sym = MX.sym("q", self.nb_q, 1)
+            qdot_sym = MX.sym("qdot", self.nb_qdot, 1)
+            jacobian_qdot = self.holonomic_constraints_jacobian(q_sym) @ qdot_sym
+            self._jacobian_dot_qdot = Function(
+                "holonomic_constraints_jacobian_dot_qdot",
+                [q_sym, qdot_sym],
+                [jtimes(jacobian_qdot, q_sym, qdot_sym)],
+                ["q", "qdot"],
+                ["jacobian_dot_qdot"],
+            ).expand()
+        return self._jacobian_dot_qdot(q, qdot)
+
     def holonomic_constraints_double_derivative(self, q: MX, qdot: MX, qddot: MX):
         return vertcat(*[c(q, qdot, qddot) for c in self._holonomic_constraints_double_derivatives])
 
-    def constrained_forward_dynamics(self, q, qdot, tau, external_forces=None, f_contacts=None) -> MX:
+    def constrained_forward_dynamics(
+        self, q, qdot, tau, external_forces=None, f_contacts=None, return_multipliers: bool = False
+    ) -> MX | tuple[MX, MX]:
         """
-        Compute the forward dynamics of the model, with full implicit formulation
+        Compute the forward dynamics of the model, with full implicit formulation.
+        The augmented system is solved with the solver chosen by set_constrained_dynamics_solver
 
         Parameters
         ----------
@@ -112,11 +318,13 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
             The external forces
         f_contacts: MX
             The contact forces
+        return_multipliers: bool
+            If the lagrange multipliers should also be returned
 
         Returns
         -------
-        MX
-            The generalized accelerations
+        MX | tuple[MX, MX]
+            The generalized accelerations (and the lagrange multipliers if return_multipliers)
         """
         if external_forces is not None:
             external_forces = biorbd.to_spatial_vector(external_forces)
@@ -128,6 +336,19 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         constraint_jacobian = self.holonomic_constraints_jacobian(q)
         constraint_jacobian_transpose = constraint_jacobian.T
 
+        # compute b vector
+        generalized_forces = tau - self.model.NonLinearEffect(q_biorbd, qdot_biorbd, f_ext=None, f_contacts=None).to_mx()
+
+        biais = -self.holonomic_constraints_jacobian_dot_qdot(q, qdot)
+        if self.stabilization:
+            biais -= self.alpha * self.holonomic_constraints(q) + self.beta * self.holonomic_constraints_derivative(
+                q, qdot
+            )
+
+        if self.constrained_dynamics_solver == "schur":
+            qddot, lambdas = schur_complement_solve(mass_matrix, constraint_jacobian, generalized_forces, biais)
+            return (qddot, lambdas) if return_multipliers else qddot
+
         # compute the matrix DAE
         mass_matrix_augmented = horzcat(mass_matrix, constraint_jacobian_transpose)
         mass_matrix_augmented = vertcat(
@@ -137,22 +358,13 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
                 MX.zeros((constraint_jacobian_transpose.shape[1], constraint_jacobian_transpose.shape[1])),
             ),
         )
-
-        # compute b vector
-        tau_augmented = tau - self.model.NonLinearEffect(q_biorbd, qdot_biorbd, f_ext=None, f_contacts=None).to_mx()
-
-        biais = -self.holonomic_constraints_jacobian(qdot) @ qdot
-        if self.stabilization:
-            biais -= self.alpha * self.holonomic_constraints(q) + self.beta * self.holonomic_constraints_derivative(
-                q, qdot
-            )
-
-        tau_augmented = vertcat(tau_augmented, biais)
+        tau_augmented = vertcat(generalized_forces, biais)
 
         # solve with casadi Ax = b
-
         x = solve(mass_matrix_augmented, tau_augmented, "symbolicqr")
 
+        if return_multipliers:
+            return x[: self.nb_qddot], x[self.nb_qddot :]
         return x[: self.nb_qddot]
 
     def partitioned_mass_matrix(self, q):
@@ -167,8 +379,13 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         Returns
         -------
         MX
-            The partitioned mass matrix, reordered in function independent and dependent joints
+            The partitioned mass matrix, reordered in function independent and dependent joints. If q is numeric,
+            it is a np.ndarray computed with the Eigen model, without building a graph.
         """
+        if is_numeric(q):
+            mass_matrix = self.model_eigen.massMatrix(numeric_vector(q)).to_array()
+            return mass_matrix[np.ix_(self._partition_order, self._partition_order)]
+
         # u: independent
         # v: dependent
         mass_matrix = self.model.massMatrix(q).to_mx()
@@ -192,7 +409,14 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
             The generalized coordinates
         qdot: MX
             The generalized velocities
+
+        If q is numeric, it is a np.ndarray computed with the Eigen model, without building a graph.
         """
+        if is_numeric(q):
+            non_linear_effect = self.model_eigen.NonLinearEffect(
+                numeric_vector(q), numeric_vector(qdot), f_ext=f_ext, f_contacts=f_contacts
+            ).to_array()
+            return non_linear_effect[self._partition_order]
 
         non_linear_effect = self.model.NonLinearEffect(q, qdot, f_ext=f_ext, f_contacts=f_contacts).to_mx()
         non_linear_effect_u = non_linear_effect[self._independent_joint_index]
@@ -214,6 +438,9 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         MX
             The partitioned q, reorder in function independent and dependent joints
         """
+        if is_numeric(q):
+            return numeric_vector(q)[self._partition_order]
+
         q_u = q[self._independent_joint_index]
         q_v = q[self._dependent_joint_index]
 
@@ -233,6 +460,9 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         MX
             The partitioned qdot, reordered in function independent and dependent joints
         """
+        if is_numeric(qdot):
+            return numeric_vector(qdot)[self._partition_order]
+
         qdot_u = qdot[self._independent_joint_index]
         qdot_v = qdot[self._dependent_joint_index]
 
@@ -252,6 +482,9 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         MX
             The partitioned tau, reordered in function independent and dependent joints
         """
+        if is_numeric(tau):
+            return numeric_vector(tau)[self._partition_order]
+
         tau_u = tau[self._independent_joint_index]
         tau_v = tau[self._dependent_joint_index]
 
@@ -271,12 +504,36 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         MX
             The partitioned constrained jacobian, reordered in function independent and dependent joints
         """
+        if is_numeric(q):
+            constrained_jacobian = np.array(self.holonomic_constraints_jacobian(numeric_vector(q)), dtype=float)
+            return constrained_jacobian[:, self._partition_order]
+
         constrained_jacobian = self.holonomic_constraints_jacobian(q)
         constrained_jacobian_u = constrained_jacobian[:, self._independent_joint_index]
         constrained_jacobian_v = constrained_jacobian[:, self._dependent_joint_index]
 
         return horzcat(constrained_jacobian_u, constrained_jacobian_v)
 
+    def partition_context(self, q: MX, qdot: MX = None) -> PartitionContext:
+        """
+        Compute once the constraint jacobian, its dependent part Jv, the inverse of Jv, the coupling matrix Bvu
+        and, if qdot is given, the biais vector. The context is then given to the other methods to avoid rebuilding
+        the same symbolic expressions.
+
+        Parameters
+        ----------
+        q: MX
+            The generalized coordinates
+        qdot: MX
+            The generalized velocities
+
+        Returns
+        -------
+        PartitionContext
+            The terms of the partition evaluated at (q, qdot)
+        """
+        return PartitionContext(self, q, qdot)
+
     def forward_dynamics_constrained_independent(self, u, udot, tau, external_forces=None, f_contacts=None) -> MX:
         """
         This is the forward dynamics of the model, but only for the independent joints
@@ -305,9 +562,11 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         v = self.compute_v_from_u_explicit_symbolic(u)
         q = self.q_from_u_and_v(u, v)
 
-        Bvu = self.coupling_matrix(q)
+        context = self.partition_context(q)
+        Bvu = context.coupling_matrix
         vdot = Bvu @ udot
         qdot = self.q_from_u_and_v(udot, vdot)
+        context.set_qdot(qdot)
 
         partitioned_mass_matrix = self.partitioned_mass_matrix(q)
         m_uu = partitioned_mass_matrix[: self.nb_independent_joints, : self.nb_independent_joints]
@@ -332,13 +591,15 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         modified_generalized_forces = tau_u + Bvu.T @ tau_v
 
-        uddot = inv(modified_mass_matrix) @ (
-            modified_generalized_forces - second_term @ self.biais_vector(q, qdot) - modified_non_linear_effect
+        uddot = spd_solve(
+            modified_mass_matrix,
+            modified_generalized_forces - second_term @ context.biais - modified_non_linear_effect,
+            self.linear_algebra_backend,
         )
 
         return uddot
 
-    def coupling_matrix(self, q: MX) -> MX:
+    def coupling_matrix(self, q: MX, context: PartitionContext = None) -> MX:
         """
         Compute the coupling matrix, denoted Bvu in the paper :
 
@@ -346,17 +607,15 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         ROBOTRAN: a powerful symbolic gnerator of multibody models, Mech. Sci., 4, 199–219,
         https://doi.org/10.5194/ms-4-199-2013, 2013.
 
+        If a context computed at the same q is given, its coupling matrix is reused. If q is numeric, the matrix is
+        a np.ndarray computed without building a graph.
         """
+        if context is None:
+            context = self.partition_context(q)
 
-        J = self.partitioned_constrained_jacobian(q)
-        Jv = J[:, self.nb_independent_joints :]
-        Jv_inv = inv(Jv)  # inv_minor otherwise ?
+        return context.coupling_matrix
 
-        Ju = J[:, : self.nb_independent_joints]
-
-        return -Jv_inv @ Ju
-
-    def biais_vector(self, q: MX, qdot: MX) -> MX:
+    def biais_vector(self, q: MX, qdot: MX, context: PartitionContext = None) -> MX:
         """
         Compute the biais vector, denoted b in the paper :
 
@@ -366,12 +625,15 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         The right term of the equation (15) in the paper.
 
+        If a context computed at the same (q, qdot) is given, its biais vector is reused. If q and qdot are numeric,
+        the vector is a np.ndarray computed without building a graph.
         """
-        J = self.partitioned_constrained_jacobian(q)
-        Jv = J[:, self.nb_independent_joints :]
-        Jv_inv = inv(Jv)  # inv_minor otherwise ?
+        if context is None:
+            context = self.partition_context(q, qdot)
+        elif context.biais is None:
+            context.set_qdot(qdot)
 
-        return - Jv_inv @ self.holonomic_constraints_jacobian(qdot) @ qdot
+        return context.biais
 
     def q_from_u_and_v(self, u: MX, v: MX) -> MX:
         """
@@ -379,31 +641,128 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         Parameters
         ----------
-        u: MX
+        u: MX | SX | DM | np.ndarray
             The independent joint coordinates
-        v: MX
+        v: MX | SX | DM | np.ndarray
             The dependent joint coordinates
 
         Returns
         -------
-        MX
-            The generalized coordinates
+        MX | SX | DM
+            The generalized coordinates, DM if u and v are numeric
         """
 
-        q = MX() if isinstance(u, MX) else DM()
-        for i in range(self.nb_q):
-            if i in self._independent_joint_index:
-                q = vertcat(q, u[self._independent_joint_index.index(i)])
-            else:
-                q = vertcat(q, v[self._dependent_joint_index.index(i)])
+        if not isinstance(u, (MX, SX)) and not isinstance(v, (MX, SX)):
+            u, v = DM(u), DM(v)
+
+        # one gather with the permutation computed in set_dependencies
+        return vertcat(u, v)[self._q_permutation]
+
+    def state_from_partition(self, state_u: MX, state_v: MX) -> MX:
+        """
+        Same as q_from_u_and_v, with the name used by bioptim HolonomicBiorbdModel
+        """
+        return self.q_from_u_and_v(state_u, state_v)
+
+    @property
+    def planar_fast_path(self) -> bool:
+        """
+        If the model moves in the (y, z) plane and the loop has two constraints on two dependent joints, Jv is then
+        inverted in closed form (see linear_algebra.inv_2x2) with the "inverse" backend
+        """
+        if self._is_planar is None:
+            self._is_planar = is_planar_yz(self.model)
+        return self._is_planar and self.nb_dependent_joints == 2 and self.nb_holonomic_constraints == 2
+
+    def add_two_link_loop(
+        self,
+        reference_segment: str,
+        second_link_segment: str,
+        end_effector_marker: str,
+        target_marker: str,
+        joint_index: list,
+        elbow_down: bool = True,
+    ):
+        """
+        Declare a planar two-link closed loop, its two dependent joints are then computed in closed form (see
+        two_link_loop.py). If no loop is declared, the knee-hand loop DEFAULT_TWO_LINK_LOOP is used when the model
+        has its segments and markers.
+
+        Parameters
+        ----------
+        reference_segment: str
+            The segment in which frame the loop is solved
+        second_link_segment: str
+            The segment of the second link, its translation in its parent gives the length of the first link
+        end_effector_marker: str
+            The marker at the end of the second link
+        target_marker: str
+            The marker the end effector must be superimposed to
+        joint_index: list
+            The index in q of the two dependent joints of the loop (first link, second link)
+        elbow_down: bool
+            The branch of the solution
+        """
+        self._two_link_loops.append(
+            TwoLinkLoop(reference_segment, second_link_segment, end_effector_marker, target_marker, joint_index, elbow_down)
+        )
+        self._active_two_link_loops = None
+        self._trajectory_functions = {}
+
+    def set_ik_clamp_margin(self, clamp_margin: float | None):
+        """
+        Smoothly clamp the cosine of the elbow angle of the two-link loops to [-1 + clamp_margin, 1 - clamp_margin],
+        so that the explicit inverse kinematics stays defined (no NaN) and differentiable when the loop gets close to
+        full extension
+
+        Parameters
+        ----------
+        clamp_margin: float | None
+            The margin, e.g. 1e-6, None for the exact inverse kinematics
+        """
+        self.ik_clamp_margin = clamp_margin
+        self._active_two_link_loops = None
+        self._trajectory_functions = {}
+
+    @property
+    def two_link_loops(self) -> list[TwoLinkLoop]:
+        """
+        The two-link loops solved in closed form, with their geometry computed for the current model
+        """
+        if self._active_two_link_loops is None:
+            loops = list(self._two_link_loops)
+            if not loops and self.nb_dependent_joints == 2 and has_default_two_link_loop(self.model):
+                loops.append(TwoLinkLoop(**DEFAULT_TWO_LINK_LOOP, joint_index=self.dependent_joint_index))
+            for loop in loops:
+                loop.set_geometry(self.model)
+                loop.clamp_margin = self.ik_clamp_margin
+            self._active_two_link_loops = loops
+        return self._active_two_link_loops
+
+    @property
+    def has_explicit_inverse_kinematics(self) -> bool:
+        """
+        If all the dependent joints are computed in closed form by the two-link loops
+        """
+        loop_joints = sorted(joint for loop in self.two_link_loops for joint in loop.joint_index)
+        return loop_joints == sorted(self.dependent_joint_index)
 
-        return q
+    def _v_from_loops(self, thetas: list):
+        """
+        Gather the angles of the loops in the order of the dependent joints
+        """
+        v = [None] * self.nb_dependent_joints
+        for loop, theta in zip(self.two_link_loops, thetas):
+            for i, joint in enumerate(loop.joint_index):
+                v[list(self.dependent_joint_index).index(joint)] = theta[i]
+        return vertcat(*v)
 
     def compute_v_from_u_explicit_numeric(self, u: MX):
         """
         Compute the dependent joint from the independent joint,
         This is done by solving the system of equations given by the holonomic constraints
-        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
+        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints.
+        The two-link loops are solved in closed form, otherwise the Newton solver is used.
 
         !! numeric version of the function
 
@@ -417,50 +776,20 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         theta:
             The angle of the dependente joint
         """
-        model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
-
-        index_segment_ref = segment_index(model_eigen, "Arm_location")
-        index_forearm = segment_index(model_eigen, "Forearm_location")
-        index_marker_hand = marker_index(model_eigen, "CENTER_HAND")
-        index_marker_knee = marker_index(model_eigen, "BELOW_KNEE")
-
-        # Find length arm and forearm
-        forearm_JCS_trans = model_eigen.segments()[index_forearm].localJCS().trans().to_array()
-        hand_JCS_trans = model_eigen.marker(index_marker_hand).to_array()
-        l1 = np.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)
-        l2 = np.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)
+        if not self.has_explicit_inverse_kinematics:
+            return self.newton_solver(u)
 
         v = DM.zeros(self.nb_dependent_joints, 1)
-        q = self.q_from_u_and_v(u, v)
-
-        # Matrix RT "Arm location" (ref)
-        segment_ref_JCS = model_eigen.globalJCS(q.toarray().squeeze(), index_segment_ref).to_array()
-
-        # Perform the forward kinematics
-        markers = model_eigen.markers(q.toarray().squeeze())
-        marker_knee_in_g = markers[index_marker_knee].to_array()
-
-        # Position markers on arm location frame
-        R_arm_global = inv(segment_ref_JCS)
-        marker_knee_in_arm = (R_arm_global @ np.concatenate((marker_knee_in_g, np.ones(1)), axis=0))[:3]
-        xp = -marker_knee_in_arm[2]
-        yp = marker_knee_in_arm[1]
-
-        # Find position dependente joint
-        theta = self.inverse_kinematics_2d(
-            l1=l1,
-            l2=l2,
-            xp=xp,
-            yp=yp,
-        )
+        q = self.q_from_u_and_v(u, v).toarray().squeeze()
 
-        return theta
+        return self._v_from_loops([loop.solve_numeric(self.model_eigen, q) for loop in self.two_link_loops])
 
     def compute_v_from_u_explicit_symbolic(self, u: MX):
         """
         Compute the dependent joint from the independent joint,
         This is done by solving the system of equations given by the holonomic constraints
-        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
+        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints.
+        The two-link loops are solved in closed form, otherwise the Newton solver is used.
 
         !! symbolic version of the function
 
@@ -475,69 +804,78 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
             The angle of the dependente joint
 
         """
-        index_segment_ref = segment_index(self.model, "Arm_location")
-        index_forearm = segment_index(self.model, "Forearm_location")
-        index_marker_hand = marker_index(self.model, "CENTER_HAND")
-        index_marker_knee = marker_index(self.model, "BELOW_KNEE")
-
-        # Find length arm and forearm
-        forearm_JCS_trans = self.model.segments()[index_forearm].localJCS().trans().to_mx()
-        hand_JCS_trans = self.model.marker(index_marker_hand).to_mx()
-        l1 = cas.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)
-        l2 = cas.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)
+        if not self.has_explicit_inverse_kinematics:
+            return self.newton_solver(u)
 
         v = MX.sym("v", self.nb_dependent_joints)
         q = self.q_from_u_and_v(u, v)
 
-        # Matrix RT "Arm location" (ref)
-        segment_ref_JCS = self.model.globalJCS(q, index_segment_ref).to_mx()
-
-        # Perform the forward kinematics
-        markers = self.markers(q)
-        marker_knee_in_g = markers[index_marker_knee]
-
-        # Position markers on arm location frame
-        R_arm_global = inv(segment_ref_JCS)
-        marker_knee_in_arm = (R_arm_global @ vertcat(markers[index_marker_knee], cas.MX.ones(1)))[:3]
-        xp = -marker_knee_in_arm[2]
-        yp = marker_knee_in_arm[1]
-
-        # Find position dependente joint
-        theta = self.inverse_kinematics_2d(
-            l1=l1,
-            l2=l2,
-            xp=xp,
-            yp=yp,
-        )
-        return theta
+        return self._v_from_loops([loop.solve_symbolic(self, q) for loop in self.two_link_loops])
 
-    @staticmethod
-    def inverse_kinematics_2d(l1, l2, xp, yp):
+    def _trajectory_function(self, with_velocities: bool) -> Function:
         """
-        Inverse kinematics with elbow down solution.
+        Build once the Function that reconstructs q (and qdot) at one node from the independent joints
+
         Parameters
         ----------
-        l1:
-            The length of the arm
-        l2:
-            The length of the forearm
-        xp:
-            Coordinate on x of the marker of the knee in the arm's frame
-        yp:
-            Coordinate on y of the marker of the knee in the arm's frame
+        with_velocities: bool
+            If qdot is also reconstructed from udot
 
         Returns
         -------
-        theta:
-            The dependent joint
+        The Function u (, udot) -> q, v (, qdot)
+        """
+        if with_velocities not in self._trajectory_functions:
+            u = MX.sym("u", self.nb_independent_joints, 1)
+            v = self.compute_v_from_u_explicit_symbolic(u)
+            q = self.q_from_u_and_v(u, v)
+            if with_velocities:
+                udot = MX.sym("udot", self.nb_independent_joints, 1)
+                qdot = self.q_from_u_and_v(udot, self.coupling_matrix(q) @ udot)
+                func = Function("compute_trajectory", [u, udot], [q, v, qdot], ["u", "udot"], ["q", "v", "qdot"])
+            else:
+                func = Function("compute_trajectory", [u], [q, v], ["u"], ["q", "v"])
+            self._trajectory_functions[with_velocities] = func
+        return self._trajectory_functions[with_velocities]
+
+    def compute_trajectory(
+        self, u: np.ndarray, udot: np.ndarray = None, parallelization: str = "serial"
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
+        Reconstruct a whole trajectory of the closed-loop phase in one call, the explicit inverse kinematics and the
+        coupling matrix being evaluated on all the nodes by a mapped casadi Function
 
-        theta2 = cas.acos((xp**2 + yp**2 - (l2**2 + l1**2)) / (2 * l1 * l2))
-        theta1 = cas.atan2(
-            (-xp * l2 * cas.sin(theta2) + yp * (l1 + l2 * cas.cos(theta2))),
-            (xp * (l1 + l2 * cas.cos(theta2)) + yp * l2 * cas.sin(theta2)),
-        )
-        return vertcat(theta1, theta2)
+        Parameters
+        ----------
+        u: np.ndarray
+            The independent joints, of shape (nb_independent_joints, nb_nodes)
+        udot: np.ndarray
+            The velocities of the independent joints, of shape (nb_independent_joints, nb_nodes)
+        parallelization: str
+            The parallelization of the map, "serial" or "thread"
+
+        Returns
+        -------
+        q, qdot, v: the generalized coordinates and velocities of shape (nb_q, nb_nodes), qdot is None if udot is
+        not given, and the dependent joints of shape (nb_dependent_joints, nb_nodes)
+        """
+        u = np.array(u, dtype=float).reshape(self.nb_independent_joints, -1)
+        nb_nodes = u.shape[1]
+
+        if udot is None:
+            q, v = self._trajectory_function(with_velocities=False).map(nb_nodes, parallelization)(u)
+            return np.array(q), None, np.array(v)
+
+        udot = np.array(udot, dtype=float).reshape(self.nb_independent_joints, -1)
+        q, v, qdot = self._trajectory_function(with_velocities=True).map(nb_nodes, parallelization)(u, udot)
+        return np.array(q), np.array(qdot), np.array(v)
+
+    @staticmethod
+    def inverse_kinematics_2d(l1, l2, xp, yp, elbow_down: bool = True):
+        """
+        Inverse kinematics of a planar two-link chain, see two_link_loop.inverse_kinematics_2d
+        """
+        return inverse_kinematics_2d(l1, l2, xp, yp, elbow_down)
 
     def compute_v_from_u(self, u: MX):
         """
@@ -557,25 +895,7 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         MX
             The dependent joint
         """
-
-        decision_variables = MX.sym("decision_variables", self.nb_dependent_joints)
-        q = self.q_from_u_and_v(u, decision_variables)
-        mx_residuals = self.holonomic_constraints(q)
-
-        residuals = Function(
-            "final_states_residuals",
-            [decision_variables, u],
-            [mx_residuals],
-        ).expand()
-
-        opts = {"abstol": 1e-10}
-        ifcn = rootfinder("ifcn", "newton", residuals, opts)
-        v_opt = ifcn(
-            MX(),
-            u,
-        )
-
-        return v_opt
+        return self.newton_solver(u)
 
     def compute_v_from_u_numeric(self, u: DM, v_init=None):
         """
@@ -597,39 +917,40 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         DM
             The numerical values of the dependent joint for a given independent joint u
         """
+        return self.newton_solver(u, v_init)
 
-        decision_variables = MX.sym("decision_variables", self.nb_dependent_joints)
-        q = self.q_from_u_and_v(u, decision_variables)
-        mx_residuals = self.holonomic_constraints(q)
-
-        residuals = Function(
-            "final_states_residuals",
-            [decision_variables],
-            [mx_residuals],
-        ).expand()
-
-        # Create an implicit function instance to solve the system of equations
-        opts = {
-            "abstol": 1e-10,
-            "print_iteration": True,
-            # "constraints": [-1, 1],
-        }
-        ifcn = rootfinder("ifcn", "newton", residuals, opts)
-        v_opt = ifcn(
-            v_init,
-        )
+    def compute_v_from_u_trajectory(self, u: np.ndarray, v_init: np.ndarray = None) -> tuple[np.ndarray, dict]:
+        """
+        Compute the dependent joints along a trajectory with the Newton solver, each node being warm-started from
+        the solution of the previous node
 
-        return v_opt
+        !! Numeric version of the function
 
+        Parameters
+        ----------
+        u: np.ndarray
+            The independent joints, of shape (nb_independent_joints, nb_nodes)
+        v_init: np.ndarray
+            The initial guess for the dependent joints at the first node
 
-    def compute_vdot(self, q, udot):
-        Bvu = self.coupling_matrix(q)
+        Returns
+        -------
+        v, stats: the dependent joints of shape (nb_dependent_joints, nb_nodes) and the number of iterations,
+        the norm of the residuals and the success of each node
+        """
+        return self.newton_solver.solve_trajectory(u, v_init)
+
+
+    def compute_vdot(self, q, udot, context: PartitionContext = None):
+        Bvu = self.coupling_matrix(q, context)
         vdot = Bvu @ udot
         return vdot
 
-    def compute_vddot(self, q, qdot, uddot):
-        Bvu = self.coupling_matrix(q)
-        biais = self.biais_vector(q, qdot)
+    def compute_vddot(self, q, qdot, uddot, context: PartitionContext = None):
+        if context is None:
+            context = self.partition_context(q, qdot)
+        Bvu = self.coupling_matrix(q, context)
+        biais = self.biais_vector(q, qdot, context)
         vddot = Bvu @ uddot + biais
 
         return vddot
@@ -647,9 +968,7 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         Equation (17) in the paper.
         """
 
-        J = self.partitioned_constrained_jacobian(q)
-        Jv = J[:, self.nb_independent_joints:]
-        Jvt_inv = inv(Jv.T)
+        context = self.partition_context(q)
 
         partitioned_mass_matrix = self.partitioned_mass_matrix(q)
         m_vu = partitioned_mass_matrix[self.nb_independent_joints:, : self.nb_independent_joints]
@@ -664,19 +983,20 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         Q = self.partitioned_tau(tau)
         Qv = Q[self.nb_independent_joints:]
 
-        return Jvt_inv @ (m_vu @ qddot_u + m_vv @ qddot_v + non_linear_effect_v - Qv)
+        return context.solve_jacobian_v_transpose(m_vu @ qddot_u + m_vv @ qddot_v + non_linear_effect_v - Qv)
 
-    def compute_lagrange_multipliers(self, q, qdot, uddot, tau, f_ext=None, f_contacts=None) -> MX:
+    def compute_lagrange_multipliers(
+        self, q, qdot, uddot, tau, f_ext=None, f_contacts=None, context: PartitionContext = None
+    ) -> MX:
 
-        J = self.partitioned_constrained_jacobian(q)
-        Jv = J[:, self.nb_independent_joints:]
-        Jv_transpose_inv = inv(transpose(Jv))  # inv_minor otherwise ?
+        if context is None:
+            context = self.partition_context(q, qdot)
 
         partitioned_mass_matrix = self.partitioned_mass_matrix(q)
         m_vu = partitioned_mass_matrix[self.nb_independent_joints:, :self.nb_independent_joints]
         m_vv = partitioned_mass_matrix[self.nb_independent_joints:, self.nb_independent_joints:]
 
-        vddot = self.compute_vddot(q, qdot, uddot)
+        vddot = self.compute_vddot(q, qdot, uddot, context)
 
         non_linear_effect = self.model.NonLinearEffect(q, qdot, f_ext=f_ext, f_contacts=f_contacts).to_mx()
         non_linear_effect_v = non_linear_effect[self._dependent_joint_index]
@@ -684,6 +1004,6 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         partitioned_tau = self.partitioned_tau(tau)
         tau_v = partitioned_tau[self.nb_independent_joints:]
 
-        lambdas = Jv_transpose_inv @ (m_vu @ uddot + m_vv @ vddot + non_linear_effect_v - tau_v)
+        lambdas = context.solve_jacobian_v_transpose(m_vu @ uddot + m_vv @ vddot + non_linear_effect_v - tau_v)
 
         return lambdas
\ No newline at end of file
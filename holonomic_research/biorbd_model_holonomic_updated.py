@@ -1,3 +1,4 @@
+import sys
 from typing import Callable, Any
 import biorbd_casadi as biorbd
 import biorbd as biorbd_eigen
@@ -8,54 +9,717 @@ from biorbd_casadi import (
     GeneralizedTorque,
     GeneralizedAcceleration,
 )
-from biorbd import marker_index, segment_index
-from casadi import MX, DM, vertcat, horzcat, Function, solve, inv_minor, inv, fmod, pi, transpose
-from bioptim import HolonomicBiorbdModel, ConfigureProblem, DynamicsFunctions
+from casadi import MX, SX, DM, vertcat, horzcat, Function, jtimes, solve, inv_minor, inv, fmod, pi, transpose
+from bioptim import HolonomicBiorbdModel, ConfigureProblem, DynamicsFunctions, DynamicsEvaluation
 import numpy as np
+from linear_algebra import PartitionContext, check_backend, is_numeric, numeric_vector, spd_solve
+from newton_solver import DependentJointsNewtonSolver
+from partition import CONDITION_NUMBER_THRESHOLD, check_partition_conditioning, select_partition
+from codegen import DEFAULT_COMPILER, cached_external, cached_serialized, file_hash, hash_key, source_hash
+from two_link_loop import (
+    DEFAULT_TWO_LINK_LOOP,
+    TwoLinkLoop,
+    has_default_two_link_loop,
+    inverse_kinematics_2d,
+    is_planar_yz,
+)
+
+# the Functions of the on-disk cache are built by the code of these modules, editing one of them changes the keys
+_SOURCE_HASH = source_hash(
+    sys.modules[__name__], sys.modules[PartitionContext.__module__], sys.modules[TwoLinkLoop.__module__]
+)
 
 
 class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
     """
     This class allows to define a biorbd model with custom holonomic constraints.
     """
+
+    # "inverse" or "solve", see linear_algebra.py
+    linear_algebra_backend = "inverse"
+    # evaluate the partitioned dynamics as an SX Function, see expanded_dynamics
+    expand_dynamics = False
+    # smooth clamp of the explicit inverse kinematics near full extension, see two_link_loop.inverse_kinematics_2d
+    ik_clamp_margin = None
+
     def __init__(self, bio_model: str | biorbd.Model):
         super().__init__(bio_model)
+        self._two_link_loops = []
+        self._active_two_link_loops = None
+        self._model_eigen = None
+        self._trajectory_functions = {}
+        self._q_permutation = None
+        self._newton_solver = None
+        self._codegen_options = None
+        self._compiled_dynamics = {}
+        self._function_cache_options = None
+        self._cached_functions = {}
+        self._sx_functions = {}
+        self._expanded_dynamics = None
+        self._expanded_residual = None
+        self._is_planar = None
+        self._jacobian_dot_qdot = None
 
-    @staticmethod
-    def inverse_kinematics_2d(l1, l2, xp, yp):
+    def set_holonomic_configuration(
+        self,
+        constraints_list,
+        dependent_joint_index: list = None,
+        independent_joint_index: list = None,
+        reference_q: np.ndarray = None,
+        candidate_joints: list = None,
+    ):
         """
-        Inverse kinematics with elbow down solution.
+        Set the holonomic constraints and the partition of the joints, then precompute the geometry of the loops
+        used by the explicit inverse kinematics.
+
         Parameters
         ----------
-        l1:
-            The length of the arm
-        l2:
-            The length of the forearm
-        xp:
-            Coordinate on x of the marker of the knee in the arm's frame
-        yp:
-            Coordinate on y of the marker of the knee in the arm's frame
+        constraints_list: HolonomicConstraintsList
+            The list of the holonomic constraints
+        dependent_joint_index: list
+            The index of the dependent joints
+        independent_joint_index: list
+            The index of the independent joints
+        reference_q: np.ndarray
+            If the partition is not given, the dependent joints are selected automatically at this pose by a
+            column-pivoted QR of the constraint jacobian (see partition.select_partition)
+        candidate_joints: list
+            The joints that can be selected as dependent joints, all the joints if None
+        """
+        super().set_holonomic_configuration(
+            constraints_list=constraints_list,
+            dependent_joint_index=dependent_joint_index,
+            independent_joint_index=independent_joint_index,
+        )
+        if dependent_joint_index is None and independent_joint_index is None and reference_q is not None:
+            # the constraints are built once, with all the joints independent, then the partition is selected on
+            # their jacobian at the reference pose
+            constraint_jacobian = np.array(self.holonomic_constraints_jacobian(DM(reference_q)), dtype=float)
+            self._dependent_joint_index, self._independent_joint_index = select_partition(
+                constraint_jacobian, candidate_joints
+            )
+        # q = vertcat(q_u, q_v)[self._q_permutation]
+        self._q_permutation = [
+            int(i) for i in np.argsort(list(self.independent_joint_index) + list(self.dependent_joint_index))
+        ]
+        self.invalidate_loop_geometry()
+        self.two_link_loops
+
+    def state_from_partition(self, state_u: MX, state_v: MX) -> MX:
+        """
+        Compute the generalized coordinates (or velocities, accelerations) from the independent and dependent parts
+        with one gather instead of one vertcat per degree of freedom
+
+        Parameters
+        ----------
+        state_u: MX | SX | DM | np.ndarray
+            The independent part
+        state_v: MX | SX | DM | np.ndarray
+            The dependent part
 
         Returns
         -------
-        theta:
-            The dependent joint
+        MX | SX | DM
+            The full state, DM if state_u and state_v are numeric
         """
+        if self._q_permutation is None:
+            return super().state_from_partition(state_u, state_v)
 
-        theta2 = cas.acos(
-            (xp ** 2 + yp ** 2 - (l2 ** 2 + l1 ** 2)) / (2 * l1 * l2)
+        if not isinstance(state_u, (MX, SX)) and not isinstance(state_v, (MX, SX)):
+            state_u, state_v = DM(state_u), DM(state_v)
+
+        return vertcat(state_u, state_v)[self._q_permutation]
+
+    def add_two_link_loop(
+        self,
+        reference_segment: str,
+        second_link_segment: str,
+        end_effector_marker: str,
+        target_marker: str,
+        joint_index: list,
+        elbow_down: bool = True,
+    ):
+        """
+        Declare a planar two-link closed loop, its two dependent joints are then computed in closed form (see
+        two_link_loop.py). If no loop is declared, the knee-hand loop DEFAULT_TWO_LINK_LOOP is used when the model
+        has its segments and markers. If the loops do not cover all the dependent joints, Newton iterations are used.
+
+        Parameters
+        ----------
+        reference_segment: str
+            The segment in which frame the loop is solved
+        second_link_segment: str
+            The segment of the second link, its translation in its parent gives the length of the first link
+        end_effector_marker: str
+            The marker at the end of the second link
+        target_marker: str
+            The marker the end effector must be superimposed to
+        joint_index: list
+            The index in q of the two dependent joints of the loop (first link, second link)
+        elbow_down: bool
+            The branch of the solution
+        """
+        self._two_link_loops.append(
+            TwoLinkLoop(reference_segment, second_link_segment, end_effector_marker, target_marker, joint_index, elbow_down)
         )
-        theta1 = cas.atan2(
-            (-xp * l2 * cas.sin(theta2) + yp * (l1 + l2 * cas.cos(theta2))),
-            (xp * (l1 + l2 * cas.cos(theta2)) + yp * l2 * cas.sin(theta2))
+        self.invalidate_loop_geometry()
+
+    def set_ik_clamp_margin(self, clamp_margin: float | None):
+        """
+        Smoothly clamp the cosine of the elbow angle of the two-link loops to [-1 + clamp_margin, 1 - clamp_margin],
+        so that the explicit inverse kinematics stays defined (no NaN) and differentiable when the loop gets close to
+        full extension
+
+        Parameters
+        ----------
+        clamp_margin: float | None
+            The margin, e.g. 1e-6, None for the exact inverse kinematics
+        """
+        self.ik_clamp_margin = clamp_margin
+        self.invalidate_loop_geometry()
+
+    @property
+    def two_link_loops(self) -> list[TwoLinkLoop]:
+        """
+        The two-link loops solved in closed form, with their geometry computed for the current model
+        """
+        if self._active_two_link_loops is None:
+            loops = list(self._two_link_loops)
+            if not loops and self.nb_dependent_joints == 2 and has_default_two_link_loop(self.model):
+                loops.append(TwoLinkLoop(**DEFAULT_TWO_LINK_LOOP, joint_index=self.dependent_joint_index))
+            for loop in loops:
+                loop.set_geometry(self.model)
+                loop.clamp_margin = self.ik_clamp_margin
+            self._active_two_link_loops = loops
+        return self._active_two_link_loops
+
+    @property
+    def has_explicit_inverse_kinematics(self) -> bool:
+        """
+        If all the dependent joints are computed in closed form by the two-link loops
+        """
+        loop_joints = sorted(joint for loop in self.two_link_loops for joint in loop.joint_index)
+        return loop_joints == sorted(self.dependent_joint_index)
+
+    def _q_v_from_loops(self, thetas: list):
+        """
+        Gather the angles of the loops in the order of the dependent joints
+        """
+        q_v = [None] * self.nb_dependent_joints
+        for loop, theta in zip(self.two_link_loops, thetas):
+            for i, joint in enumerate(loop.joint_index):
+                q_v[list(self.dependent_joint_index).index(joint)] = theta[i]
+        return vertcat(*q_v)
+
+    def invalidate_loop_geometry(self):
+        """
+        Discard the precomputed geometry of the loops. It has to be called if the segments or the markers of the
+        model are modified after set_holonomic_configuration, the geometry (and the numeric biorbd model) is then
+        recomputed at the next use.
+        """
+        self._active_two_link_loops = None
+        self._model_eigen = None
+        self._trajectory_functions = {}
+        self._newton_solver = None
+        self._sx_functions = {}
+        self._expanded_dynamics = None
+        self._expanded_residual = None
+        self._jacobian_dot_qdot = None
+        self._cached_functions = {}
+
+    @property
+    def newton_solver(self) -> DependentJointsNewtonSolver:
+        """
+        The Newton solver of the dependent joints, built once for the current constraints and partition
+        """
+        if self._newton_solver is None:
+            self._newton_solver = DependentJointsNewtonSolver(self)
+        return self._newton_solver
+
+    def compute_q_v(self, q_u: MX, q_v_init: MX = None) -> MX:
+        """
+        Compute the dependent joints with the Newton solver of the model instead of building a new rootfinder
+
+        Parameters
+        ----------
+        q_u: MX
+            The independent joints
+        q_v_init: MX
+            The initial guess of the dependent joints
+
+        Returns
+        -------
+        The dependent joints
+        """
+        return self.newton_solver(q_u, q_v_init)
+
+    def compute_v_from_u_trajectory(self, q_u: np.ndarray, q_v_init: np.ndarray = None) -> tuple[np.ndarray, dict]:
+        """
+        Compute the dependent joints along a trajectory with the Newton solver, each node being warm-started from
+        the solution of the previous node
+
+        Parameters
+        ----------
+        q_u: np.ndarray
+            The independent joints, of shape (nb_independent_joints, nb_nodes)
+        q_v_init: np.ndarray
+            The initial guess for the dependent joints at the first node
+
+        Returns
+        -------
+        q_v, stats: the dependent joints of shape (nb_dependent_joints, nb_nodes) and the number of iterations,
+        the norm of the residuals and the success of each node
+        """
+        return self.newton_solver.solve_trajectory(q_u, q_v_init)
+
+    @property
+    def model_eigen(self) -> biorbd_eigen.Model:
+        """
+        The numeric (Eigen) biorbd model of the same .bioMod, loaded once and reused by the numeric functions
+        """
+        if self._model_eigen is None:
+            self._model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
+        return self._model_eigen
+
+    def holonomic_constraints_jacobian_dot_qdot(self, q: MX, qdot: MX) -> MX:
+        """
+        The velocity-product term of the constraints at the acceleration level Jdot(q, qdot) qdot, computed as the
+        directional derivative of J(q) qdot along qdot (forward mode AD) instead of evaluating J a second time at
+        qdot. The Function is built and expanded once.
+
+        Parameters
+        ----------
+        q: MX
+            The generalized coordinates
+        qdot: MX
+            The generalized velocities
+
+        Returns
+        -------
+        Jdot qdot, of size nb_holonomic_constraints
+        """
+        if self._jacobian_dot_qdot is None:
+
+            def build():
+                q_sym = MX.sym("q", self.nb_q, 1)
+                qdot_sym = MX.sym("qdot", self.nb_qdot, 1)
+                jacobian_qdot = self.holonomic_constraints_jacobian(q_sym) @ qdot_sym
+                return Function(
+                    "holonomic_constraints_jacobian_dot_qdot",
+                    [q_sym, qdot_sym],
+                    [jtimes(jacobian_qdot, q_sym, qdot_sym)],
+                    ["q", "qdot"],
+                    ["jacobian_dot_qdot"],
+                ).expand()
+
+            self._jacobian_dot_qdot = self.cached_function("holonomic_constraints_jacobian_dot_qdot", build)
+        return self._jacobian_dot_qdot(q, qdot)
+
+    def set_linear_algebra_backend(self, backend: str):
+        """
+        Choose how the partitioned formulation inverts the modified mass matrix and Jv
+
+        Parameters
+        ----------
+        backend: str
+            "inverse" to use casadi inv(), "solve" to use linear solves (Cholesky type for the modified mass matrix,
+            QR/LU for Jv) that give smaller expressions and are more robust near the tucked pose
+        """
+        check_backend(backend)
+        self.linear_algebra_backend = backend
+        self._expanded_dynamics = None
+        self._expanded_residual = None
+        self._discard_all_states_functions()
+
+    @property
+    def planar_fast_path(self) -> bool:
+        """
+        If the model moves in the (y, z) plane and the loop has two constraints on two dependent joints, Jv is then
+        inverted in closed form (see linear_algebra.inv_2x2) with the "inverse" backend
+        """
+        if self._is_planar is None:
+            self._is_planar = is_planar_yz(self.model)
+        return self._is_planar and self.nb_dependent_joints == 2 and self.nb_holonomic_constraints == 2
+
+    def set_expand_dynamics(self, expand_dynamics: bool):
+        """
+        Choose if the partitioned dynamics is evaluated as an MX graph or as an SX Function
+
+        Parameters
+        ----------
+        expand_dynamics: bool
+            True to evaluate the dynamics (explicit inverse kinematics, coupling matrix, biais vector and linear
+            solves included) in SX, it requires the dependent joints to be covered by the two-link loops
+        """
+        self.expand_dynamics = expand_dynamics
+        self._discard_all_states_functions()
+
+    @property
+    def expand_dynamics_function(self) -> bool:
+        """
+        If the dynamics Function given to bioptim is expanded. It is not when the dynamics is compiled
+        (enable_compiled_dynamics): the call to the external C function cannot be expanded to SX.
+        """
+        return self.expand_dynamics and self._codegen_options is None
+
+    def _sx_function(self, name: str) -> Function:
+        """
+        The expanded Function of a term that is computed by biorbd, so that it can be called with SX.
+        The linear algebra is done on the SX outputs, the Solve nodes of casadi MX cannot be expanded.
+
+        Parameters
+        ----------
+        name: str
+            "q_v", "partitioned_mass_matrix" or "partitioned_non_linear_effect"
+        """
+        if name not in self._sx_functions:
+            q_u = MX.sym("q_u", self.nb_independent_joints, 1)
+            q = MX.sym("q", self.nb_q, 1)
+            qdot = MX.sym("qdot", self.nb_q, 1)
+            if name == "q_v":
+                if not self.has_explicit_inverse_kinematics:
+                    raise RuntimeError(
+                        "The dynamics can only be expanded if the dependent joints are computed in closed form, "
+                        "declare the loops with add_two_link_loop"
+                    )
+                func = Function(name, [q_u], [self.compute_v_from_u_explicit_symbolic(q_u)])
+            elif name == "partitioned_mass_matrix":
+                func = Function(name, [q], [self.partitioned_mass_matrix(q)])
+            elif name == "partitioned_non_linear_effect":
+                func = Function(name, [q, qdot], [self.partitioned_non_linear_effect(q, qdot, None, None)])
+            else:
+                raise ValueError(f"Unknown function {name}")
+            self._sx_functions[name] = func.expand()
+        return self._sx_functions[name]
+
+    @property
+    def expanded_dynamics(self) -> Function:
+        """
+        The partitioned forward dynamics (q_u, qdot_u, tau) -> qddot_u as an SX Function
+        """
+        if self._expanded_dynamics is None:
+            self._expanded_dynamics = self.cached_function(
+                "partitioned_forward_dynamics", lambda: self._dynamics_function(SX), "SX"
+            )
+        return self._expanded_dynamics
+
+    def _dynamics_function(self, sym_type: type) -> Function:
+        """
+        The Function (q_u, qdot_u, tau) -> qddot_u of the partitioned forward dynamics
+
+        Parameters
+        ----------
+        sym_type: type
+            MX or SX, the type of the symbols of the Function
+        """
+        q_u = sym_type.sym("q_u", self.nb_independent_joints, 1)
+        qdot_u = sym_type.sym("qdot_u", self.nb_independent_joints, 1)
+        tau = sym_type.sym("tau", self.nb_tau, 1)
+        return Function(
+            "partitioned_forward_dynamics",
+            [q_u, qdot_u, tau],
+            [self._partitioned_forward_dynamics(q_u, qdot_u, tau)],
+            ["q_u", "qdot_u", "tau"],
+            ["qddot_u"],
+        )
+
+    def _residual_function(self, sym_type: type) -> Function:
+        """
+        The Function (q_u, qdot_u, qddot_u, tau) -> residual of partitioned_inverse_dynamics_residual
+
+        Parameters
+        ----------
+        sym_type: type
+            MX or SX, the type of the symbols of the Function
+        """
+        q_u = sym_type.sym("q_u", self.nb_independent_joints, 1)
+        qdot_u = sym_type.sym("qdot_u", self.nb_independent_joints, 1)
+        qddot_u = sym_type.sym("qddot_u", self.nb_independent_joints, 1)
+        tau = sym_type.sym("tau", self.nb_tau, 1)
+        modified_mass_matrix, modified_forces = self._partitioned_dynamics_terms(q_u, qdot_u, tau)
+        return Function(
+            "partitioned_inverse_dynamics_residual",
+            [q_u, qdot_u, qddot_u, tau],
+            [modified_mass_matrix @ qddot_u - modified_forces],
+            ["q_u", "qdot_u", "qddot_u", "tau"],
+            ["residual"],
         )
-        return vertcat(theta1, theta2)
+
+    def enable_compiled_dynamics(self, cache_dir: str = None, compiler: str = DEFAULT_COMPILER):
+        """
+        Replace the MX graph of partitioned_forward_dynamics by a call to a compiled C function (see codegen.py).
+        The shared library is cached on disk under a key that hashes the .bioMod and the holonomic configuration,
+        so it is only generated and compiled at the first solve of a given model.
+
+        Parameters
+        ----------
+        cache_dir: str
+            The folder of the compiled libraries, codegen.DEFAULT_CACHE_DIR if None
+        compiler: str
+            The C compiler
+        """
+        self._codegen_options = {"cache_dir": cache_dir, "compiler": compiler}
+        self._discard_all_states_functions()
+
+    def disable_compiled_dynamics(self):
+        """
+        Go back to the MX graph of partitioned_forward_dynamics
+        """
+        self._codegen_options = None
+        self._discard_all_states_functions()
+
+    def enable_function_cache(self, cache_dir: str = None):
+        """
+        Serialize the Functions of the model (the dynamics, the residual of the implicit dynamics, the reconstruction
+        of the states used by the phase transitions and Jdot qdot) in an on-disk cache keyed by the holonomic
+        configuration (see codegen.cached_serialized). The next builds of the same problem load them instead of
+        deriving them again. Unlike enable_compiled_dynamics, nothing is compiled.
+
+        Parameters
+        ----------
+        cache_dir: str
+            The folder of the serialized Functions, codegen.DEFAULT_CACHE_DIR if None
+        """
+        self._function_cache_options = {"cache_dir": cache_dir}
+        self._discard_all_states_functions()
+
+    def disable_function_cache(self):
+        """
+        Build the Functions of the model at each run
+        """
+        self._function_cache_options = None
+        self._cached_functions = {}
+        self._discard_all_states_functions()
+
+    def cached_function(self, name: str, build: Callable[[], Function], *variant) -> Function:
+        """
+        A Function of the model, loaded from the on-disk cache if enable_function_cache was called, built otherwise
+
+        Parameters
+        ----------
+        name: str
+            The name of the Function
+        build: Callable[[], Function]
+            Builds the Function, it is only called if the Function is not in the cache
+        variant:
+            What the Function depends on in addition to the holonomic configuration (e.g. MX or SX)
+
+        Returns
+        -------
+        The Function
+        """
+        if self._function_cache_options is None:
+            return build()
+
+        key = hash_key(self.holonomic_configuration_key(), name, *variant)
+        if key not in self._cached_functions:
+            self._cached_functions[key] = cached_serialized(
+                (name,), key, lambda: (build(),), self._function_cache_options["cache_dir"]
+            )[0]
+        return self._cached_functions[key]
+
+    def holonomic_configuration_key(self) -> str:
+        """
+        The key of the compiled functions of the model, it changes if the .bioMod, the constraints, the partition,
+        the two-link loops, the linear algebra backend or the code that builds the Functions change
+        """
+        return hash_key(
+            _SOURCE_HASH,
+            file_hash(self.model.path().absolutePath().to_string()),
+            [constraint.serialize() for constraint in self._holonomic_constraints],
+            list(self.dependent_joint_index),
+            list(self.independent_joint_index),
+            [
+                (loop.reference_segment, loop.second_link_segment, loop.end_effector_marker, loop.target_marker)
+                + (tuple(loop.joint_index), loop.elbow_down, loop.clamp_margin)
+                for loop in self.two_link_loops
+            ],
+            self.linear_algebra_backend,
+        )
+
+    @property
+    def compiled_dynamics(self) -> Function:
+        """
+        The compiled partitioned forward dynamics (q_u, qdot_u, tau) -> qddot_u, loaded from the cache
+        """
+        key = self.holonomic_configuration_key()
+        if key not in self._compiled_dynamics:
+
+            self._compiled_dynamics[key] = cached_external(
+                "partitioned_forward_dynamics",
+                key,
+                lambda: self._dynamics_function(MX),
+                cache_dir=self._codegen_options["cache_dir"],
+                compiler=self._codegen_options["compiler"],
+            )
+        return self._compiled_dynamics[key]
+
+    @property
+    def _partition_order(self) -> list:
+        """
+        The joints in the order of the partitioned vectors and matrices, the independent joints first
+        """
+        return list(self.independent_joint_index) + list(self.dependent_joint_index)
+
+    def partitioned_mass_matrix(self, q: MX | np.ndarray) -> MX | np.ndarray:
+        """
+        The mass matrix reordered in function of the independent and dependent joints. If q is numeric, it is a
+        np.ndarray computed with the Eigen model, without building a graph.
+
+        Parameters
+        ----------
+        q: MX | DM | np.ndarray
+            The generalized coordinates
+        """
+        if is_numeric(q):
+            mass_matrix = self.model_eigen.massMatrix(numeric_vector(q)).to_array()
+            return mass_matrix[np.ix_(self._partition_order, self._partition_order)]
+        return super().partitioned_mass_matrix(q)
+
+    def partitioned_non_linear_effect(self, q, qdot, f_ext=None, f_contacts=None) -> MX | np.ndarray:
+        """
+        The non linear effects reordered in function of the independent and dependent joints. If q is numeric, it is
+        a np.ndarray computed with the Eigen model, without building a graph.
+
+        Parameters
+        ----------
+        q: MX | DM | np.ndarray
+            The generalized coordinates
+        qdot: MX | DM | np.ndarray
+            The generalized velocities
+        f_ext:
+            The external forces
+        f_contacts:
+            The contact forces
+        """
+        if is_numeric(q):
+            non_linear_effect = self.model_eigen.NonLinearEffect(
+                numeric_vector(q), numeric_vector(qdot), f_ext=f_ext, f_contacts=f_contacts
+            ).to_array()
+            return non_linear_effect[self._partition_order]
+        return super().partitioned_non_linear_effect(q, qdot, f_ext, f_contacts)
+
+    def partitioned_q(self, q: MX | np.ndarray) -> MX | np.ndarray:
+        """
+        The generalized coordinates reordered in function of the independent and dependent joints
+        """
+        if is_numeric(q):
+            return numeric_vector(q)[self._partition_order]
+        return super().partitioned_q(q)
+
+    def partitioned_qdot(self, qdot: MX | np.ndarray) -> MX | np.ndarray:
+        """
+        The generalized velocities reordered in function of the independent and dependent joints
+        """
+        if is_numeric(qdot):
+            return numeric_vector(qdot)[self._partition_order]
+        return super().partitioned_qdot(qdot)
+
+    def partitioned_tau(self, tau: MX | np.ndarray) -> MX | np.ndarray:
+        """
+        The generalized torques reordered in function of the independent and dependent joints
+        """
+        if is_numeric(tau):
+            return numeric_vector(tau)[self._partition_order]
+        return super().partitioned_tau(tau)
+
+    def partitioned_constrained_jacobian(self, q: MX | np.ndarray) -> MX | np.ndarray:
+        """
+        The constraint jacobian with its columns reordered in function of the independent and dependent joints.
+        If q is numeric, the constraint Functions are evaluated numerically and a np.ndarray is returned.
+        """
+        if is_numeric(q):
+            constrained_jacobian = np.array(self.holonomic_constraints_jacobian(numeric_vector(q)), dtype=float)
+            return constrained_jacobian[:, self._partition_order]
+        return super().partitioned_constrained_jacobian(q)
+
+    def partition_context(self, q: MX, qdot: MX = None) -> PartitionContext:
+        """
+        Compute once the constraint jacobian, its dependent part Jv, the coupling matrix Bvu
+        and, if qdot is given, the biais vector.
+
+        Parameters
+        ----------
+        q: MX
+            The generalized coordinates
+        qdot: MX
+            The generalized velocities
+
+        Returns
+        -------
+        PartitionContext
+            The terms of the partition evaluated at (q, qdot)
+        """
+        return PartitionContext(self, q, qdot)
+
+    def coupling_matrix(self, q: MX, context: PartitionContext = None) -> MX:
+        """
+        Compute the coupling matrix, denoted Bvu in the paper :
+
+        Docquier, N., Poncelet, A., and Fisette, P.:
+        ROBOTRAN: a powerful symbolic gnerator of multibody models, Mech. Sci., 4, 199–219,
+        https://doi.org/10.5194/ms-4-199-2013, 2013.
+
+        If q is numeric, the matrix is a np.ndarray computed without building a graph.
+        """
+        if context is None:
+            context = self.partition_context(q)
+
+        return context.coupling_matrix
+
+    def biais_vector(self, q: MX, qdot: MX, context: PartitionContext = None) -> MX:
+        """
+        Compute the biais vector, denoted b in the paper, the right term of the equation (15). If q and qdot are
+        numeric, it is a np.ndarray computed without building a graph.
+        """
+        if context is None:
+            context = self.partition_context(q, qdot)
+        elif context.biais is None:
+            context.set_qdot(qdot)
+
+        return context.biais
+
+    def compute_the_lagrangian_multipliers(
+        self, q: MX, qdot: MX, qddot: MX, tau: MX, external_forces: MX = None, f_contacts: MX = None
+    ) -> MX:
+        """
+        Sources
+        -------
+        Docquier, N., Poncelet, A., and Fisette, P.:
+        ROBOTRAN: a powerful symbolic gnerator of multibody models, Mech. Sci., 4, 199–219,
+        https://doi.org/10.5194/ms-4-199-2013, 2013.
+        Equation (17) in the paper.
+        """
+        context = self.partition_context(q)
+
+        partitioned_mass_matrix = self.partitioned_mass_matrix(q)
+        m_vu = partitioned_mass_matrix[self.nb_independent_joints :, : self.nb_independent_joints]
+        m_vv = partitioned_mass_matrix[self.nb_independent_joints :, self.nb_independent_joints :]
+
+        qddot_u = qddot[self.independent_joint_index]
+        qddot_v = qddot[self.dependent_joint_index]
+
+        non_linear_effect = self.partitioned_non_linear_effect(q, qdot, external_forces, f_contacts)
+        non_linear_effect_v = non_linear_effect[self.nb_independent_joints :]
+
+        partitioned_tau = self.partitioned_tau(tau)
+        tau_v = partitioned_tau[self.nb_independent_joints :]
+
+        return context.solve_jacobian_v_transpose(m_vu @ qddot_u + m_vv @ qddot_v + non_linear_effect_v - tau_v)
+
+    @staticmethod
+    def inverse_kinematics_2d(l1, l2, xp, yp, elbow_down: bool = True):
+        """
+        Inverse kinematics of a planar two-link chain, see two_link_loop.inverse_kinematics_2d
+        """
+        return inverse_kinematics_2d(l1, l2, xp, yp, elbow_down)
 
     def compute_v_from_u_explicit_symbolic(self, u: MX):
         """
         Compute the dependent joint from the independent joint,
         This is done by solving the system of equations given by the holonomic constraints
-        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
+        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints.
+        The two-link loops are solved in closed form, otherwise the Newton solver is used.
 
         !! symbolic version of the function
 
@@ -70,45 +734,20 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
             The angle of the dependente joint
 
         """
-        index_segment_ref = segment_index(self.model, "Arm_location")
-        index_forearm = segment_index(self.model, "Forearm_location")
-        index_marker_hand = marker_index(self.model, "CENTER_HAND")
-        index_marker_knee = marker_index(self.model, "BELOW_KNEE")
-
-        # Find length arm and forearm
-        forearm_JCS_trans = self.model.segments()[index_forearm].localJCS().trans().to_mx()
-        hand_JCS_trans = self.model.marker(index_marker_hand).to_mx()
-        l1 = cas.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)    # TODO: Maybe problem with square ?
-        l2 = cas.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)
+        if not self.has_explicit_inverse_kinematics:
+            return self.compute_q_v(u)
 
         v = MX.sym("v", self.nb_dependent_joints)
         q = self.state_from_partition(u, v)
 
-        # Matrix RT "Arm location" (ref)
-        R_arm_global = self.model.globalJCS(q, index_segment_ref).transpose().to_mx()
-
-        # Perform the forward kinematics
-        markers = self.markers(q)
-        marker_knee_in_g = markers[index_marker_knee]
-
-        marker_knee_in_arm = (R_arm_global @ vertcat(markers[index_marker_knee], cas.MX.ones(1)))[:3]
-        xp = -marker_knee_in_arm[2]
-        yp = marker_knee_in_arm[1]
-
-        # Find position dependente joint
-        theta = self.inverse_kinematics_2d(
-            l1=l1,
-            l2=l2,
-            xp=xp,
-            yp=yp,
-        )
-        return theta
+        return self._q_v_from_loops([loop.solve_symbolic(self, q) for loop in self.two_link_loops])
 
     def compute_v_from_u_explicit_numeric(self, u: MX):
         """
         Compute the dependent joint from the independent joint,
         This is done by solving the system of equations given by the holonomic constraints
-        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
+        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints.
+        The two-link loops are solved in closed form, otherwise the Newton solver is used.
 
         !! numeric version of the function
 
@@ -122,45 +761,226 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         theta:
             The angle of the dependente joint
         """
-        model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
+        if not self.has_explicit_inverse_kinematics:
+            return self.newton_solver(u)
 
-        index_segment_ref = segment_index(model_eigen, "Arm_location")
-        index_forearm = segment_index(model_eigen, "Forearm_location")
-        index_marker_hand = marker_index(model_eigen, "CENTER_HAND")
-        index_marker_knee = marker_index(model_eigen, "BELOW_KNEE")
+        # the dependent joints are set to zero, they are after the loop in the kinematic chain
+        q = np.zeros(self.nb_q)
+        q[self.independent_joint_index] = np.array(u, dtype=float).squeeze()
 
-        # Find length arm and forearm
-        forearm_JCS_trans = model_eigen.segments()[index_forearm].localJCS().trans().to_array()
-        hand_JCS_trans = model_eigen.marker(index_marker_hand).to_array()
-        l1 = np.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)
-        l2 = np.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)
+        return self._q_v_from_loops([loop.solve_numeric(self.model_eigen, q) for loop in self.two_link_loops])
 
-        v = DM.zeros(self.nb_dependent_joints, 1)
-        q = self.state_from_partition(u, v)
+    def _trajectory_function(self, with_velocities: bool) -> Function:
+        """
+        Build once the Function that reconstructs q (and qdot) at one node from the independent joints
 
-        # Matrix RT "Arm location" (ref)
-        segment_ref_JCS = model_eigen.globalJCS(q.toarray().squeeze(), index_segment_ref).to_array()
-
-        # Perform the forward kinematics
-        markers = model_eigen.markers(q.toarray().squeeze())
-        marker_knee_in_g = markers[index_marker_knee].to_array()
-
-        # Position markers on arm location frame
-        R_arm_global = inv(segment_ref_JCS)     # TODO: Maybe transpose and not inv ?
-        # R_arm_global = transpose(segment_ref_JCS)
-        marker_knee_in_arm = (R_arm_global @ np.concatenate((marker_knee_in_g, np.ones(1)), axis=0))[:3]
-        xp = -marker_knee_in_arm[2]
-        yp = marker_knee_in_arm[1]
-
-        # Find position dependente joint
-        theta = self.inverse_kinematics_2d(
-            l1=l1,
-            l2=l2,
-            xp=xp,
-            yp=yp,
-        )
+        Parameters
+        ----------
+        with_velocities: bool
+            If qdot is also reconstructed from qdot_u
+
+        Returns
+        -------
+        The Function q_u (, qdot_u) -> q, q_v (, qdot)
+        """
+        if with_velocities not in self._trajectory_functions:
+
+            def build():
+                q_u = MX.sym("q_u", self.nb_independent_joints, 1)
+                q_v = self.compute_v_from_u_explicit_symbolic(q_u)
+                q = self.state_from_partition(q_u, q_v)
+                if not with_velocities:
+                    return Function("compute_trajectory", [q_u], [q, q_v], ["q_u"], ["q", "q_v"])
+                qdot_u = MX.sym("qdot_u", self.nb_independent_joints, 1)
+                qdot = self.state_from_partition(qdot_u, self.coupling_matrix(q) @ qdot_u)
+                return Function(
+                    "compute_trajectory", [q_u, qdot_u], [q, q_v, qdot], ["q_u", "qdot_u"], ["q", "q_v", "qdot"]
+                )
+
+            self._trajectory_functions[with_velocities] = self.cached_function(
+                "compute_trajectory", build, with_velocities
+            )
+        return self._trajectory_functions[with_velocities]
+
+    def full_state(self, q_u: MX, qdot_u: MX) -> tuple[MX, MX]:
+        """
+        The generalized coordinates and velocities from the independent ones, through the Function built once by
+        _trajectory_function, so that the phase transitions of an OCP reuse the same graph
+
+        Parameters
+        ----------
+        q_u: MX
+            The independent joints
+        qdot_u: MX
+            The velocities of the independent joints
+
+        Returns
+        -------
+        q, qdot
+        """
+        q, _, qdot = self._trajectory_function(with_velocities=True)(q_u, qdot_u)
+        return q, qdot
+
+    def compute_trajectory(
+        self, q_u: np.ndarray, qdot_u: np.ndarray = None, parallelization: str = "serial"
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Reconstruct a whole trajectory of the closed-loop phase in one call, the explicit inverse kinematics and the
+        coupling matrix being evaluated on all the nodes by a mapped casadi Function
 
-        return theta
+        Parameters
+        ----------
+        q_u: np.ndarray
+            The independent joints, of shape (nb_independent_joints, nb_nodes)
+        qdot_u: np.ndarray
+            The velocities of the independent joints, of shape (nb_independent_joints, nb_nodes)
+        parallelization: str
+            The parallelization of the map, "serial" or "thread"
+
+        Returns
+        -------
+        q, qdot, q_v: the generalized coordinates and velocities of shape (nb_q, nb_nodes), qdot is None if qdot_u is
+        not given, and the dependent joints of shape (nb_dependent_joints, nb_nodes)
+        """
+        q_u = np.array(q_u, dtype=float).reshape(self.nb_independent_joints, -1)
+        nb_nodes = q_u.shape[1]
+
+        if qdot_u is None:
+            func = self._trajectory_function(with_velocities=False).map(nb_nodes, parallelization)
+            q, q_v = func(q_u)
+            return np.array(q), None, np.array(q_v)
+
+        qdot_u = np.array(qdot_u, dtype=float).reshape(self.nb_independent_joints, -1)
+        func = self._trajectory_function(with_velocities=True).map(nb_nodes, parallelization)
+        q, q_v, qdot = func(q_u, qdot_u)
+        return np.array(q), np.array(qdot), np.array(q_v)
+
+    def _all_states_function(self, nb_nodes: int, parallelization: str) -> Function:
+        """
+        Build once the Function (q_u, qdot_u, tau) -> q, qdot, qddot, lambdas at one node and cache its map
+
+        Parameters
+        ----------
+        nb_nodes: int
+            The number of nodes of the map
+        parallelization: str
+            The parallelization of the map, "serial" or "thread"
+
+        Returns
+        -------
+        The mapped Function
+        """
+        if "all_states" not in self._trajectory_functions:
+            q_u = MX.sym("q_u", self.nb_independent_joints, 1)
+            qdot_u = MX.sym("qdot_u", self.nb_independent_joints, 1)
+            tau = MX.sym("tau", self.nb_tau, 1)
+
+            q, _, qdot = self._trajectory_function(with_velocities=True)(q_u, qdot_u)
+            qddot_u = self.partitioned_forward_dynamics(q_u, qdot_u, tau)
+            qddot = self.compute_qddot(q, qdot, qddot_u)
+            lambdas = self.compute_the_lagrangian_multipliers(q, qdot, qddot, tau)
+
+            self._trajectory_functions["all_states"] = Function(
+                "compute_all_states",
+                [q_u, qdot_u, tau],
+                [q, qdot, qddot, lambdas],
+                ["q_u", "qdot_u", "tau"],
+                ["q", "qdot", "qddot", "lambdas"],
+            )
+
+        key = ("all_states", nb_nodes, parallelization)
+        if key not in self._trajectory_functions:
+            self._trajectory_functions[key] = self._trajectory_functions["all_states"].map(nb_nodes, parallelization)
+        return self._trajectory_functions[key]
+
+    def _discard_all_states_functions(self):
+        """
+        Discard the Functions of compute_all_states, they embed the dynamics built with the options of the model
+        (linear algebra backend, expansion, compilation, cache) at the time of their first call
+        """
+        self._trajectory_functions = {
+            key: func
+            for key, func in self._trajectory_functions.items()
+            if key != "all_states" and not (isinstance(key, tuple) and key[0] == "all_states")
+        }
+
+    def check_partition_conditioning(self, q: np.ndarray, threshold: float = CONDITION_NUMBER_THRESHOLD) -> np.ndarray:
+        """
+        Warn if Jv is badly conditioned somewhere along a trajectory, see partition.check_partition_conditioning
+
+        Parameters
+        ----------
+        q: np.ndarray
+            The generalized coordinates, of shape (nb_q, nb_nodes)
+        threshold: float
+            The condition number above which a warning is raised
+
+        Returns
+        -------
+        The condition numbers of Jv at each node
+        """
+        return check_partition_conditioning(self, q, threshold)
+
+    def mapped_holonomic_constraints_jacobian(self, nb_nodes: int) -> Function:
+        """
+        The constraint jacobian mapped on nb_nodes nodes, built once per number of nodes (see
+        partition.jacobian_v_condition_numbers)
+
+        Parameters
+        ----------
+        nb_nodes: int
+            The number of nodes of the map
+
+        Returns
+        -------
+        The Function q -> J(q), q of shape (nb_q, nb_nodes), the jacobians being concatenated horizontally
+        """
+        key = ("holonomic_constraints_jacobian", nb_nodes)
+        if key not in self._trajectory_functions:
+            q_sym = MX.sym("q", self.nb_q, 1)
+            self._trajectory_functions[key] = Function(
+                "holonomic_constraints_jacobian", [q_sym], [self.holonomic_constraints_jacobian(q_sym)]
+            ).map(nb_nodes)
+        return self._trajectory_functions[key]
+
+    def compute_all_states(
+        self,
+        q_u: np.ndarray,
+        qdot_u: np.ndarray,
+        tau: np.ndarray,
+        parallelization: str = "serial",
+        check_conditioning: bool = False,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute q, qdot, qddot and the lagrange multipliers on all the nodes of the closed-loop phase in one call of a
+        mapped casadi Function. Several solutions can be post-processed at once by concatenating their nodes.
+
+        Parameters
+        ----------
+        q_u: np.ndarray
+            The independent joints, of shape (nb_independent_joints, nb_nodes)
+        qdot_u: np.ndarray
+            The velocities of the independent joints, of shape (nb_independent_joints, nb_nodes)
+        tau: np.ndarray
+            The generalized torques of all the joints, of shape (nb_tau, nb_nodes)
+        parallelization: str
+            The parallelization of the map, "serial" or "thread"
+        check_conditioning: bool
+            If the conditioning of Jv along the nodes is also checked, see check_partition_conditioning
+
+        Returns
+        -------
+        q, qdot, qddot, lambdas, tau: the generalized coordinates, velocities and accelerations of shape
+        (nb_q, nb_nodes), the lagrange multipliers of shape (nb_holonomic_constraints, nb_nodes) and the torques
+        """
+        q_u = np.array(q_u, dtype=float).reshape(self.nb_independent_joints, -1)
+        qdot_u = np.array(qdot_u, dtype=float).reshape(self.nb_independent_joints, -1)
+        tau = np.array(tau, dtype=float).reshape(self.nb_tau, -1)
+
+        q, qdot, qddot, lambdas = self._all_states_function(q_u.shape[1], parallelization)(q_u, qdot_u, tau)
+        if check_conditioning:
+            self.check_partition_conditioning(q)
+        return np.array(q), np.array(qdot), np.array(qddot), np.array(lambdas), tau
 
     @staticmethod
     def holonomic_torque_driven(ocp, nlp, mapping):
@@ -187,7 +1007,85 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         ConfigureProblem.configure_new_variable(name, names_udot, ocp, nlp, True, False, False, axes_idx=axes_idx)
 
         ConfigureProblem.configure_tau(ocp, nlp, as_states=False, as_controls=True)
-        ConfigureProblem.configure_dynamics_function(ocp, nlp, DynamicsFunctions.holonomic_torque_driven, expand=False)
+        ConfigureProblem.configure_dynamics_function(
+            ocp, nlp, DynamicsFunctions.holonomic_torque_driven, expand=nlp.model.expand_dynamics_function
+        )
+
+    @staticmethod
+    def holonomic_torque_driven_implicit(ocp, nlp, mapping):
+        """
+        Tell the program which variables are states and controls, for the implicit formulation of the holonomic
+        phase: the derivatives of the states (qdot_u, qddot_u) are also declared so that the dynamics can be given
+        as defects, e.g. for OdeSolver.COLLOCATION(defects_type=DefectType.IMPLICIT) or OdeSolver.IRK
+
+        Parameters
+        ----------
+        ocp: OptimalControlProgram
+            A reference to the ocp
+        nlp: NonLinearProgram
+            A reference to the phase
+        """
+
+        name = "q_u"
+        names_u = [nlp.model.name_dof[i] for i in mapping["q"].to_first.map_idx]
+        axes_idx = ConfigureProblem._apply_phase_mapping(ocp, nlp, name)
+        ConfigureProblem.configure_new_variable(name, names_u, ocp, nlp, True, False, False, axes_idx=axes_idx)
+
+        name = "qdot_u"
+        names_qdot = ConfigureProblem._get_kinematics_based_names(nlp, "qdot")
+        names_udot = [names_qdot[i] for i in mapping["qdot"].to_first.map_idx]
+        axes_idx = ConfigureProblem._apply_phase_mapping(ocp, nlp, name)
+        ConfigureProblem.configure_new_variable(name, names_udot, ocp, nlp, True, False, True, axes_idx=axes_idx)
+
+        name = "qddot_u"
+        names_qddot = ConfigureProblem._get_kinematics_based_names(nlp, "qddot")
+        names_uddot = [names_qddot[i] for i in mapping["qdot"].to_first.map_idx]
+        axes_idx = ConfigureProblem._apply_phase_mapping(ocp, nlp, name)
+        ConfigureProblem.configure_new_variable(name, names_uddot, ocp, nlp, False, False, True, axes_idx=axes_idx)
+
+        ConfigureProblem.configure_tau(ocp, nlp, as_states=False, as_controls=True)
+        ConfigureProblem.configure_dynamics_function(
+            ocp,
+            nlp,
+            BiorbdModelCustomHolonomic.holonomic_torque_driven_implicit_dynamics,
+            expand=nlp.model.expand_dynamics_function,
+        )
+
+    @staticmethod
+    def holonomic_torque_driven_implicit_dynamics(states, controls, parameters, nlp):
+        """
+        The dynamics of the holonomic phase, explicit (dxdt) and implicit (defects). The defects are
+        [qdot_u - slope of q_u, M_tilde slope of qdot_u - f_tilde], see partitioned_inverse_dynamics_residual.
+
+        Parameters
+        ----------
+        states: MX | SX
+            The state of the system
+        controls: MX | SX
+            The controls of the system
+        parameters: MX | SX
+            The parameters acting on the system
+        nlp: NonLinearProgram
+            A reference to the phase
+
+        Returns
+        -------
+        The DynamicsEvaluation with the derivative of the states and the defects
+        """
+        q_u = DynamicsFunctions.get(nlp.states["q_u"], states)
+        qdot_u = DynamicsFunctions.get(nlp.states["qdot_u"], states)
+        tau = DynamicsFunctions.get(nlp.controls["tau"], controls)
+
+        slope_q_u = DynamicsFunctions.get(nlp.states_dot["qdot_u"], nlp.states_dot.mx_reduced)
+        slope_qdot_u = DynamicsFunctions.get(nlp.states_dot["qddot_u"], nlp.states_dot.mx_reduced)
+
+        qddot_u = nlp.model.partitioned_forward_dynamics(q_u, qdot_u, tau)
+        defects = vertcat(
+            qdot_u - slope_q_u,
+            nlp.model.partitioned_inverse_dynamics_residual(q_u, qdot_u, slope_qdot_u, tau),
+        )
+
+        return DynamicsEvaluation(dxdt=vertcat(qdot_u, qddot_u), defects=defects)
 
     def partitioned_forward_dynamics(
         self, q_u, qdot_u, tau, external_forces=None, f_contacts=None, q_v_init=None
@@ -204,17 +1102,89 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         if f_contacts is not None:
             raise NotImplementedError("Contact forces are not implemented yet.")
 
+        if self._codegen_options is not None and q_v_init is None:
+            return self.compiled_dynamics(q_u, qdot_u, tau)
+        if isinstance(q_u, SX):
+            return self._partitioned_forward_dynamics(q_u, qdot_u, tau)
+        if self.expand_dynamics:
+            return self.expanded_dynamics(q_u, qdot_u, tau)
+        if self._function_cache_options is not None and q_v_init is None:
+            dynamics = self.cached_function("partitioned_forward_dynamics", lambda: self._dynamics_function(MX), "MX")
+            return dynamics(q_u, qdot_u, tau)
+        return self._partitioned_forward_dynamics(q_u, qdot_u, tau, q_v_init)
+
+    def _partitioned_forward_dynamics(self, q_u, qdot_u, tau, q_v_init=None) -> MX | SX:
+        """
+        The graph of partitioned_forward_dynamics, in MX or, if q_u is SX, in SX
+        """
+        modified_mass_matrix, modified_forces = self._partitioned_dynamics_terms(q_u, qdot_u, tau, q_v_init)
+        return spd_solve(modified_mass_matrix, modified_forces, self.linear_algebra_backend)
+
+    def partitioned_inverse_dynamics_residual(self, q_u, qdot_u, qddot_u, tau, q_v_init=None) -> MX | SX:
+        """
+        The residual of the partitioned dynamics M_tilde(q) qddot_u - f_tilde(q, qdot, tau), it is zero if qddot_u
+        is the partitioned forward dynamics. It is the defect of the implicit formulation, the modified mass matrix
+        is not inverted.
+
+        Parameters
+        ----------
+        q_u: MX | SX
+            The independent joints
+        qdot_u: MX | SX
+            The velocities of the independent joints
+        qddot_u: MX | SX
+            The accelerations of the independent joints
+        tau: MX | SX
+            The generalized torques
+        q_v_init: MX
+            The initial guess of the dependent joints
+
+        Returns
+        -------
+        The residual, of size nb_independent_joints
+        """
+        if self.expand_dynamics and not isinstance(q_u, SX):
+            if self._expanded_residual is None:
+                self._expanded_residual = self.cached_function(
+                    "partitioned_inverse_dynamics_residual", lambda: self._residual_function(SX), "SX"
+                )
+            return self._expanded_residual(q_u, qdot_u, qddot_u, tau)
+        if self._function_cache_options is not None and q_v_init is None and not isinstance(q_u, SX):
+            residual = self.cached_function(
+                "partitioned_inverse_dynamics_residual", lambda: self._residual_function(MX), "MX"
+            )
+            return residual(q_u, qdot_u, qddot_u, tau)
+
+        modified_mass_matrix, modified_forces = self._partitioned_dynamics_terms(q_u, qdot_u, tau, q_v_init)
+        return modified_mass_matrix @ qddot_u - modified_forces
+
+    def _partitioned_dynamics_terms(self, q_u, qdot_u, tau, q_v_init=None) -> tuple[MX | SX, MX | SX]:
+        """
+        The modified mass matrix and the modified generalized forces of the partitioned dynamics
+        M_tilde qddot_u = f_tilde, in MX or, if q_u is SX, in SX
+        """
+        # the terms computed by biorbd are called through their expanded Function in SX
+        expand = isinstance(q_u, SX)
+
         # compute q and qdot
-        q = self.compute_q(q_u, q_v_init=q_v_init)
-        qdot = self.compute_qdot(q, qdot_u)
+        if expand:
+            q = self.state_from_partition(q_u, self._sx_function("q_v")(q_u))
+        else:
+            q = self.compute_q(q_u, q_v_init=q_v_init)
+        context = self.partition_context(q)
+        coupling_matrix_vu = context.coupling_matrix
+        qdot = self.state_from_partition(qdot_u, coupling_matrix_vu @ qdot_u)
+        context.set_qdot(qdot)
 
-        partitioned_mass_matrix = self.partitioned_mass_matrix(q)
+        if expand:
+            partitioned_mass_matrix = self._sx_function("partitioned_mass_matrix")(q)
+        else:
+            partitioned_mass_matrix = self.partitioned_mass_matrix(q)
         m_uu = partitioned_mass_matrix[: self.nb_independent_joints, : self.nb_independent_joints]
         m_uv = partitioned_mass_matrix[: self.nb_independent_joints, self.nb_independent_joints :]
         m_vu = partitioned_mass_matrix[self.nb_independent_joints :, : self.nb_independent_joints]
         m_vv = partitioned_mass_matrix[self.nb_independent_joints :, self.nb_independent_joints :]
 
-        coupling_matrix_vu = self.coupling_matrix(q)
         modified_mass_matrix = (
             m_uu
             + m_uv @ coupling_matrix_vu
@@ -224,7 +1194,10 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         second_term = m_uv + coupling_matrix_vu.T @ m_vv
 
         # compute the non-linear effect
-        non_linear_effect = self.partitioned_non_linear_effect(q, qdot, external_forces, f_contacts)
+        if expand:
+            non_linear_effect = self._sx_function("partitioned_non_linear_effect")(q, qdot)
+        else:
+            non_linear_effect = self.partitioned_non_linear_effect(q, qdot, None, None)
         non_linear_effect_u = non_linear_effect[: self.nb_independent_joints]
         non_linear_effect_v = non_linear_effect[self.nb_independent_joints :]
 
@@ -237,12 +1210,11 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
 
         modified_generalized_forces = tau_u + coupling_matrix_vu.T @ tau_v
 
-        qddot_u = inv(modified_mass_matrix) @ (
-            modified_generalized_forces - second_term @ self.biais_vector(q, qdot) - modified_non_linear_effect
+        return (
+            modified_mass_matrix,
+            modified_generalized_forces - second_term @ context.biais - modified_non_linear_effect,
         )
 
-        return qddot_u
-
     def compute_q(self, q_u: MX, q_v_init: MX = None) -> MX:
         """
         Compute the dependent joint from the independent joint
@@ -0,0 +1,155 @@
+"""
+Closed-loop constraint between two markers, shared by the examples and the saltos.
+
+Building the constraint means differentiating the markers twice and expanding three Functions, which takes a
+significant part of the start of a script. The Functions only depend on the .bioMod and on the arguments of
+generate_close_loop_constraint, so they are built once per process (memoized) and serialized in the cache of
+codegen.py, keyed by the content of the .bioMod and of this module: the next runs and the workers of a sweep load
+them directly.
+"""
+import sys
+from pathlib import Path
+
+from casadi import MX, Function, jacobian, jtimes, vertcat
+from biorbd import marker_index
+
+from codegen import cached_serialized, file_hash, hash_key, source_hash
+
+CLOSE_LOOP_CONSTRAINT_NAMES = (
+    "holonomic_constraint",
+    "holonomic_constraint_jacobian",
+    "holonomic_constraint_double_derivative",
+)
+
+# the constraints already built in this process, by key
+_close_loop_constraints = {}
+
+
+def build_close_loop_constraint(
+    biorbd_model, marker_1: str, marker_2: str, index: slice = slice(0, 3), local_frame_index: int = None
+) -> tuple[Function, Function, Function]:
+    """Build the Functions of a close loop constraint between two markers, without any cache"""
+
+    # symbolic variables to create the functions
+    q_sym = MX.sym("q", biorbd_model.nb_q, 1)
+    q_dot_sym = MX.sym("q_dot", biorbd_model.nb_qdot, 1)
+    q_ddot_sym = MX.sym("q_ddot", biorbd_model.nb_qdot, 1)
+
+    # symbolic markers in global frame
+    marker_1_sym = biorbd_model.marker(q_sym, index=marker_index(biorbd_model.model, marker_1))
+    marker_2_sym = biorbd_model.marker(q_sym, index=marker_index(biorbd_model.model, marker_2))
+
+    # if local frame is provided, the markers are expressed in the same local frame
+    if local_frame_index is not None:
+        jcs_t = biorbd_model.homogeneous_matrices_in_global(q_sym, local_frame_index, inverse=True)
+        marker_1_sym = (jcs_t.to_mx() @ vertcat(marker_1_sym, 1))[:3]
+        marker_2_sym = (jcs_t.to_mx() @ vertcat(marker_2_sym, 1))[:3]
+
+    # the constraint is the distance between the two markers, set to zero
+    constraint = (marker_1_sym - marker_2_sym)[index]
+    # the jacobian of the constraint
+    constraint_jacobian = jacobian(constraint, q_sym)
+
+    constraint_func = Function(
+        "holonomic_constraint",
+        [q_sym],
+        [constraint],
+        ["q"],
+        ["holonomic_constraint"],
+    ).expand()
+
+    constraint_jacobian_func = Function(
+        "holonomic_constraint_jacobian",
+        [q_sym],
+        [constraint_jacobian],
+        ["q"],
+        ["holonomic_constraint_jacobian"],
+    ).expand()
+
+    # the double derivative of the constraint
+    constraint_double_derivative = (
+        constraint_jacobian_func(q_sym) @ q_ddot_sym + jtimes(constraint_jacobian @ q_dot_sym, q_sym, q_dot_sym)
+    )
+
+    constraint_double_derivative_func = Function(
+        "holonomic_constraint_double_derivative",
+        [q_sym, q_dot_sym, q_ddot_sym],
+        [constraint_double_derivative],
+        ["q", "q_dot", "q_ddot"],
+        ["holonomic_constraint_double_derivative"],
+    ).expand()
+
+    return constraint_func, constraint_jacobian_func, constraint_double_derivative_func
+
+
+def close_loop_constraint_key(
+    biorbd_model, marker_1: str, marker_2: str, index: slice = slice(0, 3), local_frame_index: int = None
+) -> str:
+    """
+    The key of a close loop constraint in the cache, it hashes the content of the .bioMod, the arguments and the
+    source of this module
+
+    Parameters
+    ----------
+    biorbd_model: BiorbdModel
+        The model, loaded from a .bioMod
+    marker_1: str
+        The name of the first marker
+    marker_2: str
+        The name of the second marker
+    index: slice
+        The components of the distance between the markers that are constrained
+    local_frame_index: int
+        The segment in which frame the markers are expressed, the global frame if None
+    """
+    model_path = biorbd_model.model.path().absolutePath().to_string()
+    return hash_key(
+        source_hash(sys.modules[__name__]), file_hash(model_path), marker_1, marker_2, index, local_frame_index
+    )
+
+
+def generate_close_loop_constraint(
+    biorbd_model,
+    marker_1: str,
+    marker_2: str,
+    index: slice = slice(0, 3),
+    local_frame_index: int = None,
+    cache_dir: str | Path = None,
+    serialize: bool = True,
+) -> tuple[Function, Function, Function]:
+    """
+    Generate a close loop constraint between two markers. The Functions are built once per process and, if
+    serialize, loaded from or saved to the cache on disk.
+
+    Parameters
+    ----------
+    biorbd_model: BiorbdModel
+        The model, loaded from a .bioMod
+    marker_1: str
+        The name of the first marker
+    marker_2: str
+        The name of the second marker
+    index: slice
+        The components of the distance between the markers that are constrained
+    local_frame_index: int
+        The segment in which frame the markers are expressed, the global frame if None
+    cache_dir: str | Path
+        The cache folder, codegen.DEFAULT_CACHE_DIR if None
+    serialize: bool
+        If the Functions are serialized on disk, otherwise they are only memoized in the process
+
+    Returns
+    -------
+    The constraint, its jacobian and its double derivative
+    """
+    key = close_loop_constraint_key(biorbd_model, marker_1, marker_2, index, local_frame_index)
+    if key not in _close_loop_constraints:
+
+        def build():
+            return build_close_loop_constraint(biorbd_model, marker_1, marker_2, index, local_frame_index)
+
+        if serialize:
+            _close_loop_constraints[key] = cached_serialized(CLOSE_LOOP_CONSTRAINT_NAMES, key, build, cache_dir)
+        else:
+            _close_loop_constraints[key] = build()
+    return _close_loop_constraints[key]
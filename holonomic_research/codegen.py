@@ -0,0 +1,213 @@
+"""
+Ahead-of-time C code generation of the casadi Functions of the holonomic models, with an on-disk cache.
+
+A Function is generated to C together with its derivatives (jac_<name>, jac_jac_<name>, ... the names casadi looks
+for when it differentiates an external Function), compiled to a shared library and loaded with casadi.external.
+The library is stored in a cache folder under a key that hashes everything the Function depends on (the content of
+the .bioMod, the holonomic configuration, the options of the model, the source of the code that builds it and the
+version of casadi), so that the next solves of the same model skip both the construction of the graph and its
+interpreted evaluation.
+
+Functions that do not need to be compiled (e.g. the expanded constraint Functions) can instead be serialized with
+Function.save in the same cache, see cached_serialized: loading them skips the symbolic differentiation.
+"""
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+
+import casadi
+from casadi import CodeGenerator, Function, external
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "holonomic_research"
+DEFAULT_COMPILER = "gcc"
+DEFAULT_FLAGS = ("-O3", "-fPIC", "-shared")
+
+
+def hash_key(*items) -> str:
+    """
+    Hash the items (str, bytes or anything with a deterministic str()) into a short key
+
+    Parameters
+    ----------
+    items:
+        The items the cached Function depends on
+
+    Returns
+    -------
+    The hexadecimal key
+    """
+    sha = hashlib.sha256()
+    sha.update(casadi.__version__.encode())
+    for item in items:
+        sha.update(item if isinstance(item, bytes) else str(item).encode())
+        # separator, so that ("ab", "c") and ("a", "bc") have different keys
+        sha.update(b"\0")
+    return sha.hexdigest()[:16]
+
+
+def file_hash(path: str) -> str:
+    """
+    Hash of the content of a file (e.g. the .bioMod), the path itself is not used
+
+    Parameters
+    ----------
+    path: str
+        The path of the file
+    """
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def source_hash(*modules) -> str:
+    """
+    Hash of the source files of the modules that build the cached Functions, so that their keys change when the
+    code is edited and the Functions built by the previous code are not loaded
+
+    Parameters
+    ----------
+    modules:
+        The modules
+    """
+    return hash_key(*(file_hash(module.__file__) for module in modules))
+
+
+def library_path(name: str, key: str, cache_dir: str | Path = None) -> Path:
+    """
+    The path of the shared library of a Function in the cache
+
+    Parameters
+    ----------
+    name: str
+        The name of the Function
+    key: str
+        The key of the Function, see hash_key
+    cache_dir: str | Path
+        The cache folder, DEFAULT_CACHE_DIR if None
+    """
+    cache_dir = Path(DEFAULT_CACHE_DIR if cache_dir is None else cache_dir)
+    return cache_dir / f"{name}_{key}.so"
+
+
+def compile_function(
+    func: Function,
+    so_path: str | Path,
+    derivative_order: int = 2,
+    compiler: str = DEFAULT_COMPILER,
+    flags: tuple = DEFAULT_FLAGS,
+):
+    """
+    Generate the C code of a Function and of its jacobians, then compile it into a shared library
+
+    Parameters
+    ----------
+    func: Function
+        The function to compile
+    so_path: str | Path
+        The path of the shared library
+    derivative_order: int
+        The number of nested jacobians to generate, 2 for the exact hessian of IPOPT
+    compiler: str
+        The C compiler
+    flags: tuple
+        The flags of the compiler
+    """
+    so_path = Path(so_path)
+    so_path.parent.mkdir(parents=True, exist_ok=True)
+    # the source has a per-process name, two processes building the same key do not overwrite each other's file
+    c_name = f"{so_path.stem}_{os.getpid()}.c"
+
+    code_generator = CodeGenerator(c_name)
+    derivative = func
+    code_generator.add(derivative)
+    for _ in range(derivative_order):
+        # the jacobian of f is named jac_f, the name external() looks for in the library
+        derivative = derivative.jacobian()
+        code_generator.add(derivative)
+    code_generator.generate(str(so_path.parent) + os.sep)
+
+    # compiled under a temporary name then renamed, so that a concurrent process never loads a partial library
+    tmp_path = so_path.with_suffix(f".{os.getpid()}.tmp")
+    c_path = so_path.parent / c_name
+    subprocess.run([compiler, *flags, str(c_path), "-o", str(tmp_path)], check=True)
+    os.replace(tmp_path, so_path)
+    c_path.unlink()
+
+
+def cached_external(
+    name: str,
+    key: str,
+    build: callable,
+    cache_dir: str | Path = None,
+    derivative_order: int = 2,
+    compiler: str = DEFAULT_COMPILER,
+    flags: tuple = DEFAULT_FLAGS,
+) -> Function:
+    """
+    Load a compiled Function from the cache, it is built and compiled first if it is not in the cache
+
+    Parameters
+    ----------
+    name: str
+        The name of the Function
+    key: str
+        The key of the Function, see hash_key
+    build: callable
+        Called without arguments to build the Function if it is not in the cache
+    cache_dir: str | Path
+        The cache folder, DEFAULT_CACHE_DIR if None
+    derivative_order: int
+        The number of nested jacobians to generate
+    compiler: str
+        The C compiler
+    flags: tuple
+        The flags of the compiler
+
+    Returns
+    -------
+    The external Function, with the same name, inputs and outputs as the built one
+    """
+    so_path = library_path(name, key, cache_dir)
+    if not so_path.exists():
+        func = build()
+        if func.name() != name:
+            raise ValueError(f"The built function is named {func.name()}, it should be named {name}")
+        compile_function(func, so_path, derivative_order, compiler, flags)
+    return external(name, str(so_path))
+
+
+def cached_serialized(names: tuple, key: str, build: callable, cache_dir: str | Path = None) -> tuple[Function, ...]:
+    """
+    Load Functions serialized in the cache, they are built and serialized first if they are not all in the cache
+
+    Parameters
+    ----------
+    names: tuple
+        The names of the Functions
+    key: str
+        The key of the Functions, see hash_key
+    build: callable
+        Called without arguments to build the Functions (in the order of names) if they are not in the cache
+    cache_dir: str | Path
+        The cache folder, DEFAULT_CACHE_DIR if None
+
+    Returns
+    -------
+    The Functions, in the order of names
+    """
+    cache_dir = Path(DEFAULT_CACHE_DIR if cache_dir is None else cache_dir)
+    paths = [cache_dir / f"{name}_{key}.casadi" for name in names]
+    if all(path.exists() for path in paths):
+        return tuple(Function.load(str(path)) for path in paths)
+
+    functions = tuple(build())
+    built_names = tuple(func.name() for func in functions)
+    if built_names != tuple(names):
+        raise ValueError(f"The built functions are named {built_names}, they should be named {tuple(names)}")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for func, path in zip(functions, paths):
+        # saved under a temporary name then renamed, so that a concurrent process never loads a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        func.save(str(tmp_path))
+        os.replace(tmp_path, path)
+    return functions
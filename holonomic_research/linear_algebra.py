@@ -0,0 +1,267 @@
+"""
+Linear algebra used by the partitioned formulation of the holonomic models.
+
+Two backends are available:
+- "inverse": the historical behaviour, the matrices are inverted with casadi inv()
+- "solve": the inverses are replaced by linear solves that exploit the structure of the matrices,
+  a Cholesky type factorization (LDL^T) for the symmetric positive definite modified mass matrix
+  and a QR/LU factorization for the dependent part of the constraint jacobian Jv
+
+Numeric inputs (DM, np.ndarray) are handled with numpy, so that the partitioned terms can be evaluated on a solution
+without building a symbolic graph.
+"""
+import numpy as np
+from casadi import MX, SX, DM, inv, solve, chol, horzcat, vertcat
+
+LINEAR_ALGEBRA_BACKENDS = ("inverse", "solve")
+CONSTRAINED_DYNAMICS_SOLVERS = ("symbolicqr", "schur")
+
+
+def check_backend(backend: str):
+    """
+    Raise an error if the backend is not one of LINEAR_ALGEBRA_BACKENDS
+
+    Parameters
+    ----------
+    backend: str
+        The name of the linear algebra backend
+    """
+    if backend not in LINEAR_ALGEBRA_BACKENDS:
+        raise ValueError(f"The linear algebra backend should be one of {LINEAR_ALGEBRA_BACKENDS}, not {backend}")
+
+
+def is_numeric(x) -> bool:
+    """
+    If x is a numeric value (DM, np.ndarray, list or scalar) rather than a symbolic expression
+
+    Parameters
+    ----------
+    x: MX | SX | DM | np.ndarray | list | float
+        The value to check
+    """
+    return isinstance(x, (DM, np.ndarray, list, tuple, float, int))
+
+
+def numeric_vector(x) -> np.ndarray:
+    """
+    Convert a numeric vector (DM column, np.ndarray or list) to a 1d float array
+
+    Parameters
+    ----------
+    x: DM | np.ndarray | list
+        The vector
+    """
+    return np.array(x, dtype=float).reshape(-1)
+
+
+def spd_solve(A, b, backend: str = "inverse"):
+    """
+    Solve A x = b where A is symmetric positive definite (the mass matrix or the modified mass matrix)
+
+    Parameters
+    ----------
+    A: MX | SX | DM | np.ndarray
+        The symmetric positive definite matrix
+    b: MX | SX | DM | np.ndarray
+        The right hand side
+    backend: str
+        "inverse" to compute inv(A) @ b, "solve" to use a Cholesky type factorization
+
+    Returns
+    -------
+    x: the solution of A x = b, of the same type as A
+    """
+    check_backend(backend)
+    if backend == "inverse":
+        return np.linalg.inv(A) @ b if isinstance(A, np.ndarray) else inv(A) @ b
+
+    if isinstance(A, MX):
+        # sparse LDL^T, it can be differentiated and code generated
+        return solve(A, b, "ldl")
+    if isinstance(A, (SX, DM)):
+        # A = R^T R, the two triangular systems are solved by substitution
+        R = chol(A)
+        return solve(R, solve(R.T, b))
+
+    L = np.linalg.cholesky(A)
+    return np.linalg.solve(L.T, np.linalg.solve(L, b))
+
+
+def general_solve(A, b, backend: str = "inverse"):
+    """
+    Solve A x = b where A is a square non-symmetric matrix (the dependent part of the constraint jacobian Jv)
+
+    Parameters
+    ----------
+    A: MX | SX | DM | np.ndarray
+        The square matrix
+    b: MX | SX | DM | np.ndarray
+        The right hand side
+    backend: str
+        "inverse" to compute inv(A) @ b, "solve" to use a QR (symbolic) or LU (numeric) factorization
+
+    Returns
+    -------
+    x: the solution of A x = b, of the same type as A
+    """
+    check_backend(backend)
+    if backend == "inverse":
+        return np.linalg.inv(A) @ b if isinstance(A, np.ndarray) else inv(A) @ b
+
+    if isinstance(A, MX):
+        return solve(A, b, "qr")
+    if isinstance(A, (SX, DM)):
+        return solve(A, b)
+
+    return np.linalg.solve(A, b)
+
+
+def inv_2x2(A):
+    """
+    Closed-form inverse of a 2x2 matrix (Jv of a planar loop), it gives a much smaller expression than inv() and
+    it can be expanded to SX
+
+    Parameters
+    ----------
+    A: MX | SX | DM | np.ndarray
+        The 2x2 matrix
+
+    Returns
+    -------
+    The inverse of A, of the same type as A
+    """
+    det = A[0, 0] * A[1, 1] - A[0, 1] * A[1, 0]
+    if isinstance(A, np.ndarray):
+        return np.array([[A[1, 1], -A[0, 1]], [-A[1, 0], A[0, 0]]]) / det
+    return vertcat(horzcat(A[1, 1], -A[0, 1]), horzcat(-A[1, 0], A[0, 0])) / det
+
+
+def schur_complement_solve(mass_matrix, constraint_jacobian, generalized_forces, biais):
+    """
+    Solve the augmented system of the constrained dynamics with the range-space method
+
+        [M  J^T] [qddot ]   [generalized_forces]
+        [J   0 ] [lambda] = [biais             ]
+
+    The mass matrix is symmetric positive definite and the number of constraints is small, so instead of
+    factorizing the full (nq + nc) matrix, M is factorized once for all the right hand sides and only the
+    (nc x nc) Schur complement S = J M^-1 J^T is factorized on top of it.
+
+    Parameters
+    ----------
+    mass_matrix: MX | SX | DM | np.ndarray
+        The mass matrix M
+    constraint_jacobian: MX | SX | DM | np.ndarray
+        The jacobian of the holonomic constraints J
+    generalized_forces: MX | SX | DM | np.ndarray
+        tau minus the non-linear effects
+    biais: MX | SX | DM | np.ndarray
+        The right hand side of the constraints at the acceleration level
+
+    Returns
+    -------
+    qddot, lambdas: the generalized accelerations and the lagrange multipliers
+    """
+    nb_rhs = generalized_forces.shape[1]
+    if isinstance(mass_matrix, np.ndarray):
+        m_inv_rhs = spd_solve(mass_matrix, np.hstack((generalized_forces, constraint_jacobian.T)), "solve")
+    else:
+        m_inv_rhs = spd_solve(mass_matrix, horzcat(generalized_forces, constraint_jacobian.T), "solve")
+    unconstrained_qddot = m_inv_rhs[:, :nb_rhs]
+    m_inv_jacobian_transpose = m_inv_rhs[:, nb_rhs:]
+
+    schur_complement = constraint_jacobian @ m_inv_jacobian_transpose
+    lambdas = spd_solve(schur_complement, constraint_jacobian @ unconstrained_qddot - biais, "solve")
+    qddot = unconstrained_qddot - m_inv_jacobian_transpose @ lambdas
+
+    return qddot, lambdas
+
+
+class PartitionContext:
+    """
+    Holds the terms of the partitioned formulation that only depend on (q, qdot) so that they are computed once
+    per dynamics evaluation and shared between the coupling matrix, the biais vector and the lagrange multipliers.
+
+    Docquier, N., Poncelet, A., and Fisette, P.:
+    ROBOTRAN: a powerful symbolic gnerator of multibody models, Mech. Sci., 4, 199–219,
+    https://doi.org/10.5194/ms-4-199-2013, 2013.
+    """
+
+    def __init__(self, model, q: MX, qdot: MX = None):
+        """
+        Parameters
+        ----------
+        model: BiorbdModelCustomHolonomic
+            The model the partition is defined on
+        q: MX | DM | np.ndarray
+            The generalized coordinates, the terms are np.ndarray if q is numeric
+        qdot: MX | DM | np.ndarray
+            The generalized velocities, can be given later with set_qdot
+        """
+        self.model = model
+        self.backend = model.linear_algebra_backend
+        # numeric q: the terms are np.ndarray computed with numpy, no graph is built
+        self.numeric = is_numeric(q)
+        self.q = numeric_vector(q) if self.numeric else q
+
+        self.constrained_jacobian = model.holonomic_constraints_jacobian(self.q)
+        if self.numeric:
+            self.constrained_jacobian = np.array(self.constrained_jacobian, dtype=float)
+        self.jacobian_u = self.constrained_jacobian[:, model.independent_joint_index]
+        self.jacobian_v = self.constrained_jacobian[:, model.dependent_joint_index]
+        # the closed form inverse replaces inv() only, the "solve" backend keeps its linear solves
+        if self.backend == "inverse" and model.planar_fast_path:
+            self.jacobian_v_inv = inv_2x2(self.jacobian_v)
+        elif self.backend == "inverse":
+            self.jacobian_v_inv = np.linalg.inv(self.jacobian_v) if self.numeric else inv(self.jacobian_v)
+        else:
+            self.jacobian_v_inv = None
+
+        self.coupling_matrix = -self.solve_jacobian_v(self.jacobian_u)
+
+        self.qdot = None
+        self.biais = None
+        if qdot is not None:
+            self.set_qdot(qdot)
+
+    def solve_jacobian_v(self, b):
+        """
+        Compute inv(Jv) @ b with the backend of the model
+
+        Parameters
+        ----------
+        b: MX
+            The right hand side
+        """
+        if self.jacobian_v_inv is not None:
+            return self.jacobian_v_inv @ b
+        return general_solve(self.jacobian_v, b, self.backend)
+
+    def solve_jacobian_v_transpose(self, b):
+        """
+        Compute inv(Jv^T) @ b with the backend of the model
+
+        Parameters
+        ----------
+        b: MX
+            The right hand side
+        """
+        if self.jacobian_v_inv is not None:
+            return self.jacobian_v_inv.T @ b
+        return general_solve(self.jacobian_v.T, b, self.backend)
+
+    def set_qdot(self, qdot: MX):
+        """
+        Add the velocity dependent terms to the context, i.e. the biais vector (right term of the equation (15))
+
+        Parameters
+        ----------
+        qdot: MX
+            The generalized velocities
+        """
+        jacobian_dot_qdot = self.model.holonomic_constraints_jacobian_dot_qdot(self.q, qdot)
+        if self.numeric:
+            qdot = numeric_vector(qdot)
+            jacobian_dot_qdot = numeric_vector(jacobian_dot_qdot)
+        self.qdot = qdot
+        self.biais = -self.solve_jacobian_v(jacobian_dot_qdot)
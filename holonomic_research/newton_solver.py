@@ -0,0 +1,132 @@
+"""
+Newton solver of the dependent joints for closed loops without explicit inverse kinematics.
+
+The residual Function and the casadi rootfinder are built (and expanded) once per model, then reused for each node.
+Along a trajectory, each node is warm-started from the solution of the previous node (continuation), which keeps
+the Newton iterations in their quadratic regime and on the same branch of the loop.
+"""
+import numpy as np
+from casadi import MX, DM, Function, rootfinder
+
+
+class DependentJointsNewtonSolver:
+    """
+    Solve holonomic_constraints(q(u, v)) = 0 for the dependent joints v given the independent joints u
+    """
+
+    def __init__(self, model, abstol: float = 1e-10, max_iter: int = 50):
+        """
+        Parameters
+        ----------
+        model: BiorbdModelCustomHolonomic
+            The holonomic model, its constraints and its partition must already be set
+        abstol: float
+            The tolerance on the residuals of the constraints
+        max_iter: int
+            The maximal number of Newton iterations at each node
+        """
+        self.model = model
+        self.abstol = abstol
+        self.max_iter = max_iter
+
+        v_sym = MX.sym("v", model.nb_dependent_joints, 1)
+        u_sym = MX.sym("u", model.nb_independent_joints, 1)
+        q = model.state_from_partition(u_sym, v_sym)
+
+        self.residuals = Function(
+            "holonomic_constraints_residuals",
+            [v_sym, u_sym],
+            [model.holonomic_constraints(q)],
+            ["v", "u"],
+            ["residuals"],
+        ).expand()
+
+        opts = {
+            "abstol": abstol,
+            "max_iter": max_iter,
+            "print_iteration": False,
+            "error_on_fail": False,
+        }
+        self.rootfinder = rootfinder("dependent_joints_rootfinder", "newton", self.residuals, opts)
+
+    def __call__(self, u, v_init=None):
+        """
+        Solve for the dependent joints, symbolically (the rootfinder becomes a node of the graph) or numerically
+
+        Parameters
+        ----------
+        u: MX | DM | np.ndarray
+            The independent joints
+        v_init: MX | DM | np.ndarray
+            The initial guess of the dependent joints, zeros if None
+
+        Returns
+        -------
+        The dependent joints
+        """
+        if v_init is None:
+            v_init = MX() if isinstance(u, MX) else DM.zeros(self.model.nb_dependent_joints, 1)
+        return self.rootfinder(v_init, u)
+
+    def solve(self, u, v_init=None) -> tuple[DM, dict]:
+        """
+        Solve numerically for the dependent joints at one node
+
+        Parameters
+        ----------
+        u: DM | np.ndarray
+            The independent joints
+        v_init: DM | np.ndarray
+            The initial guess of the dependent joints, zeros if None
+
+        Returns
+        -------
+        v, stats: the dependent joints and a dict with the number of iterations, the norm of the residuals
+        and if the solver succeeded
+        """
+        v = self(u, v_init)
+        solver_stats = self.rootfinder.stats()
+        residual = float(np.linalg.norm(np.array(self.residuals(v, u))))
+        stats = {
+            "iterations": solver_stats.get("iter_count", -1),
+            "residual": residual,
+            "success": residual <= self.abstol or solver_stats.get("success", False),
+        }
+        return v, stats
+
+    def solve_trajectory(self, u: np.ndarray, v_init: np.ndarray = None) -> tuple[np.ndarray, dict]:
+        """
+        Solve numerically for the dependent joints along a trajectory, each node being warm-started from the
+        solution of the previous one
+
+        Parameters
+        ----------
+        u: np.ndarray
+            The independent joints, of shape (nb_independent_joints, nb_nodes)
+        v_init: np.ndarray
+            The initial guess of the dependent joints at the first node, zeros if None
+
+        Returns
+        -------
+        v, stats: the dependent joints of shape (nb_dependent_joints, nb_nodes) and a dict with the number of
+        iterations, the norm of the residuals and the success of each node
+        """
+        u = np.array(u, dtype=float).reshape(self.model.nb_independent_joints, -1)
+        nb_nodes = u.shape[1]
+
+        v = np.zeros((self.model.nb_dependent_joints, nb_nodes))
+        stats = {
+            "iterations": np.zeros(nb_nodes, dtype=int),
+            "residual": np.zeros(nb_nodes),
+            "success": np.zeros(nb_nodes, dtype=bool),
+        }
+
+        v_previous = v_init
+        for i in range(nb_nodes):
+            v_i, stats_i = self.solve(u[:, i], v_previous)
+            v[:, i] = np.array(v_i).squeeze()
+            for key in stats:
+                stats[key][i] = stats_i[key]
+            v_previous = v[:, i]
+
+        return v, stats
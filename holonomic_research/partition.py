@@ -0,0 +1,133 @@
+"""
+Automatic selection of the dependent and independent joints of a closed loop, and check of its conditioning.
+
+The dependent joints v must make the dependent part Jv of the constraint jacobian well conditioned, since Jv is
+inverted in the coupling matrix, the biais vector and the lagrange multipliers. A column-pivoted QR of the constraint
+jacobian J = Q R P^T at a reference pose picks, greedily, the columns of J that are the most linearly independent:
+the first nb_constraints pivots are the dependent joints.
+
+Along a trajectory the loop can get close to a singular configuration (e.g. the knee-hand loop fully stretched) where
+Jv becomes badly conditioned, which is a major cause of IPOPT restoration phases. check_partition_conditioning warns
+when it happens.
+"""
+import warnings
+
+import numpy as np
+from scipy.linalg import qr
+
+# Above this condition number of Jv, the partition is considered badly conditioned
+CONDITION_NUMBER_THRESHOLD = 1e4
+
+
+def select_partition(constraint_jacobian: np.ndarray, candidate_joints: list = None) -> tuple[list, list]:
+    """
+    Select the dependent joints by a column-pivoted QR of the constraint jacobian
+
+    Parameters
+    ----------
+    constraint_jacobian: np.ndarray
+        The constraint jacobian at the reference pose, of shape (nb_constraints, nb_q)
+    candidate_joints: list
+        The joints that can be dependent (e.g. to exclude the root), all the joints if None
+
+    Returns
+    -------
+    dependent_joint_index, independent_joint_index: the sorted lists of the dependent and independent joints
+    """
+    constraint_jacobian = np.array(constraint_jacobian, dtype=float)
+    nb_constraints, nb_q = constraint_jacobian.shape
+    candidate_joints = list(range(nb_q)) if candidate_joints is None else list(candidate_joints)
+
+    _, r, pivots = qr(constraint_jacobian[:, candidate_joints], mode="economic", pivoting=True)
+    diagonal = np.abs(np.diag(r))
+    if diagonal.shape[0] < nb_constraints or diagonal[nb_constraints - 1] <= 1e-10 * diagonal[0]:
+        raise ValueError(
+            "The constraint jacobian is rank deficient on the candidate joints at the reference pose, "
+            "the constraints are redundant or the pose is singular"
+        )
+
+    dependent_joint_index = sorted(candidate_joints[i] for i in pivots[:nb_constraints])
+    independent_joint_index = [i for i in range(nb_q) if i not in dependent_joint_index]
+    return dependent_joint_index, independent_joint_index
+
+
+def jacobian_v_condition_numbers(model, q: np.ndarray, dependent_joint_index: list = None) -> np.ndarray:
+    """
+    The condition number of Jv at each node of a trajectory
+
+    Parameters
+    ----------
+    model: BiorbdModelCustomHolonomic
+        The holonomic model, with its constraints and its partition
+    q: np.ndarray
+        The generalized coordinates, of shape (nb_q, nb_nodes)
+    dependent_joint_index: list
+        The dependent joints of the partition, the ones of the model if None
+
+    Returns
+    -------
+    The condition numbers, of shape (nb_nodes,)
+    """
+    if dependent_joint_index is None:
+        dependent_joint_index = model.dependent_joint_index
+    q = np.array(q, dtype=float).reshape(model.nb_q, -1)
+    nb_nodes = q.shape[1]
+
+    # the outputs of the map are concatenated horizontally
+    jacobians = np.array(model.mapped_holonomic_constraints_jacobian(nb_nodes)(q))
+    return np.array(
+        [
+            np.linalg.cond(jacobians[:, i * model.nb_q : (i + 1) * model.nb_q][:, dependent_joint_index])
+            for i in range(nb_nodes)
+        ]
+    )
+
+
+def check_partition_conditioning(model, q: np.ndarray, threshold: float = CONDITION_NUMBER_THRESHOLD) -> np.ndarray:
+    """
+    Warn if Jv is badly conditioned somewhere along a trajectory
+
+    Parameters
+    ----------
+    model: BiorbdModelCustomHolonomic
+        The holonomic model, with its constraints and its partition
+    q: np.ndarray
+        The generalized coordinates, of shape (nb_q, nb_nodes)
+    threshold: float
+        The condition number above which a warning is raised
+
+    Returns
+    -------
+    The condition numbers of Jv at each node
+    """
+    condition_numbers = jacobian_v_condition_numbers(model, q)
+    worst_node = int(np.argmax(condition_numbers))
+    if condition_numbers[worst_node] > threshold:
+        warnings.warn(
+            f"The dependent part of the constraint jacobian is badly conditioned along the trajectory (condition "
+            f"number {condition_numbers[worst_node]:.1e} at node {worst_node}) with the dependent joints "
+            f"{list(model.dependent_joint_index)}, another partition (see partition.select_partition) may avoid "
+            f"restoration phases"
+        )
+    return condition_numbers
+
+
+def best_partition(model, q: np.ndarray, partitions: list) -> int:
+    """
+    The partition whose Jv is the best conditioned on a pose or a trajectory (lowest worst condition number)
+
+    Parameters
+    ----------
+    model: BiorbdModelCustomHolonomic
+        The holonomic model, with its constraints
+    q: np.ndarray
+        The generalized coordinates, of shape (nb_q, nb_nodes)
+    partitions: list
+        The candidate partitions, as lists of dependent joints
+
+    Returns
+    -------
+    The index of the best partition in partitions
+    """
+    worst_condition_numbers = [np.max(jacobian_v_condition_numbers(model, q, dependent)) for dependent in partitions]
+    return int(np.argmin(worst_condition_numbers))
@@ -0,0 +1,276 @@
+"""
+Integration of the constrained dynamics with a projection of the state on the constraint manifold after each step.
+
+Baumgarte stabilization (model.stabilization, alpha, beta) only damps the drift of the constraints and its gains
+have to be tuned with the step size. Here, after each RK4 step of constrained_forward_dynamics:
+- q is projected on phi(q) = 0, either with the inverse kinematics of the dependent joints (the independent joints
+  are kept, "ik") or with Gauss-Newton iterations giving the minimal-norm correction (q -= J^T (J J^T)^-1 phi(q),
+  "jacobian")
+- qdot is projected on J(q) qdot = 0, either by recomputing the dependent velocities with the coupling matrix ("ik")
+  or with the minimal-norm correction qdot -= J^T (J J^T)^-1 J qdot ("jacobian")
+so the constraints stay satisfied up to the tolerance of the projection whatever the step size.
+
+With the "ik" projection, several partitions can be given: when Jv of the active partition gets badly conditioned
+(e.g. the loop gets close to full extension), the integrator switches to the best conditioned partition, so that
+the Newton iterations stay in their quadratic regime.
+"""
+import numpy as np
+from casadi import MX, Function
+
+from linear_algebra import spd_solve
+from partition import CONDITION_NUMBER_THRESHOLD
+
+PROJECTIONS = ("ik", "jacobian")
+
+
+class ProjectedRK4Integrator:
+    """
+    RK4 integrator of constrained_forward_dynamics with a post-step projection of q and qdot
+    """
+
+    def __init__(
+        self,
+        model,
+        projection: str = "jacobian",
+        nb_position_iterations: int = 3,
+        partitions: list = None,
+        condition_number_threshold: float = CONDITION_NUMBER_THRESHOLD,
+    ):
+        """
+        Parameters
+        ----------
+        model: BiorbdModelCustomHolonomic
+            The holonomic model, with its constraints (and its partition for the "ik" projection)
+        projection: str
+            "ik" to project with the inverse kinematics of the dependent joints, "jacobian" for the minimal-norm
+            projection
+        nb_position_iterations: int
+            The number of Gauss-Newton iterations of the "jacobian" projection of q
+        partitions: list
+            The partitions (lists of dependent joints) the "ik" projection can switch between, the partition of the
+            model is the first one. The model must provide set_dependencies.
+        condition_number_threshold: float
+            The condition number of Jv above which the "ik" projection switches to the best conditioned partition
+        """
+        if projection not in PROJECTIONS:
+            raise ValueError(f"The projection should be one of {PROJECTIONS}, not {projection}")
+        if projection == "ik" and model.nb_dependent_joints == 0:
+            raise RuntimeError("The ik projection needs the dependent joints of the model, call set_dependencies")
+
+        self.model = model
+        self.projection = projection
+        self.nb_position_iterations = nb_position_iterations
+        self.condition_number_threshold = condition_number_threshold
+
+        q = MX.sym("q", model.nb_q, 1)
+        qdot = MX.sym("qdot", model.nb_qdot, 1)
+        tau = MX.sym("tau", model.nb_tau, 1)
+        dt = MX.sym("dt", 1, 1)
+
+        self.dynamics = Function(
+            "constrained_dynamics", [q, qdot, tau], [qdot, model.constrained_forward_dynamics(q, qdot, tau)]
+        )
+        q_next, qdot_next = self._rk4(q, qdot, tau, dt)
+        self.rk4_step = Function(
+            "rk4_step", [q, qdot, tau, dt], [q_next, qdot_next], ["q", "qdot", "tau", "dt"], ["q", "qdot"]
+        )
+
+        self.jacobian = Function("holonomic_constraints_jacobian", [q], [model.holonomic_constraints_jacobian(q)])
+
+        # one projection per partition, built with the model set to this partition
+        self.partitions = [list(model.dependent_joint_index)]
+        if projection == "ik" and partitions is not None:
+            self.partitions += [list(dependent) for dependent in partitions if list(dependent) != self.partitions[0]]
+        self.projection_functions = []
+        for dependent_joint_index in self.partitions:
+            if projection == "ik" and len(self.partitions) > 1:
+                model.set_dependencies(
+                    dependent_joint_index, [i for i in range(model.nb_q) if i not in dependent_joint_index]
+                )
+            q_projected = self.project_q(q)
+            self.projection_functions.append(
+                Function(
+                    "projection",
+                    [q, qdot],
+                    [q_projected, self.project_qdot(q_projected, qdot)],
+                    ["q", "qdot"],
+                    ["q", "qdot"],
+                )
+            )
+        if len(self.partitions) > 1:
+            model.set_dependencies(self.partitions[0], [i for i in range(model.nb_q) if i not in self.partitions[0]])
+        self.active_partition = 0
+
+    @property
+    def projection_function(self) -> Function:
+        """
+        The projection of the active partition
+        """
+        return self.projection_functions[self.active_partition]
+
+    def update_partition(self, q: np.ndarray) -> float:
+        """
+        Switch to the best conditioned partition if Jv of the active partition is badly conditioned at q
+
+        Parameters
+        ----------
+        q: np.ndarray
+            The generalized coordinates
+
+        Returns
+        -------
+        The condition number of Jv of the active partition, after the switch
+        """
+        jacobian = np.array(self.jacobian(q))
+        condition_numbers = [np.linalg.cond(jacobian[:, dependent]) for dependent in self.partitions]
+        if condition_numbers[self.active_partition] > self.condition_number_threshold:
+            self.active_partition = int(np.argmin(condition_numbers))
+        return condition_numbers[self.active_partition]
+
+    def _rk4(self, q: MX, qdot: MX, tau: MX, dt: MX) -> tuple[MX, MX]:
+        """
+        One RK4 step of the constrained dynamics, tau being constant on the step
+        """
+        k1 = self.dynamics(q, qdot, tau)
+        k2 = self.dynamics(q + dt / 2 * k1[0], qdot + dt / 2 * k1[1], tau)
+        k3 = self.dynamics(q + dt / 2 * k2[0], qdot + dt / 2 * k2[1], tau)
+        k4 = self.dynamics(q + dt * k3[0], qdot + dt * k3[1], tau)
+        q_next = q + dt / 6 * (k1[0] + 2 * k2[0] + 2 * k3[0] + k4[0])
+        qdot_next = qdot + dt / 6 * (k1[1] + 2 * k2[1] + 2 * k3[1] + k4[1])
+        return q_next, qdot_next
+
+    def project_q(self, q: MX) -> MX:
+        """
+        Project the generalized coordinates on phi(q) = 0
+
+        Parameters
+        ----------
+        q: MX
+            The generalized coordinates after the step
+
+        Returns
+        -------
+        The projected generalized coordinates
+        """
+        model = self.model
+        if self.projection == "ik":
+            q_u = q[model.independent_joint_index]
+            q_v = model.newton_solver(q_u, q[model.dependent_joint_index])
+            return model.state_from_partition(q_u, q_v)
+
+        for _ in range(self.nb_position_iterations):
+            jacobian = model.holonomic_constraints_jacobian(q)
+            q = q - jacobian.T @ spd_solve(jacobian @ jacobian.T, model.holonomic_constraints(q), "solve")
+        return q
+
+    def project_qdot(self, q: MX, qdot: MX) -> MX:
+        """
+        Project the generalized velocities on J(q) qdot = 0
+
+        Parameters
+        ----------
+        q: MX
+            The projected generalized coordinates
+        qdot: MX
+            The generalized velocities after the step
+
+        Returns
+        -------
+        The projected generalized velocities
+        """
+        model = self.model
+        if self.projection == "ik":
+            qdot_u = qdot[model.independent_joint_index]
+            return model.state_from_partition(qdot_u, model.coupling_matrix(q) @ qdot_u)
+
+        jacobian = model.holonomic_constraints_jacobian(q)
+        return qdot - jacobian.T @ spd_solve(jacobian @ jacobian.T, jacobian @ qdot, "solve")
+
+    def step(self, q, qdot, tau, dt: float, project: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        """
+        One step of the integrator
+
+        Parameters
+        ----------
+        q: np.ndarray
+            The generalized coordinates
+        qdot: np.ndarray
+            The generalized velocities
+        tau: np.ndarray
+            The generalized torques, constant on the step
+        dt: float
+            The step size
+        project: bool
+            If the state is projected after the RK4 step
+
+        Returns
+        -------
+        q, qdot at the end of the step
+        """
+        q_next, qdot_next = self.rk4_step(q, qdot, tau, dt)
+        if project:
+            if len(self.partitions) > 1:
+                # the partition is chosen where the projection is done
+                self.update_partition(q_next)
+            q_next, qdot_next = self.projection_function(q_next, qdot_next)
+        return np.array(q_next).squeeze(), np.array(qdot_next).squeeze()
+
+    def simulate(
+        self, q0: np.ndarray, qdot0: np.ndarray, tau: np.ndarray, dt: float, project: bool = True
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Integrate the dynamics from (q0, qdot0)
+
+        Parameters
+        ----------
+        q0: np.ndarray
+            The initial generalized coordinates
+        qdot0: np.ndarray
+            The initial generalized velocities
+        tau: np.ndarray
+            The generalized torques, of shape (nb_tau, nb_steps)
+        dt: float
+            The step size
+        project: bool
+            If the state is projected after each RK4 step
+
+        Returns
+        -------
+        q, qdot: the states at the nodes, of shape (nb_q, nb_steps + 1)
+        """
+        tau = np.array(tau, dtype=float).reshape(self.model.nb_tau, -1)
+        nb_steps = tau.shape[1]
+
+        q = np.zeros((self.model.nb_q, nb_steps + 1))
+        qdot = np.zeros((self.model.nb_qdot, nb_steps + 1))
+        q[:, 0] = q0
+        qdot[:, 0] = qdot0
+        for i in range(nb_steps):
+            q[:, i + 1], qdot[:, i + 1] = self.step(q[:, i], qdot[:, i], tau[:, i], dt, project)
+
+        return q, qdot
+
+    def constraint_drift(self, q: np.ndarray, qdot: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The norms of the position and velocity constraints along a trajectory
+
+        Parameters
+        ----------
+        q: np.ndarray
+            The generalized coordinates, of shape (nb_q, nb_nodes)
+        qdot: np.ndarray
+            The generalized velocities, of shape (nb_qdot, nb_nodes)
+
+        Returns
+        -------
+        The norms of phi(q) and of J(q) qdot at each node
+        """
+        q_sym = MX.sym("q", self.model.nb_q, 1)
+        qdot_sym = MX.sym("qdot", self.model.nb_qdot, 1)
+        constraints = Function(
+            "constraints",
+            [q_sym, qdot_sym],
+            [self.model.holonomic_constraints(q_sym), self.model.holonomic_constraints_derivative(q_sym, qdot_sym)],
+        ).map(q.shape[1])
+        phi, phi_dot = constraints(q, qdot)
+        return np.linalg.norm(np.array(phi), axis=0), np.linalg.norm(np.array(phi_dot), axis=0)
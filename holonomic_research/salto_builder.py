@@ -0,0 +1,902 @@
+"""
+Declarative construction of the multi-phase salto OCPs.
+
+The Salto_*phases_* scripts all rebuild by hand the same pieces: a tuple of models, the tau limits, the BiMappings of
+the holonomic phase, the bounds, the initial guesses and the transitions to and from the holonomic phase. Here a salto
+is described by a SaltoSpec, a list of PhaseSpec giving for each phase its type ("contact", "flight" or "holonomic"),
+its model, its duration, its shooting count, its objectives and the edits of its bounds, and build_ocp produces the
+OptimalControlProgram.
+
+The models and the mappings are shared: the phases (and the variants of a sweep) that use the same .bioMod get the same
+model instance, the holonomic phases with the same constraint, partition and options get the same
+BiorbdModelCustomHolonomic, so its compiled dynamics (see codegen.py) and the Function of the transitions (see
+BiorbdModelCustomHolonomic.full_state) are built once.
+"""
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from bioptim import (
+    BiorbdModel,
+    Node,
+    InterpolationType,
+    OptimalControlProgram,
+    ConstraintList,
+    ObjectiveList,
+    ObjectiveFcn,
+    DynamicsList,
+    PhaseTransitionList,
+    PhaseTransitionFcn,
+    DynamicsFcn,
+    DynamicsFunctions,
+    BiMappingList,
+    ConstraintFcn,
+    BoundsList,
+    InitialGuessList,
+    PenaltyController,
+    HolonomicConstraintsList,
+    HolonomicConstraintsFcn,
+    OdeSolver,
+    OdeSolverBase,
+    DefectType,
+    Axis,
+)
+from casadi import MX, vertcat
+
+from biorbd_model_holonomic_updated import BiorbdModelCustomHolonomic
+
+PHASE_TYPES = ("contact", "flight", "holonomic")
+
+# the models and mappings already built in this process, see shared_model and shared_mapping
+_shared_models = {}
+_shared_mappings = {}
+
+
+@dataclass
+class BoundsEdit:
+    """
+    A modification of the bounds of a state of a phase, bounds[key].min[rows, nodes] = min_bound and
+    bounds[key].max[rows, nodes] = max_bound. The nodes index the three columns of the bounds: 0 for the first node,
+    1 for the intermediate nodes and 2 (or -1) for the last node.
+    """
+
+    key: str
+    rows: int | list | slice
+    nodes: int | slice = slice(None)
+    min_bound: float | list = None
+    max_bound: float | list = None
+
+
+@dataclass
+class PhaseSpec:
+    """
+    The description of one phase of a salto
+
+    phase_type: "contact" (torque driven with contacts), "flight" (torque driven) or "holonomic" (torque driven with
+    a closed loop between two markers)
+    model_path: the .bioMod of the phase
+    n_shooting, phase_time: the number of shooting nodes and the initial guess of the duration
+    time_bounds: the bounds of the duration, given to MINIMIZE_TIME
+    time_weight, tau_weight, tau_derivative_weight: the weights of the default objectives, None to remove one
+    pose_start, pose_end: the generalized coordinates of the linear initial guess (all the joints, also for a
+    holonomic phase)
+    contact_indices: the contact forces that are kept in [min_contact_force, max_contact_force]
+    non_slipping_node: the node of the NON_SLIPPING constraint, None for no constraint
+    bounds_edits: the BoundsEdit applied to the bounds from the ranges of the model
+    objectives, constraints: additional (ObjectiveFcn | ConstraintFcn, kwargs) of the phase
+    transition: the transition to the next phase, the transitions to and from a holonomic phase are added
+    automatically, None for a continuous transition
+    holonomic_constraint: the kwargs of HolonomicConstraintsFcn.superimpose_markers (marker_1, marker_2, index,
+    local_frame_index)
+    dependent_joint_index, independent_joint_index: the partition of the holonomic phase, selected at pose_start
+    (see partition.select_partition) if None
+    """
+
+    phase_type: str
+    model_path: str
+    n_shooting: int
+    phase_time: float
+    time_bounds: tuple[float, float]
+    time_weight: float = 10
+    tau_weight: float = 0.1
+    tau_derivative_weight: float = 0.1
+    pose_start: list = None
+    pose_end: list = None
+    contact_indices: tuple = ()
+    non_slipping_node: Node = None
+    bounds_edits: list = field(default_factory=list)
+    objectives: list = field(default_factory=list)
+    constraints: list = field(default_factory=list)
+    transition: Any = None
+    holonomic_constraint: dict = None
+    dependent_joint_index: list = None
+    independent_joint_index: list = None
+
+    def __post_init__(self):
+        if self.phase_type not in PHASE_TYPES:
+            raise ValueError(f"The phase type should be one of {PHASE_TYPES}, not {self.phase_type}")
+        if self.phase_type == "holonomic" and self.holonomic_constraint is None:
+            raise ValueError("A holonomic phase needs its holonomic_constraint")
+
+
+@dataclass
+class SaltoSpec:
+    """
+    The description of a multi-phase salto
+
+    phases: the PhaseSpec of each phase
+    tau_min, tau_max: the torque limits of all the joints
+    tau_scale: the factor applied to the torque limits
+    actuated_joints: the joints driven by tau, the others (the root) are mapped out of the controls
+    min_contact_force, max_contact_force: the bounds of the tracked contact forces
+    static_friction_coefficient: the coefficient of the NON_SLIPPING constraints
+    ode_solver, implicit_ode_solver: the solver of the phases, and of the holonomic phases if implicit_dynamics
+    compiled_dynamics, function_cache, implicit_dynamics, ik_clamp_margin, linear_algebra_backend, expand_dynamics:
+    the options of the holonomic phases, see BiorbdModelCustomHolonomic
+    """
+
+    phases: list
+    tau_min: list
+    tau_max: list
+    actuated_joints: list
+    tau_scale: float = 1
+    tau_init: float = 0
+    min_contact_force: float = 0.01
+    max_contact_force: float = np.inf
+    static_friction_coefficient: float = 0.33
+    ode_solver: OdeSolverBase = field(default_factory=OdeSolver.RK4)
+    implicit_ode_solver: OdeSolverBase = field(
+        default_factory=lambda: OdeSolver.COLLOCATION(defects_type=DefectType.IMPLICIT)
+    )
+    n_threads: int = 32
+    compiled_dynamics: bool = False
+    function_cache: bool = False
+    implicit_dynamics: bool = False
+    ik_clamp_margin: float = None
+    linear_algebra_backend: str = "inverse"
+    expand_dynamics: bool = False
+
+
+def holonomic_transition_pre(controllers: list[PenaltyController, PenaltyController]) -> MX:
+    """
+    Continuity of q and qdot from a phase without holonomic constraints to a holonomic phase, the state of the
+    holonomic phase being reconstructed from its independent joints
+
+    Parameters
+    ----------
+    controllers: list[PenaltyController, PenaltyController]
+        The controller for all the nodes in the penalty
+
+    Returns
+    -------
+    The constraint such that: c(x) = 0
+    """
+    model = controllers[1].model
+    nb_independent = model.nb_independent_joints
+    states_post = controllers[1].states.cx
+    q_post, qdot_post = model.full_state(states_post[:nb_independent], states_post[nb_independent:])
+    return controllers[0].states.cx - vertcat(q_post, qdot_post)
+
+
+def holonomic_transition_post(controllers: list[PenaltyController, PenaltyController]) -> MX:
+    """
+    Continuity of q and qdot from a holonomic phase to a phase without holonomic constraints
+
+    Parameters
+    ----------
+    controllers: list[PenaltyController, PenaltyController]
+        The controller for all the nodes in the penalty
+
+    Returns
+    -------
+    The constraint such that: c(x) = 0
+    """
+    model = controllers[0].model
+    nb_independent = model.nb_independent_joints
+    states_pre = controllers[0].states.cx
+    q_pre, qdot_pre = model.full_state(states_pre[:nb_independent], states_pre[nb_independent:])
+    return vertcat(q_pre, qdot_pre) - controllers[1].states.cx
+
+
+def _holonomic_key(phase: PhaseSpec) -> tuple:
+    """
+    What a holonomic model depends on, the phases with the same key share their model
+    """
+    constraint = dict(phase.holonomic_constraint)
+    index = constraint.pop("index", None)
+    if isinstance(index, slice):
+        index = (index.start, index.stop, index.step)
+    return (
+        phase.model_path,
+        tuple(sorted(constraint.items())),
+        index,
+        None if phase.dependent_joint_index is None else tuple(phase.dependent_joint_index),
+        None if phase.independent_joint_index is None else tuple(phase.independent_joint_index),
+        # the pose only matters when the partition is selected from it
+        tuple(phase.pose_start) if phase.dependent_joint_index is None else None,
+    )
+
+
+def shared_model(phase: PhaseSpec, spec: SaltoSpec) -> BiorbdModel | BiorbdModelCustomHolonomic:
+    """
+    The model of a phase, built once per .bioMod (and per holonomic configuration) in the process
+
+    Parameters
+    ----------
+    phase: PhaseSpec
+        The phase
+    spec: SaltoSpec
+        The salto, for the options of the holonomic models
+    """
+    if phase.phase_type != "holonomic":
+        key = (phase.model_path,)
+        if key not in _shared_models:
+            _shared_models[key] = BiorbdModel(phase.model_path)
+        return _shared_models[key]
+
+    # the options are part of the key: a model is configured once, a spec with other options gets its own model
+    key = _holonomic_key(phase) + (
+        spec.ik_clamp_margin,
+        spec.compiled_dynamics,
+        spec.function_cache,
+        spec.linear_algebra_backend,
+        spec.expand_dynamics,
+    )
+    if key not in _shared_models:
+        model = BiorbdModelCustomHolonomic(phase.model_path)
+        holonomic_constraints = HolonomicConstraintsList()
+        holonomic_constraints.add(
+            "holonomic_constraints",
+            HolonomicConstraintsFcn.superimpose_markers,
+            biorbd_model=model,
+            **phase.holonomic_constraint,
+        )
+        model.set_holonomic_configuration(
+            constraints_list=holonomic_constraints,
+            dependent_joint_index=phase.dependent_joint_index,
+            independent_joint_index=phase.independent_joint_index,
+            reference_q=None if phase.dependent_joint_index is not None else np.array(phase.pose_start),
+        )
+        if spec.ik_clamp_margin != model.ik_clamp_margin:
+            model.set_ik_clamp_margin(spec.ik_clamp_margin)
+        if spec.linear_algebra_backend != model.linear_algebra_backend:
+            model.set_linear_algebra_backend(spec.linear_algebra_backend)
+        if spec.expand_dynamics != model.expand_dynamics:
+            model.set_expand_dynamics(spec.expand_dynamics)
+        if spec.compiled_dynamics:
+            model.enable_compiled_dynamics()
+        if spec.function_cache:
+            model.enable_function_cache()
+        _shared_models[key] = model
+    return _shared_models[key]
+
+
+def shared_mapping(keys: tuple, kept_index: list, nb_elements: int) -> BiMappingList:
+    """
+    The BiMappingList that keeps only some elements of the variables, built once per configuration in the process
+
+    Parameters
+    ----------
+    keys: tuple
+        The names of the mapped variables (e.g. ("q", "qdot") or ("tau",))
+    kept_index: list
+        The index of the kept elements
+    nb_elements: int
+        The number of elements of the variables
+    """
+    key = (tuple(keys), tuple(kept_index), nb_elements)
+    if key not in _shared_mappings:
+        to_second = [kept_index.index(i) if i in kept_index else None for i in range(nb_elements)]
+        mapping = BiMappingList()
+        for name in keys:
+            mapping.add(name, to_second=to_second, to_first=list(kept_index))
+        _shared_mappings[key] = mapping
+    return _shared_mappings[key]
+
+
+def build_ocp(spec: SaltoSpec, warm_start: list[dict] = None) -> tuple[OptimalControlProgram, tuple]:
+    """
+    Build the OptimalControlProgram of a salto
+
+    Parameters
+    ----------
+    spec: SaltoSpec
+        The description of the salto
+    warm_start: list[dict]
+        The initial guess of each phase sampled on its nodes (see warm_start.warm_start_from_spec), the linear
+        interpolation between pose_start and pose_end is used if None
+
+    Returns
+    -------
+    The ocp and the models of the phases
+    """
+    bio_model = tuple(shared_model(phase, spec) for phase in spec.phases)
+    nb_tau = bio_model[0].nb_tau
+    tau_min = [spec.tau_scale * spec.tau_min[i] for i in spec.actuated_joints]
+    tau_max = [spec.tau_scale * spec.tau_max[i] for i in spec.actuated_joints]
+    dof_mapping = shared_mapping(("tau",), spec.actuated_joints, nb_tau)
+
+    objective_functions = ObjectiveList()
+    constraints = ConstraintList()
+    dynamics = DynamicsList()
+    phase_transitions = PhaseTransitionList()
+    x_bounds = BoundsList()
+    x_init = InitialGuessList()
+    u_bounds = BoundsList()
+    u_init = InitialGuessList()
+
+    for i, (phase, model) in enumerate(zip(spec.phases, bio_model)):
+        # --- Objectives --- #
+        objective_functions.add(
+            ObjectiveFcn.Mayer.MINIMIZE_TIME,
+            weight=phase.time_weight,
+            min_bound=phase.time_bounds[0],
+            max_bound=phase.time_bounds[1],
+            phase=i,
+        )
+        if phase.tau_weight is not None:
+            objective_functions.add(ObjectiveFcn.Lagrange.MINIMIZE_CONTROL, key="tau", weight=phase.tau_weight, phase=i)
+        if phase.tau_derivative_weight is not None:
+            objective_functions.add(
+                ObjectiveFcn.Lagrange.MINIMIZE_CONTROL,
+                key="tau",
+                derivative=True,
+                weight=phase.tau_derivative_weight,
+                phase=i,
+            )
+        for objective, kwargs in phase.objectives:
+            objective_functions.add(objective, **kwargs, phase=i)
+
+        # --- Constraints --- #
+        if phase.non_slipping_node is not None:
+            constraints.add(
+                ConstraintFcn.NON_SLIPPING,
+                node=phase.non_slipping_node,
+                normal_component_idx=1,
+                tangential_component_idx=0,
+                static_friction_coefficient=spec.static_friction_coefficient,
+                phase=i,
+            )
+        for contact_index in phase.contact_indices:
+            constraints.add(
+                ConstraintFcn.TRACK_CONTACT_FORCES,
+                min_bound=spec.min_contact_force,
+                max_bound=spec.max_contact_force,
+                node=Node.ALL_SHOOTING,
+                contact_index=contact_index,
+                phase=i,
+            )
+        for constraint, kwargs in phase.constraints:
+            constraints.add(constraint, **kwargs, phase=i)
+
+        # --- Dynamics, bounds and initial guess of the states --- #
+        pose_start = np.array(phase.pose_start, dtype=float)
+        pose_end = np.array(phase.pose_start if phase.pose_end is None else phase.pose_end, dtype=float)
+        if phase.phase_type == "holonomic":
+            state_mapping = shared_mapping(("q", "qdot"), model.independent_joint_index, model.nb_q)
+            if spec.implicit_dynamics:
+                dynamics.add(
+                    model.holonomic_torque_driven_implicit,
+                    dynamic_function=model.holonomic_torque_driven_implicit_dynamics,
+                    mapping=state_mapping,
+                    phase=i,
+                )
+            else:
+                dynamics.add(
+                    model.holonomic_torque_driven,
+                    dynamic_function=DynamicsFunctions.holonomic_torque_driven,
+                    mapping=state_mapping,
+                    phase=i,
+                )
+            q_key, qdot_key = "q_u", "qdot_u"
+            x_bounds.add(q_key, bounds=model.bounds_from_ranges("q", mapping=state_mapping), phase=i)
+            x_bounds.add(qdot_key, bounds=model.bounds_from_ranges("qdot", mapping=state_mapping), phase=i)
+            pose_start = pose_start[model.independent_joint_index]
+            pose_end = pose_end[model.independent_joint_index]
+        else:
+            dynamics.add(DynamicsFcn.TORQUE_DRIVEN, with_contact=phase.phase_type == "contact", phase=i)
+            q_key, qdot_key = "q", "qdot"
+            x_bounds.add(q_key, bounds=model.bounds_from_ranges("q"), phase=i)
+            x_bounds.add(qdot_key, bounds=model.bounds_from_ranges("qdot"), phase=i)
+
+        for edit in phase.bounds_edits:
+            if edit.min_bound is not None:
+                x_bounds[i][edit.key].min[edit.rows, edit.nodes] = edit.min_bound
+            if edit.max_bound is not None:
+                x_bounds[i][edit.key].max[edit.rows, edit.nodes] = edit.max_bound
+
+        if warm_start is None:
+            x_init.add(q_key, np.array([pose_start, pose_end]).T, interpolation=InterpolationType.LINEAR, phase=i)
+            x_init.add(qdot_key, np.zeros((pose_start.shape[0], 2)), interpolation=InterpolationType.LINEAR, phase=i)
+        else:
+            x_init.add(q_key, warm_start[i][q_key], interpolation=InterpolationType.EACH_FRAME, phase=i)
+            x_init.add(qdot_key, warm_start[i][qdot_key], interpolation=InterpolationType.EACH_FRAME, phase=i)
+
+        # --- Controls --- #
+        u_bounds.add("tau", min_bound=tau_min, max_bound=tau_max, phase=i)
+        if warm_start is None:
+            u_init.add("tau", [spec.tau_init] * len(spec.actuated_joints), phase=i)
+        else:
+            u_init.add("tau", warm_start[i]["tau"], interpolation=InterpolationType.EACH_FRAME, phase=i)
+
+        # --- Transition to the next phase --- #
+        if i + 1 < len(spec.phases):
+            next_phase_type = spec.phases[i + 1].phase_type
+            if phase.phase_type != "holonomic" and next_phase_type == "holonomic":
+                phase_transitions.add(holonomic_transition_pre, phase_pre_idx=i)
+            elif phase.phase_type == "holonomic" and next_phase_type != "holonomic":
+                phase_transitions.add(holonomic_transition_post, phase_pre_idx=i)
+            elif phase.transition is not None:
+                phase_transitions.add(phase.transition, phase_pre_idx=i)
+
+    # the implicit defects are only defined for the holonomic phases, the other phases are explicit
+    ode_solvers = [
+        spec.implicit_ode_solver if spec.implicit_dynamics and phase.phase_type == "holonomic" else spec.ode_solver
+        for phase in spec.phases
+    ]
+
+    return (
+        OptimalControlProgram(
+            bio_model=bio_model,
+            dynamics=dynamics,
+            n_shooting=tuple(phase.n_shooting for phase in spec.phases),
+            phase_time=tuple(phase.phase_time for phase in spec.phases),
+            x_init=x_init,
+            u_init=u_init,
+            x_bounds=x_bounds,
+            u_bounds=u_bounds,
+            objective_functions=objective_functions,
+            constraints=constraints,
+            ode_solver=ode_solvers,
+            n_threads=spec.n_threads,
+            assume_phase_dynamics=True,
+            phase_transitions=phase_transitions,
+            variable_mappings=dof_mapping,
+        ),
+        bio_model,
+    )
+
+
+def salto_3phases_spec(name_folder_model: str) -> SaltoSpec:
+    """
+    The salto of Salto_3phases_CL_with_pelvis.py: flight, tucked phase (knee-hand loop) and preparation of the landing
+
+    Parameters
+    ----------
+    name_folder_model: str
+        The folder of the .bioMod
+    """
+    model_path = name_folder_model + "/" + "Model2D_7Dof_0C_5M_CL_V2.bioMod"
+
+    tau_max_total = [0, 0, 0, 325.531, 138, 981.1876, 735.3286, 343.9806]
+
+    pose_takeout_start = [-0.2777, 0.0399, 0.1930, 2.5896, 0.51, 0.5354, -0.8367, 0.1119]
+    pose_salto_start = [-0.6369, 1.0356, 1.5062, 0.3411, 1.3528, 2.1667, -1.9179, 0.0393]
+    pose_salto_end = [0.1987, 1.0356, 2.7470, 0.9906, 0.0252, 1.7447, -1.1335, 0.0097]
+    pose_landing_start = [0.1987, 1.7551, 5.8322, 0.52, 0.95, 1.72, -0.81, 0.0]
+
+    phases = [
+        PhaseSpec(
+            "flight",
+            model_path,
+            n_shooting=20,
+            phase_time=0.2,
+            time_bounds=(0.1, 0.3),
+            tau_weight=10,
+            tau_derivative_weight=10,
+            pose_start=pose_takeout_start,
+            pose_end=pose_salto_start,
+            bounds_edits=[
+                BoundsEdit("q", slice(None), 0, pose_takeout_start, pose_takeout_start),
+                BoundsEdit("q", 0, slice(None), -1, 1),
+                BoundsEdit("q", 1, slice(1, None), 0, 2.5),
+                BoundsEdit("q", 2, 1, -np.pi / 4, np.pi / 2),
+                BoundsEdit("q", 2, -1, -np.pi / 2, np.pi / 2),
+                BoundsEdit("q", 4, -1, 1, None),
+                BoundsEdit("qdot", 0, slice(None), -5, 5),
+                BoundsEdit("qdot", 1, slice(None), -2, 10),
+                BoundsEdit("qdot", 2, slice(None), -5, 5),
+            ],
+        ),
+        PhaseSpec(
+            "holonomic",
+            model_path,
+            n_shooting=30,
+            phase_time=0.3,
+            time_bounds=(0.1, 0.3),
+            tau_weight=0.01,
+            tau_derivative_weight=0.01,
+            pose_start=pose_salto_start,
+            pose_end=pose_salto_end,
+            holonomic_constraint=dict(
+                marker_1="BELOW_KNEE", marker_2="CENTER_HAND", index=slice(1, 3), local_frame_index=11
+            ),
+            dependent_joint_index=[3, 4],
+            independent_joint_index=[0, 1, 2, 5, 6, 7],
+            bounds_edits=[
+                BoundsEdit("q_u", 0, slice(None), -2, 1),
+                BoundsEdit("q_u", 1, slice(1, None), 0, 2.5),
+                BoundsEdit("q_u", 2, 0, 0, np.pi / 2),
+                BoundsEdit("q_u", 2, 1, np.pi / 8, 2 * np.pi),
+                BoundsEdit("q_u", 2, 2, 3 / 4 * np.pi, 3 / 2 * np.pi),
+                BoundsEdit("q_u", 3, slice(None), 1.30, 2.6),
+                BoundsEdit("qdot_u", 0, slice(None), -5, 5),
+                BoundsEdit("qdot_u", 1, slice(None), -2, 10),
+            ],
+        ),
+        PhaseSpec(
+            "flight",
+            model_path,
+            n_shooting=20,
+            phase_time=0.2,
+            time_bounds=(0.1, 0.3),
+            tau_weight=10,
+            tau_derivative_weight=10,
+            pose_start=pose_salto_end,
+            pose_end=pose_landing_start,
+            bounds_edits=[
+                BoundsEdit("q", 0, slice(None), -2, 1),
+                BoundsEdit("q", 1, slice(1, None), 0, 2.5),
+                BoundsEdit("q", 2, slice(None), 3 / 4 * np.pi, 2 * np.pi + 0.5),
+                BoundsEdit("qdot", 0, slice(None), -5, 5),
+                BoundsEdit("qdot", 1, slice(None), -10, 10),
+                BoundsEdit(
+                    "q",
+                    slice(None),
+                    -1,
+                    [pose - 0.5 for pose in pose_landing_start],
+                    [pose + 0.5 for pose in pose_landing_start],
+                ),
+            ],
+        ),
+    ]
+
+    return SaltoSpec(
+        phases=phases,
+        tau_min=[-tau for tau in tau_max_total],
+        tau_max=tau_max_total,
+        actuated_joints=[3, 4, 5, 6, 7],
+        tau_scale=0.9,
+    )
+
+
+def salto_5phases_spec(name_folder_model: str) -> SaltoSpec:
+    """
+    The salto of Salto_5phases_CL_with_pelvis_landing.py: propulsion (1 contact), flight, tucked phase (knee-hand
+    loop), preparation of the landing and landing (2 contacts)
+
+    Parameters
+    ----------
+    name_folder_model: str
+        The folder of the .bioMod
+    """
+    model_path = name_folder_model + "/" + "Model2D_7Dof_0C_5M_CL_V2.bioMod"
+    model_path_1contact = name_folder_model + "/" + "Model2D_7Dof_2C_5M_CL_V2.bioMod"
+    model_path_2contact = name_folder_model + "/" + "Model2D_7Dof_3C_5M_CL_V2.bioMod"
+
+    tau_max_total = [0, 0, 0, 325.531, 138, 981.1876, 735.3286, 343.9806]
+
+    pose_propulsion_start = [0.0195, -0.1714, -0.8568, -0.0782, 0.5437, 2.0522, -1.6462, 0.5296]
+    pose_takeout_start = [-0.2777, 0.0399, 0.1930, 2.5896, 0.51, 0.5354, -0.8367, 0.1119]
+    pose_salto_start = [-0.6369, 1.0356, 1.5062, 0.3411, 1.3528, 2.1667, -1.9179, 0.0393]
+    pose_salto_end = [0.1987, 1.0356, 2.7470, 0.9906, 0.0252, 1.7447, -1.1335, 0.0097]
+    pose_landing_start = [0.1987, 1.7551, 5.8322, 0.52, 0.95, 1.72, -0.81, 0.0]
+    pose_landing_end = [0.1987, 0.14, 6.28, 3.1, 0.03, 0.0, 0.0, 0.0]
+
+    phases = [
+        PhaseSpec(
+            "contact",
+            model_path_1contact,
+            n_shooting=10,
+            phase_time=0.1,
+            time_bounds=(0.01, 0.2),
+            time_weight=1000,
+            tau_weight=0.0001,
+            tau_derivative_weight=0.0001,
+            pose_start=pose_propulsion_start,
+            pose_end=pose_takeout_start,
+            contact_indices=(1,),
+            non_slipping_node=Node.END,
+            bounds_edits=[
+                BoundsEdit("q", slice(None), 0, pose_propulsion_start, pose_propulsion_start),
+                BoundsEdit("q", 2, slice(1, None), -np.pi / 2, np.pi / 2),
+                BoundsEdit("q", 0, slice(None), -1, 1),
+            ],
+            objectives=[
+                (ObjectiveFcn.Mayer.MINIMIZE_COM_VELOCITY, dict(node=Node.END, weight=-1, axes=Axis.Z)),
+            ],
+        ),
+        PhaseSpec(
+            "flight",
+            model_path,
+            n_shooting=20,
+            phase_time=0.2,
+            time_bounds=(0.1, 0.3),
+            pose_start=pose_takeout_start,
+            pose_end=pose_salto_start,
+            bounds_edits=[
+                BoundsEdit("q", 0, slice(None), -1, 1),
+                BoundsEdit("q", 1, slice(None), 0, 2.5),
+                BoundsEdit("q", 2, 0, -np.pi / 2, np.pi / 2),
+                BoundsEdit("q", 2, 1, -np.pi / 4, np.pi / 2),
+                BoundsEdit("q", 2, -1, np.pi / 2, np.pi),
+                BoundsEdit("q", 4, -1, 1, None),
+            ],
+        ),
+        PhaseSpec(
+            "holonomic",
+            model_path,
+            n_shooting=30,
+            phase_time=0.3,
+            time_bounds=(0.1, 0.4),
+            pose_start=pose_salto_start,
+            pose_end=pose_salto_end,
+            holonomic_constraint=dict(
+                marker_1="BELOW_KNEE", marker_2="CENTER_HAND", index=slice(1, 3), local_frame_index=11
+            ),
+            dependent_joint_index=[3, 4],
+            independent_joint_index=[0, 1, 2, 5, 6, 7],
+            bounds_edits=[
+                BoundsEdit("q_u", 0, slice(None), -2, 1),
+                BoundsEdit("q_u", 1, slice(1, None), 0, 2.5),
+                BoundsEdit("q_u", 2, 0, 0, np.pi / 2),
+                BoundsEdit("q_u", 2, 1, np.pi / 8, 2 * np.pi),
+                BoundsEdit("q_u", 2, 2, 3 / 4 * np.pi, 3 / 2 * np.pi),
+                BoundsEdit("q_u", 3, slice(None, -1), 1.96, 2.6),
+                BoundsEdit("q_u", 4, slice(None, -1), -2.3, -1.72),
+            ],
+        ),
+        PhaseSpec(
+            "flight",
+            model_path,
+            n_shooting=30,
+            phase_time=0.3,
+            time_bounds=(0.1, 0.3),
+            pose_start=pose_salto_end,
+            pose_end=pose_landing_start,
+            transition=PhaseTransitionFcn.IMPACT,
+            bounds_edits=[
+                BoundsEdit("q", 0, slice(None), -2, 1),
+                BoundsEdit("q", 1, slice(1, None), 0, 2.5),
+                BoundsEdit("q", 2, slice(None), 3 / 4 * np.pi, 2 * np.pi + 0.5),
+            ],
+        ),
+        PhaseSpec(
+            "contact",
+            model_path_2contact,
+            n_shooting=30,
+            phase_time=0.3,
+            time_bounds=(0.1, 0.3),
+            time_weight=100,
+            tau_derivative_weight=None,
+            pose_start=pose_landing_start,
+            pose_end=pose_landing_end,
+            bounds_edits=[
+                BoundsEdit("q", 0, slice(None), -2, 1),
+                BoundsEdit("q", 1, 0, 0, 2.5),
+                BoundsEdit("q", 1, slice(1, None), -1, 2.5),
+                BoundsEdit("q", 2, 0, 3 / 4 * np.pi, 2 * np.pi + 0.5),
+                BoundsEdit("q", 2, slice(1, None), 2 * np.pi - 0.5, 2 * np.pi + 0.5),
+                BoundsEdit("q", slice(None), -1, pose_landing_end, pose_landing_end),
+            ],
+            objectives=[
+                (ObjectiveFcn.Mayer.MINIMIZE_COM_VELOCITY, dict(node=Node.END, weight=100)),
+                (ObjectiveFcn.Mayer.MINIMIZE_COM_POSITION, dict(node=Node.END, weight=100, axes=Axis.Y)),
+            ],
+            # the contact forces of the landing are only kept positive at the last node
+            constraints=[
+                (
+                    ConstraintFcn.TRACK_CONTACT_FORCES,
+                    dict(min_bound=0.01, max_bound=np.inf, node=Node.END, contact_index=contact_index),
+                )
+                for contact_index in (0, 1, 2)
+            ],
+        ),
+    ]
+
+    return SaltoSpec(
+        phases=phases,
+        tau_min=[-tau for tau in tau_max_total],
+        tau_max=tau_max_total,
+        actuated_joints=[3, 4, 5, 6, 7],
+        tau_scale=0.9,
+    )
+
+
+def salto_6phases_spec(name_folder_model: str) -> SaltoSpec:
+    """
+    The salto of Salto_6phases_CL.py: preparation of the propulsion (2 contacts), propulsion (1 contact), flight,
+    tucked phase (knee-hand loop), preparation of the landing and landing (2 contacts)
+
+    Parameters
+    ----------
+    name_folder_model: str
+        The folder of the .bioMod
+    """
+    model_path = name_folder_model + "/" + "Model2D_7Dof_0C_5M_CL_V2.bioMod"
+    model_path_1contact = name_folder_model + "/" + "Model2D_7Dof_2C_5M_CL_V2.bioMod"
+    model_path_2contact = name_folder_model + "/" + "Model2D_7Dof_3C_5M_CL_V2.bioMod"
+
+    tau_max_total = [0, 0, 0, 325.531, 138, 981.1876, 735.3286, 343.9806]
+
+    pose_at_first_node = [0.0188, 0.1368, -0.1091, 1.78, 0.5437, 0.191, -0.1452, 0.1821]
+    pose_propulsion_start = [
+        -0.2347217373715483,
+        -0.45549996131551357,
+        -0.8645258574574489,
+        0.4820766547674885,
+        0.03,
+        2.590467089448695,
+        -2.289747592408045,
+        0.5538056491954265,
+    ]
+    pose_takeout_start = [
+        -0.2777672842694191,
+        0.03995514292843797,
+        0.1930477703559439,
+        2.589642304908377,
+        0.03,
+        0.5353536016159908,
+        -0.8367077461678971,
+        0.11196901833050495,
+    ]
+    pose_salto_start = [
+        -0.3269534844623969,
+        0.681422172573302,
+        0.9003344030624946,
+        0.35,
+        1.43,
+        2.3561945135532367,
+        -2.300000008273391,
+        0.6999999941919349,
+    ]
+    pose_salto_end = [
+        -0.8648803377623905,
+        1.3925287774995057,
+        3.785530485157555,
+        0.35,
+        1.14,
+        2.3561945105754827,
+        -2.300000018314619,
+        0.6999999322366998,
+    ]
+    pose_landing_start = [
+        -0.9554004763233065,
+        0.15886445602166693,
+        5.832254254152056,
+        -0.45610833795726297,
+        0.03,
+        0.85,
+        -1.39,
+        0.654641794221728,
+    ]
+    pose_landing_end = [-0.9461201943294933, 0.14, 6.28, 3.1, 0.03, 0.0, 0.0, 0.0]
+
+    phases = [
+        PhaseSpec(
+            "contact",
+            model_path_2contact,
+            n_shooting=20,
+            phase_time=0.2,
+            time_bounds=(0.01, 0.6),
+            tau_weight=0.000001,
+            tau_derivative_weight=0.000001,
+            pose_start=pose_at_first_node,
+            pose_end=pose_propulsion_start,
+            contact_indices=(1, 2),
+            non_slipping_node=Node.END,
+            bounds_edits=[
+                BoundsEdit("q", slice(None), 0, pose_at_first_node, pose_at_first_node),
+                BoundsEdit("qdot", slice(None), 0, 0, 0),
+                BoundsEdit("q", 0, slice(None), -1, 0.5),
+            ],
+        ),
+        PhaseSpec(
+            "contact",
+            model_path_1contact,
+            n_shooting=10,
+            phase_time=0.1,
+            time_bounds=(0.01, 0.2),
+            time_weight=1000,
+            pose_start=pose_propulsion_start,
+            pose_end=pose_takeout_start,
+            contact_indices=(1,),
+            non_slipping_node=Node.END,
+            bounds_edits=[
+                BoundsEdit("q", 2, slice(None), -np.pi / 2, np.pi / 2),
+                BoundsEdit("q", 0, slice(None), -1, 0.5),
+            ],
+            objectives=[
+                (ObjectiveFcn.Mayer.MINIMIZE_COM_VELOCITY, dict(node=Node.END, weight=-1, axes=Axis.Z)),
+            ],
+        ),
+        PhaseSpec(
+            "flight",
+            model_path,
+            n_shooting=10,
+            phase_time=0.1,
+            time_bounds=(0.1, 0.3),
+            pose_start=pose_takeout_start,
+            pose_end=pose_salto_start,
+            bounds_edits=[
+                BoundsEdit("q", 0, slice(None), -1, 0.5),
+                BoundsEdit("q", 1, slice(None), 0, 2.5),
+                BoundsEdit("q", 2, 0, -np.pi / 2, np.pi / 2),
+                BoundsEdit("q", 2, 1, -np.pi / 4, np.pi / 2),
+                BoundsEdit("q", 2, -1, np.pi / 2, np.pi),
+                BoundsEdit("q", 4, -1, 1, None),
+            ],
+        ),
+        PhaseSpec(
+            "holonomic",
+            model_path,
+            n_shooting=40,
+            phase_time=0.4,
+            time_bounds=(0.1, 0.4),
+            pose_start=pose_salto_start,
+            pose_end=pose_salto_end,
+            holonomic_constraint=dict(
+                marker_1="BELOW_KNEE", marker_2="CENTER_HAND", index=slice(1, 3), local_frame_index=11
+            ),
+            dependent_joint_index=[3, 4],
+            independent_joint_index=[0, 1, 2, 5, 6, 7],
+            bounds_edits=[
+                BoundsEdit("q_u", 0, slice(None), -2, 0.5),
+                BoundsEdit("q_u", 1, slice(1, None), 0, 2.5),
+                BoundsEdit("q_u", 2, 0, 0, np.pi / 2),
+                BoundsEdit("q_u", 2, 1, np.pi / 8, 2 * np.pi),
+                BoundsEdit("q_u", 2, 2, 3 / 4 * np.pi, 3 / 2 * np.pi),
+                BoundsEdit("q_u", 3, slice(None, -1), 1.96, 2.6),
+                BoundsEdit("q_u", 4, slice(None, -1), -2.3, -1.72),
+            ],
+        ),
+        PhaseSpec(
+            "flight",
+            model_path,
+            n_shooting=10,
+            phase_time=0.1,
+            time_bounds=(0.1, 0.3),
+            pose_start=pose_salto_end,
+            pose_end=pose_landing_start,
+            transition=PhaseTransitionFcn.IMPACT,
+            bounds_edits=[
+                BoundsEdit("q", 0, slice(None), -2, 0.5),
+                BoundsEdit("q", 1, slice(1, None), 0, 2.5),
+                BoundsEdit("q", 2, slice(None), 3 / 4 * np.pi, 2 * np.pi + 0.5),
+            ],
+        ),
+        PhaseSpec(
+            "contact",
+            model_path_2contact,
+            n_shooting=20,
+            phase_time=0.2,
+            time_bounds=(0.1, 0.3),
+            time_weight=100,
+            tau_derivative_weight=None,
+            pose_start=pose_landing_start,
+            pose_end=pose_landing_end,
+            contact_indices=(1, 2),
+            non_slipping_node=Node.ALL_SHOOTING,
+            bounds_edits=[
+                BoundsEdit("q", [5, 6, 7], 0, pose_landing_start[5:], pose_landing_start[5:]),
+                BoundsEdit("q", 0, slice(None), -2, 0.5),
+                BoundsEdit("q", 1, 0, 0, 2.5),
+                BoundsEdit("q", 1, slice(1, None), -1, 2.5),
+                BoundsEdit("q", 2, 0, 3 / 4 * np.pi, 2 * np.pi + 0.5),
+                BoundsEdit("q", 2, slice(1, None), 2 * np.pi - 0.5, 2 * np.pi + 0.5),
+                BoundsEdit("q", slice(None), -1, pose_landing_end, pose_landing_end),
+            ],
+            objectives=[
+                (ObjectiveFcn.Mayer.MINIMIZE_COM_VELOCITY, dict(node=Node.END, weight=1000)),
+                (ObjectiveFcn.Mayer.MINIMIZE_COM_POSITION, dict(node=Node.END, weight=1000, axes=Axis.Y)),
+            ],
+        ),
+    ]
+
+    return SaltoSpec(
+        phases=phases,
+        tau_min=[-tau for tau in tau_max_total],
+        tau_max=tau_max_total,
+        actuated_joints=[3, 4, 5, 6, 7],
+        tau_scale=0.8,
+    )
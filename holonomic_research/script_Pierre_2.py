@@ -41,11 +41,7 @@ if rotation_pelvis is True:
     )
     u = np.concatenate((u_1[:, np.newaxis], u_2[:, np.newaxis]), axis=1)
 
-    q = np.zeros((bio_model.nb_tau, u.shape[0]))
-    for i, ui in enumerate(u):
-        vi = bio_model.compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model.q_from_u_and_v(ui[:, np.newaxis], vi).toarray().squeeze()
-        q[:, i] = qi
+    q = bio_model.compute_trajectory(u.T)[0]
 
     viz = bioviz.Viz(model_path)
     viz.load_movement(q)
@@ -90,11 +86,7 @@ else:
     )
     u = np.concatenate((u_1[:, np.newaxis], u_2[:, np.newaxis]), axis=1)
 
-    q = np.zeros((bio_model.nb_tau, u.shape[0]))
-    for i, ui in enumerate(u):
-        vi = bio_model.compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model.q_from_u_and_v(ui[:, np.newaxis], vi).toarray().squeeze()
-        q[:, i] = qi
+    q = bio_model.compute_trajectory(u.T)[0]
 
     viz = bioviz.Viz(model_path)
     viz.load_movement(q)
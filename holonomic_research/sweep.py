@@ -0,0 +1,310 @@
+"""
+Parameter sweep of the salto OCPs, solved in parallel worker processes.
+
+A sweep is a list of overrides of a SaltoSpec (see salto_builder.py), each override being a dict whose keys are the
+dotted paths of the fields, e.g. {"phases.1.time_weight": 1000, "tau_scale": 0.9, "min_contact_force": 0.05}
+(expand_grid builds the list from a grid). Each variant is solved independently in a worker process with its own
+n_threads, so that a many-core machine runs several small solves instead of a single one with n_threads=32.
+
+The results are stored in results_dir, one folder per variant named after the hash of its overrides, of the reference
+spec (spec_factory and its arguments) and of the solver settings, with:
+- config.pkl: the overrides, the reference spec and the solver settings
+- solution.pkl: the solution (see Save.save_results_CL), written last and atomically
+- error.txt: the traceback if the build or the solve failed
+A variant with a solution.pkl is done: after a crash, running the same sweep again only solves the missing ones.
+"""
+import copy
+import itertools
+import os
+import pickle
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+
+from bioptim import Solver
+
+from codegen import hash_key
+from salto_builder import SaltoSpec, build_ocp, salto_6phases_spec
+from Save import save_results, save_results_CL
+
+# --- Parameters of the example sweep (main) --- #
+name_folder_model = "/home/mickael/Documents/Anais/Robust_standingBack/Model"
+results_dir = "sweep_salto_6phases"
+nb_workers = 8
+n_threads = 4
+
+
+def expand_grid(grid: dict) -> list[dict]:
+    """
+    All the combinations of a grid of overrides
+
+    Parameters
+    ----------
+    grid: dict
+        The values of each dotted path, e.g. {"phases.1.time_weight": [10, 1000], "tau_scale": [0.8, 0.9]}
+
+    Returns
+    -------
+    The list of overrides, one dict per combination
+    """
+    paths = list(grid)
+    return [dict(zip(paths, values)) for values in itertools.product(*(grid[path] for path in paths))]
+
+
+def apply_overrides(spec: SaltoSpec, overrides: dict) -> SaltoSpec:
+    """
+    A copy of the spec with the overrides applied
+
+    Parameters
+    ----------
+    spec: SaltoSpec
+        The reference spec, it is not modified
+    overrides: dict
+        The new values, by dotted path (the index of a list is given as a number, e.g. "phases.3.n_shooting")
+
+    Returns
+    -------
+    The modified spec
+    """
+    spec = copy.deepcopy(spec)
+    for path, value in overrides.items():
+        *parents, last = path.split(".")
+        target = spec
+        for name in parents:
+            target = target[int(name)] if name.isdigit() else getattr(target, name)
+        if last.isdigit():
+            target[int(last)] = value
+        elif hasattr(target, last):
+            setattr(target, last, value)
+        else:
+            raise AttributeError(f"{type(target).__name__} has no field {last} (override {path})")
+    return spec
+
+
+def _factory_name(spec_factory: callable) -> str:
+    """
+    The full name of a spec factory, e.g. "salto_builder.salto_6phases_spec"
+    """
+    return f"{spec_factory.__module__}.{spec_factory.__name__}"
+
+
+def variant_id(
+    overrides: dict, spec_factory: callable, spec_kwargs: dict, max_iterations: int, linear_solver: str
+) -> str:
+    """
+    The name of the folder of a variant, the values of the overrides and of spec_kwargs must have a deterministic
+    str(). Two sweeps with other reference specs or solver settings get other folders in the same results_dir.
+
+    Parameters
+    ----------
+    overrides: dict
+        The overrides of the variant
+    spec_factory: callable
+        The function returning the reference SaltoSpec
+    spec_kwargs: dict
+        The arguments of spec_factory
+    max_iterations: int
+        The maximal number of IPOPT iterations
+    linear_solver: str
+        The linear solver of IPOPT
+    """
+    return hash_key(
+        _factory_name(spec_factory),
+        sorted(spec_kwargs.items()),
+        max_iterations,
+        linear_solver,
+        *sorted(overrides.items()),
+    )
+
+
+def solve_variant(
+    spec_factory: callable,
+    spec_kwargs: dict,
+    overrides: dict,
+    variant_dir: str,
+    n_threads: int,
+    max_iterations: int,
+    linear_solver: str,
+) -> str:
+    """
+    Build and solve one variant, it is run in a worker process
+
+    Parameters
+    ----------
+    spec_factory: callable
+        A module-level function returning the reference SaltoSpec (e.g. salto_6phases_spec), it is called in the
+        worker so that only its name is sent to the process
+    spec_kwargs: dict
+        The arguments of spec_factory
+    overrides: dict
+        The overrides of the variant
+    variant_dir: str
+        The folder of the results of the variant
+    n_threads: int
+        The number of threads of the OCP in this worker
+    max_iterations: int
+        The maximal number of IPOPT iterations
+    linear_solver: str
+        The linear solver of IPOPT
+
+    Returns
+    -------
+    The status of the solve, or "error"
+    """
+    variant_dir = Path(variant_dir)
+    (variant_dir / "error.txt").unlink(missing_ok=True)
+    try:
+        spec = apply_overrides(spec_factory(**spec_kwargs), overrides)
+        spec.n_threads = n_threads
+        ocp, _ = build_ocp(spec)
+
+        solver = Solver.IPOPT(show_online_optim=False, _linear_solver=linear_solver)
+        solver.set_maximum_iterations(max_iterations)
+        solver.set_bound_frac(1e-8)
+        solver.set_bound_push(1e-8)
+        sol = ocp.solve(solver)
+
+        # written under a temporary name then renamed, a solution.pkl is always complete
+        tmp_path = variant_dir / f"solution.{os.getpid()}.tmp"
+        holonomic_phases = [i for i, phase in enumerate(spec.phases) if phase.phase_type == "holonomic"]
+        if holonomic_phases:
+            save_results_CL(sol, str(tmp_path), holonomic_phases[0])
+        else:
+            save_results(sol, str(tmp_path))
+        os.replace(tmp_path, variant_dir / "solution.pkl")
+        return str(sol.status)
+    except Exception:
+        (variant_dir / "error.txt").write_text(traceback.format_exc())
+        return "error"
+
+
+def run_sweep(
+    spec_factory: callable,
+    overrides_list: list[dict],
+    results_dir: str,
+    nb_workers: int = os.cpu_count(),
+    n_threads: int = 1,
+    spec_kwargs: dict = None,
+    max_iterations: int = 1000,
+    linear_solver: str = "MA57",
+) -> dict:
+    """
+    Solve all the variants of a sweep that are not already in results_dir, in parallel
+
+    Parameters
+    ----------
+    spec_factory: callable
+        A module-level function returning the reference SaltoSpec
+    overrides_list: list[dict]
+        The overrides of each variant, see expand_grid
+    results_dir: str
+        The folder of the results, the variants already solved in it are skipped
+    nb_workers: int
+        The number of worker processes
+    n_threads: int
+        The number of threads of the OCP in each worker, nb_workers * n_threads should match the number of cores
+    spec_kwargs: dict
+        The arguments of spec_factory
+    max_iterations: int
+        The maximal number of IPOPT iterations
+    linear_solver: str
+        The linear solver of IPOPT
+
+    Returns
+    -------
+    The status of each variant solved by this call, by variant id
+    """
+    spec_kwargs = {} if spec_kwargs is None else spec_kwargs
+    results_dir = Path(results_dir)
+
+    pending = {}
+    for overrides in overrides_list:
+        variant_dir = results_dir / variant_id(overrides, spec_factory, spec_kwargs, max_iterations, linear_solver)
+        if (variant_dir / "solution.pkl").exists():
+            continue
+        variant_dir.mkdir(parents=True, exist_ok=True)
+        with open(variant_dir / "config.pkl", "wb") as file:
+            config = {
+                "overrides": overrides,
+                "spec_factory": _factory_name(spec_factory),
+                "spec_kwargs": spec_kwargs,
+                "max_iterations": max_iterations,
+                "linear_solver": linear_solver,
+            }
+            pickle.dump(config, file)
+        pending[variant_dir.name] = (overrides, variant_dir)
+
+    statuses = {}
+    # spawn: the workers do not inherit the threads of casadi from the parent process
+    with ProcessPoolExecutor(max_workers=nb_workers, mp_context=get_context("spawn")) as executor:
+        futures = {
+            executor.submit(
+                solve_variant,
+                spec_factory,
+                spec_kwargs,
+                overrides,
+                str(variant_dir),
+                n_threads,
+                max_iterations,
+                linear_solver,
+            ): name
+            for name, (overrides, variant_dir) in pending.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                statuses[name] = future.result()
+            except Exception as error:
+                # the worker died (e.g. a segmentation fault in the solver), the variant is solved again at resume
+                statuses[name] = f"crashed: {error!r}"
+            print(f"{name}: {statuses[name]} ({len(statuses)}/{len(futures)})")
+    return statuses
+
+
+def load_sweep(results_dir: str) -> list[dict]:
+    """
+    The configurations and solutions of the solved variants of a sweep
+
+    Parameters
+    ----------
+    results_dir: str
+        The folder of the results
+
+    Returns
+    -------
+    One dict per solved variant, the content of config.pkl with the solution under "solution"
+    """
+    results = []
+    for variant_dir in sorted(Path(results_dir).iterdir()):
+        if not (variant_dir / "solution.pkl").exists():
+            continue
+        with open(variant_dir / "config.pkl", "rb") as file:
+            result = pickle.load(file)
+        with open(variant_dir / "solution.pkl", "rb") as file:
+            result["solution"] = pickle.load(file)
+        result["variant_id"] = variant_dir.name
+        results.append(result)
+    return results
+
+
+def main():
+    overrides_list = expand_grid(
+        {
+            "phases.1.time_weight": [10, 1000],
+            "tau_scale": [0.8, 0.9],
+            "min_contact_force": [0.01, 50],
+        }
+    )
+    run_sweep(
+        salto_6phases_spec,
+        overrides_list,
+        results_dir,
+        nb_workers=nb_workers,
+        n_threads=n_threads,
+        spec_kwargs={"name_folder_model": name_folder_model},
+    )
+
+
+if __name__ == "__main__":
+    main()
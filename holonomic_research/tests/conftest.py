@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the modules of holonomic_research import each other by their flat names
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,145 @@
+"""
+Equivalence of the linear algebra that replaced the original formulations: the Schur complement solve of the
+constrained dynamics, the permutation of q_from_u_and_v and the pivoted QR of select_partition.
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+from casadi import MX, DM, Function, horzcat, solve, vertcat
+
+from linear_algebra import schur_complement_solve
+from partition import select_partition
+
+MODEL_FOLDER = Path(__file__).parent.parent.parent / "Model"
+
+
+def random_spd(rng, n: int) -> np.ndarray:
+    a = rng.uniform(-1, 1, (n, n))
+    return a @ a.T + n * np.eye(n)
+
+
+def symbolicqr_solve(mass_matrix, constraint_jacobian, generalized_forces, biais):
+    """The augmented system solved as in the original constrained_forward_dynamics"""
+    nb_q, nb_constraints = constraint_jacobian.shape[1], constraint_jacobian.shape[0]
+    m = MX.sym("m", nb_q, nb_q)
+    j = MX.sym("j", nb_constraints, nb_q)
+    f = MX.sym("f", nb_q, 1)
+    b = MX.sym("b", nb_constraints, 1)
+    augmented = vertcat(horzcat(m, j.T), horzcat(j, MX.zeros(nb_constraints, nb_constraints)))
+    func = Function("symbolicqr", [m, j, f, b], [solve(augmented, vertcat(f, b), "symbolicqr")])
+    x = np.array(func(mass_matrix, constraint_jacobian, generalized_forces, biais))
+    return x[:nb_q], x[nb_q:]
+
+
+@pytest.mark.parametrize("nb_q, nb_constraints", [(8, 2), (8, 3), (5, 1)])
+def test_schur_complement_solve_numpy(nb_q, nb_constraints):
+    rng = np.random.default_rng(nb_q * 10 + nb_constraints)
+    mass_matrix = random_spd(rng, nb_q)
+    constraint_jacobian = rng.uniform(-1, 1, (nb_constraints, nb_q))
+    generalized_forces = rng.uniform(-10, 10, (nb_q, 1))
+    biais = rng.uniform(-1, 1, (nb_constraints, 1))
+
+    qddot, lambdas = schur_complement_solve(mass_matrix, constraint_jacobian, generalized_forces, biais)
+    qddot_ref, lambdas_ref = symbolicqr_solve(mass_matrix, constraint_jacobian, generalized_forces, biais)
+
+    np.testing.assert_allclose(qddot, qddot_ref, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(lambdas, lambdas_ref, rtol=1e-8, atol=1e-10)
+    # the constraints at the acceleration level hold
+    np.testing.assert_allclose(constraint_jacobian @ qddot, biais, atol=1e-10)
+
+
+def test_schur_complement_solve_mx():
+    rng = np.random.default_rng(0)
+    nb_q, nb_constraints = 8, 2
+    m = MX.sym("m", nb_q, nb_q)
+    j = MX.sym("j", nb_constraints, nb_q)
+    f = MX.sym("f", nb_q, 1)
+    b = MX.sym("b", nb_constraints, 1)
+    func = Function("schur", [m, j, f, b], list(schur_complement_solve(m, j, f, b)))
+
+    mass_matrix = random_spd(rng, nb_q)
+    constraint_jacobian = rng.uniform(-1, 1, (nb_constraints, nb_q))
+    generalized_forces = rng.uniform(-10, 10, (nb_q, 1))
+    biais = rng.uniform(-1, 1, (nb_constraints, 1))
+
+    qddot, lambdas = func(mass_matrix, constraint_jacobian, generalized_forces, biais)
+    qddot_ref, lambdas_ref = symbolicqr_solve(mass_matrix, constraint_jacobian, generalized_forces, biais)
+    np.testing.assert_allclose(np.array(qddot), qddot_ref, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(np.array(lambdas), lambdas_ref, rtol=1e-8, atol=1e-10)
+
+
+def q_from_u_and_v_vertcat(dependent_joint_index: list, independent_joint_index: list, u, v):
+    """q_from_u_and_v as it was written before the permutation, one vertcat per degree of freedom"""
+    q = MX() if isinstance(u, MX) else DM()
+    for i in range(len(dependent_joint_index) + len(independent_joint_index)):
+        if i in independent_joint_index:
+            q = vertcat(q, u[independent_joint_index.index(i)])
+        else:
+            q = vertcat(q, v[dependent_joint_index.index(i)])
+    return q
+
+
+@pytest.mark.parametrize("dependent_joint_index", [[3, 4], [0, 7], [5, 1, 2]])
+def test_q_from_u_and_v_permutation(dependent_joint_index):
+    biorbd_model_holonomic = pytest.importorskip("biorbd_model_holonomic")
+    model = biorbd_model_holonomic.BiorbdModelCustomHolonomic(str(MODEL_FOLDER / "Model2D_7Dof_0C_5M_CL_V2.bioMod"))
+    independent_joint_index = [i for i in range(model.nb_q) if i not in dependent_joint_index]
+    model.set_dependencies(dependent_joint_index, independent_joint_index)
+
+    rng = np.random.default_rng(1)
+    u = rng.uniform(-1, 1, len(independent_joint_index))
+    v = rng.uniform(-1, 1, len(dependent_joint_index))
+    np.testing.assert_array_equal(
+        np.array(model.q_from_u_and_v(u, v)),
+        np.array(q_from_u_and_v_vertcat(dependent_joint_index, independent_joint_index, DM(u), DM(v))),
+    )
+
+    # symbolic: same function of (u, v)
+    u_sym = MX.sym("u", len(independent_joint_index), 1)
+    v_sym = MX.sym("v", len(dependent_joint_index), 1)
+    func = Function("q", [u_sym, v_sym], [model.q_from_u_and_v(u_sym, v_sym)])
+    func_ref = Function(
+        "q_ref", [u_sym, v_sym], [q_from_u_and_v_vertcat(dependent_joint_index, independent_joint_index, u_sym, v_sym)]
+    )
+    np.testing.assert_array_equal(np.array(func(u, v)), np.array(func_ref(u, v)))
+
+
+def test_select_partition_full_rank():
+    rng = np.random.default_rng(2)
+    nb_constraints, nb_q = 2, 8
+    constraint_jacobian = rng.uniform(-1, 1, (nb_constraints, nb_q))
+
+    dependent, independent = select_partition(constraint_jacobian)
+    assert len(dependent) == nb_constraints
+    assert sorted(dependent + independent) == list(range(nb_q))
+    assert dependent == sorted(dependent)
+    assert np.linalg.matrix_rank(constraint_jacobian[:, dependent]) == nb_constraints
+
+
+def test_select_partition_pivot_choice():
+    # the columns 3 and 4 dominate, the others are small: the pivoted QR picks 3 and 4
+    rng = np.random.default_rng(3)
+    constraint_jacobian = 1e-3 * rng.uniform(-1, 1, (2, 8))
+    constraint_jacobian[:, 3] = [10, 1]
+    constraint_jacobian[:, 4] = [-1, 8]
+    assert select_partition(constraint_jacobian) == ([3, 4], [0, 1, 2, 5, 6, 7])
+
+    # the root cannot be dependent: the best columns among the candidates
+    constraint_jacobian[:, 0] = [100, 0]
+    assert select_partition(constraint_jacobian, candidate_joints=[3, 4, 5, 6, 7])[0] == [3, 4]
+    assert select_partition(constraint_jacobian)[0] == [0, 4]
+
+
+def test_select_partition_rank_deficient():
+    # the two constraints are the same
+    constraint_jacobian = np.tile(np.arange(1, 9, dtype=float), (2, 1))
+    with pytest.raises(ValueError):
+        select_partition(constraint_jacobian)
+
+    # full rank, but not on the candidate joints
+    constraint_jacobian = np.zeros((2, 8))
+    constraint_jacobian[0, 0] = 1
+    constraint_jacobian[1, 1] = 1
+    with pytest.raises(ValueError):
+        select_partition(constraint_jacobian, candidate_joints=[2, 3, 4])
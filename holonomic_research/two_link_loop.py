@@ -0,0 +1,256 @@
+"""
+Closed-form inverse kinematics of planar two-link closed loops.
+
+A loop is declared by a reference segment (the frame in which the loop is solved, e.g. "Arm_location"), the segment
+of the second link (e.g. "Forearm_location", its translation in the first link gives the length of the first link),
+the marker at the end of the second link (e.g. "CENTER_HAND") and the marker it must be superimposed to
+(e.g. "BELOW_KNEE"). The two joints of the links are dependent joints of the model, they are computed in closed
+form instead of with Newton iterations.
+
+The loop is assumed to lie in the (y, z) plane of the reference segment, as in all the 2D models of this repo, and the
+reference segment and the target marker must not depend on the joints of the loop.
+"""
+import numpy as np
+import casadi as cas
+from casadi import MX, vertcat
+from biorbd import marker_index, segment_index
+
+# The knee-hand loop of the tucked phase, registered by default if the model has these segments and markers
+DEFAULT_TWO_LINK_LOOP = {
+    "reference_segment": "Arm_location",
+    "second_link_segment": "Forearm_location",
+    "end_effector_marker": "CENTER_HAND",
+    "target_marker": "BELOW_KNEE",
+}
+
+
+def smooth_clamp(x, lower: float, upper: float, smoothing: float):
+    """
+    Differentiable approximation of min(max(x, lower), upper), the error is about smoothing**2 / (4 * distance to the
+    bound) inside the bounds
+
+    Parameters
+    ----------
+    x: MX | SX | DM | float
+        The value to clamp
+    lower: float
+        The lower bound
+    upper: float
+        The upper bound
+    smoothing: float
+        The width of the smoothing around the bounds
+    """
+    x = (x + upper - cas.sqrt((x - upper) ** 2 + smoothing**2)) / 2
+    return (x + lower + cas.sqrt((x - lower) ** 2 + smoothing**2)) / 2
+
+
+def inverse_kinematics_2d(l1, l2, xp, yp, elbow_down: bool = True, clamp_margin: float = None):
+    """
+    Inverse kinematics of a planar two-link chain.
+
+    Parameters
+    ----------
+    l1:
+        The length of the first link (arm)
+    l2:
+        The length of the second link (forearm)
+    xp:
+        Coordinate on x of the target in the frame of the reference segment
+    yp:
+        Coordinate on y of the target in the frame of the reference segment
+    elbow_down: bool
+        The branch of the solution, elbow down (positive second angle) or elbow up
+    clamp_margin: float
+        If given, the cosine of the second angle is smoothly clamped to [-1 + clamp_margin, 1 - clamp_margin] so that
+        acos stays in its domain (and its derivative finite) when the target is out of reach or the chain is fully
+        stretched, instead of returning NaN
+
+    Returns
+    -------
+    theta:
+        The angles of the two links
+    """
+    cos_theta2 = (xp**2 + yp**2 - (l2**2 + l1**2)) / (2 * l1 * l2)
+    if clamp_margin is not None:
+        cos_theta2 = smooth_clamp(cos_theta2, -1 + clamp_margin, 1 - clamp_margin, clamp_margin / 10)
+    theta2 = cas.acos(cos_theta2)
+    if not elbow_down:
+        theta2 = -theta2
+    theta1 = cas.atan2(
+        (-xp * l2 * cas.sin(theta2) + yp * (l1 + l2 * cas.cos(theta2))),
+        (xp * (l1 + l2 * cas.cos(theta2)) + yp * l2 * cas.sin(theta2)),
+    )
+    return vertcat(theta1, theta2)
+
+
+def is_planar_yz(biorbd_model) -> bool:
+    """
+    Check if all the segments of the model move in the (y, z) plane, i.e. they only translate along y and z and
+    only rotate about x, as all the 2D models of this repo
+
+    Parameters
+    ----------
+    biorbd_model: biorbd.Model
+        The biorbd model (casadi or eigen)
+    """
+    for i in range(biorbd_model.nbSegment()):
+        segment = biorbd_model.segment(i)
+        if not set(segment.seqT().to_string()) <= {"y", "z"} or not set(segment.seqR().to_string()) <= {"x"}:
+            return False
+    return True
+
+
+def has_default_two_link_loop(biorbd_model) -> bool:
+    """
+    Check if the model has the segments and markers of DEFAULT_TWO_LINK_LOOP
+
+    Parameters
+    ----------
+    biorbd_model: biorbd.Model
+        The biorbd model (casadi or eigen)
+    """
+    segment_names = [biorbd_model.segment(i).name().to_string() for i in range(biorbd_model.nbSegment())]
+    marker_names = [name.to_string() for name in biorbd_model.markerNames()]
+    return (
+        DEFAULT_TWO_LINK_LOOP["reference_segment"] in segment_names
+        and DEFAULT_TWO_LINK_LOOP["second_link_segment"] in segment_names
+        and DEFAULT_TWO_LINK_LOOP["end_effector_marker"] in marker_names
+        and DEFAULT_TWO_LINK_LOOP["target_marker"] in marker_names
+    )
+
+
+class TwoLinkLoop:
+    """
+    A planar two-link closed loop with a closed-form inverse kinematics
+    """
+
+    def __init__(
+        self,
+        reference_segment: str,
+        second_link_segment: str,
+        end_effector_marker: str,
+        target_marker: str,
+        joint_index: list,
+        elbow_down: bool = True,
+    ):
+        """
+        Parameters
+        ----------
+        reference_segment: str
+            The segment in which frame the loop is solved
+        second_link_segment: str
+            The segment of the second link, its translation in its parent gives the length of the first link
+        end_effector_marker: str
+            The marker at the end of the second link, its position gives the length of the second link
+        target_marker: str
+            The marker the end effector must be superimposed to
+        joint_index: list
+            The index in q of the two dependent joints of the loop (first link, second link)
+        elbow_down: bool
+            The branch of the solution
+        """
+        if len(joint_index) != 2:
+            raise ValueError("A two-link loop has exactly two dependent joints")
+
+        self.reference_segment = reference_segment
+        self.second_link_segment = second_link_segment
+        self.end_effector_marker = end_effector_marker
+        self.target_marker = target_marker
+        self.joint_index = list(joint_index)
+        self.elbow_down = elbow_down
+
+        self.index_segment_ref = None
+        self.index_marker_target = None
+        self.l1 = None
+        self.l2 = None
+        self.planar = False
+        self.clamp_margin = None
+
+    def set_geometry(self, biorbd_model):
+        """
+        Find the indices of the segments and markers of the loop and compute numerically the lengths of the links,
+        they do not depend on q
+
+        Parameters
+        ----------
+        biorbd_model: biorbd_casadi.Model
+            The biorbd model
+        """
+        index_second_link = segment_index(biorbd_model, self.second_link_segment)
+        index_marker_end = marker_index(biorbd_model, self.end_effector_marker)
+
+        second_link_trans = np.array(cas.evalf(biorbd_model.segments()[index_second_link].localJCS().trans().to_mx()))
+        end_effector_trans = np.array(cas.evalf(biorbd_model.marker(index_marker_end).to_mx()))
+        second_link_trans = second_link_trans.squeeze()
+        end_effector_trans = end_effector_trans.squeeze()
+
+        self.index_segment_ref = segment_index(biorbd_model, self.reference_segment)
+        self.index_marker_target = marker_index(biorbd_model, self.target_marker)
+        self.l1 = float(np.sqrt(second_link_trans[1] ** 2 + second_link_trans[2] ** 2))
+        self.l2 = float(np.sqrt(end_effector_trans[1] ** 2 + end_effector_trans[2] ** 2))
+        self.planar = is_planar_yz(biorbd_model)
+
+    def solve_symbolic(self, model, q: MX) -> MX:
+        """
+        Closed-form angles of the two links, symbolic version
+
+        Parameters
+        ----------
+        model: BiorbdModel
+            The bioptim model
+        q: MX
+            The generalized coordinates, the joints of the loop are not used
+
+        Returns
+        -------
+        The angles of the two links
+        """
+        # Perform the forward kinematics, only for the target marker
+        marker_target_in_g = model.marker(q, index=self.index_marker_target)
+
+        if self.planar:
+            # rotation about x only: the (y, z) block of the rotation is enough and its inverse is its transpose
+            segment_ref_JCS = model.model.globalJCS(q, self.index_segment_ref).to_mx()
+            rotation = segment_ref_JCS[1:3, 1:3]
+            marker_target_in_ref = rotation.T @ (marker_target_in_g[1:3] - segment_ref_JCS[1:3, 3])
+            y, z = marker_target_in_ref[0], marker_target_in_ref[1]
+        else:
+            # Matrix RT of the reference segment, transpose() of a RotoTrans is its inverse
+            R_ref_global = model.model.globalJCS(q, self.index_segment_ref).transpose().to_mx()
+            marker_target_in_ref = (R_ref_global @ vertcat(marker_target_in_g, cas.MX.ones(1)))[:3]
+            y, z = marker_target_in_ref[1], marker_target_in_ref[2]
+
+        return inverse_kinematics_2d(
+            l1=self.l1, l2=self.l2, xp=-z, yp=y, elbow_down=self.elbow_down, clamp_margin=self.clamp_margin
+        )
+
+    def solve_numeric(self, model_eigen, q: np.ndarray):
+        """
+        Closed-form angles of the two links, numeric version
+
+        Parameters
+        ----------
+        model_eigen: biorbd.Model
+            The numeric biorbd model
+        q: np.ndarray
+            The generalized coordinates, the joints of the loop are not used
+
+        Returns
+        -------
+        The angles of the two links
+        """
+        segment_ref_JCS = model_eigen.globalJCS(q, self.index_segment_ref).to_array()
+        marker_target_in_g = model_eigen.marker(q, self.index_marker_target).to_array()
+
+        # the inverse of a rigid transformation is (R^T, -R^T p)
+        rotation = segment_ref_JCS[:3, :3]
+        marker_target_in_ref = rotation.T @ (marker_target_in_g - segment_ref_JCS[:3, 3])
+
+        return inverse_kinematics_2d(
+            l1=self.l1,
+            l2=self.l2,
+            xp=-marker_target_in_ref[2],
+            yp=marker_target_in_ref[1],
+            elbow_down=self.elbow_down,
+            clamp_margin=self.clamp_margin,
+        )
@@ -159,13 +159,8 @@ def visualisation_closed_loop_5phases(bio_model, sol, model_path):
     q_0 = sol.states[0]["q"]
     q_1 = sol.states[1]["q"]
     q_2 = sol.states[2]["q"]
-    q_holo = np.zeros((bio_model[0].nb_q, sol.states[3]["q_u"].shape[1]))
     q_4 = sol.states[4]["q"]
-    for i, ui in enumerate(sol.states[3]["q_u"].T):
-        # vi = bio_model.compute_v_from_u_numeric(ui, v_init=DM(np.zeros(2))).toarray()
-        vi = bio_model[3].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[3].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[3].compute_trajectory(sol.states[3]["q_u"])[0]
     q = np.concatenate((q_0, q_1, q_2, q_holo, q_4), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
@@ -193,14 +188,9 @@ def visualisation_closed_loop_6phases(bio_model, sol, model_path):
     q_0 = sol.states[0]["q"]
     q_1 = sol.states[1]["q"]
     q_2 = sol.states[2]["q"]
-    q_holo = np.zeros((bio_model[0].nb_q, sol.states[3]["q_u"].shape[1]))
     q_4 = sol.states[4]["q"]
     q_5 = sol.states[5]["q"]
-    for i, ui in enumerate(sol.states[3]["q_u"].T):
-        # vi = bio_model.compute_v_from_u_numeric(ui, v_init=DM(np.zeros(2))).toarray()
-        vi = bio_model[3].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[3].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[3].compute_trajectory(sol.states[3]["q_u"])[0]
     q = np.concatenate((q_0, q_1, q_2, q_holo, q_4, q_5), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
@@ -238,16 +228,11 @@ def visualisation_closed_loop(name_file_movement: str, name_file_model: str):
         dependent_joint_index=[3, 4],
     )
     data = get_created_data_from_pickle(name_file_movement)
-    nb_q = bio_model.nb_q
     for index, arr in enumerate(data["q"]):
         if arr.shape[0] != 8:
             index_holo = index
     q = data["q"]
-    q[index_holo] = np.zeros(shape=(nb_q, q[index_holo].shape[1]))
-    for i, ui in enumerate(data["q"][index_holo].T):
-        vi = bio_model.compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model.state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q[index_holo][:, i] = qi
+    q[index_holo] = bio_model.compute_trajectory(q[index_holo])[0]
     Q = np.concatenate(q, axis=1)
     visu = bioviz.Viz(name_file_model, show_floor=True, show_meshes=True)
     visu.load_movement(Q)
@@ -275,12 +260,7 @@ def visualisation_closed_loop_4phases_propulsion(bio_model, sol, model_path):
     q_0 = sol.states[0]["q"]
     q_1 = sol.states[1]["q"]
     q_2 = sol.states[2]["q"]
-    q_holo = np.zeros((bio_model[0].nb_q, sol.states[3]["q_u"].shape[1]))
-    for i, ui in enumerate(sol.states[3]["q_u"].T):
-        # vi = bio_model.compute_v_from_u_numeric(ui, v_init=DM(np.zeros(2))).toarray()
-        vi = bio_model[3].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[3].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[3].compute_trajectory(sol.states[3]["q_u"])[0]
     q = np.concatenate((q_0, q_1, q_2, q_holo), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
@@ -306,14 +286,9 @@ def visualisation_closed_loop_4phases_reception(bio_model, sol, model_path):
 
     """
     q_0 = sol.states[0]["q"]
-    q_holo = np.zeros((bio_model[0].nb_q, sol.states[1]["q_u"].shape[1]))
     q_2 = sol.states[2]["q"]
     q_3 = sol.states[3]["q"]
-    for i, ui in enumerate(sol.states[1]["q_u"].T):
-
-        vi = bio_model[1].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[1].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[1].compute_trajectory(sol.states[1]["q_u"])[0]
     q = np.concatenate((q_0,q_holo, q_2, q_3), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
@@ -340,13 +315,9 @@ def visualisation_closed_loop_5phases_reception(bio_model, sol, model_path):
     """
     q_0 = sol.states[0]["q"]
     q_1 = sol.states[1]["q"]
-    q_holo = np.zeros((bio_model[0].nb_q, sol.states[2]["q_u"].shape[1]))
     q_3 = sol.states[3]["q"]
     q_4 = sol.states[4]["q"]
-    for i, ui in enumerate(sol.states[2]["q_u"].T):
-        vi = bio_model[2].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[2].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[2].compute_trajectory(sol.states[2]["q_u"])[0]
     q = np.concatenate((q_0, q_1, q_holo, q_3, q_4), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
@@ -371,12 +342,8 @@ def visualisation_closed_loop_3phases(bio_model, sol, model_path):
 
     """
     q_0 = sol.states[0]["q"]
-    q_holo = np.zeros((bio_model[0].nb_q, sol.states[1]["q_u"].shape[1]))
     q_2 = sol.states[2]["q"]
-    for i, ui in enumerate(sol.states[1]["q_u"].T):
-        vi = bio_model[1].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[1].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[1].compute_trajectory(sol.states[1]["q_u"])[0]
     q = np.concatenate((q_0, q_holo, q_2), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
@@ -400,11 +367,7 @@ def visualisation_closed_loop_1phase(bio_model, sol, model_path):
     -------
 
     """
-    q = np.zeros((bio_model.nb_tau, sol.states["q_u"].shape[0]))
-    for i, ui in enumerate(sol.states["q_u"]):
-        vi = bio_model.compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model.state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q[:, i] = qi
+    q = bio_model.compute_trajectory(sol.states["q_u"])[0]
 
     viz = bioviz.Viz(model_path)
     viz.load_movement(q)
@@ -429,11 +392,7 @@ def visualisation_closed_loop_2phases(bio_model, sol, model_path):
 
     """
     q_0 = sol.states[0]["q"]
-    q_holo = np.zeros((bio_model[0].nb_q, sol.states[1]["q_u"].shape[1]))
-    for i, ui in enumerate(sol.states[1]["q_u"].T):
-        vi = bio_model[1].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[1].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[1].compute_trajectory(sol.states[1]["q_u"])[0]
     q = np.concatenate((q_0, q_holo), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
@@ -458,11 +417,7 @@ def visualisation_closed_loop_2phases_post(bio_model, sol, model_path):
 
     """
     q_0 = sol.states[1]["q"]
-    q_holo = np.zeros((bio_model[1].nb_q, sol.states[0]["q_u"].shape[1]))
-    for i, ui in enumerate(sol.states[0]["q_u"].T):
-        vi = bio_model[0].compute_v_from_u_explicit_numeric(ui).toarray()
-        qi = bio_model[0].state_from_partition(ui[:, np.newaxis], vi).toarray().squeeze()
-        q_holo[:, i] = qi
+    q_holo = bio_model[0].compute_trajectory(sol.states[0]["q_u"])[0]
     q = np.concatenate((q_holo, q_0), axis=1)
     visu = bioviz.Viz(model_path)
     visu.load_movement(q)
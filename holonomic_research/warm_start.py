@@ -0,0 +1,313 @@
+"""
+Warm start of an OCP from a stored solution (see Save.save_results_CL) with a different phase layout.
+
+InterpolationType.EACH_FRAME needs an initial guess with exactly the n_shooting of the new problem, so a stored
+solution can only initialize the same problem. Here the stored solution is first turned into one continuous
+trajectory of all the joints:
+- the holonomic phases, stored as q_u and qdot_u, are completed with the dependent joints (compute_trajectory)
+- the phases are put end to end on a single time axis
+then it is sampled on the nodes of the new phases. The new phases cover the stored trajectory in proportion of their
+duration (or on given boundaries), so phases can be merged or split, and the velocities are rescaled when a phase
+is stretched. The samples of the holonomic phases of the new problem are mapped to q_u and qdot_u with the BiMapping
+of the phase.
+
+At a phase transition (e.g. an impact), the first node of a new phase takes the value at the start of the stored
+phase that follows the boundary and the other nodes the value at the end of the one that precedes it.
+
+When the new problem has the same layout as the stored one (e.g. a re-solve with slightly different tau limits,
+friction or landing pose), build_primal_dual_warm_start also gives the stored lagrange multipliers lam_x and lam_g
+to IPOPT with warm_start_init_point, so the re-solve starts from the stored primal-dual point instead of a cold start.
+"""
+import dataclasses
+
+import numpy as np
+from bioptim import OptimalControlProgram, Solver
+from bioptim.interfaces.ipopt_interface import IpoptInterface
+
+from salto_builder import SaltoSpec, build_ocp, shared_mapping, shared_model
+
+
+def stored_phases(data: dict, holonomic_models: dict = None) -> tuple[list, list, list, list]:
+    """
+    The phases of a stored solution with all the joints, on a single time axis
+
+    Parameters
+    ----------
+    data: dict
+        The stored solution, with the lists "time", "q", "qdot" and "tau" of each phase
+    holonomic_models: dict
+        The holonomic model of each holonomic phase of the stored solution, by phase index, their q and qdot are
+        the independent joints
+
+    Returns
+    -------
+    times, q, qdot, tau: the lists of each phase, the times of a phase start at the end of the previous one
+    """
+    holonomic_models = {} if holonomic_models is None else holonomic_models
+    # the number of joints of the model, the phases without holonomic constraints are stored with all of them
+    nb_q = max(
+        [np.array(q_phase).shape[0] for q_phase in data["q"]] + [model.nb_q for model in holonomic_models.values()]
+    )
+    times, q, qdot, tau = [], [], [], []
+    start = 0
+    for i in range(len(data["time"])):
+        time = np.array(data["time"][i], dtype=float).reshape(-1)
+        times.append(time - time[0] + start)
+        start = times[-1][-1]
+
+        q_phase = np.array(data["q"][i], dtype=float)
+        qdot_phase = np.array(data["qdot"][i], dtype=float)
+        if i in holonomic_models:
+            q_phase, qdot_phase, _ = holonomic_models[i].compute_trajectory(q_phase, qdot_phase)
+        if q_phase.shape[0] != nb_q:
+            raise ValueError(
+                f"The phase {i} of the stored solution has {q_phase.shape[0]} joints instead of {nb_q}, it is a "
+                f"holonomic phase stored with its independent joints: give its holonomic model as holonomic_models[{i}]"
+            )
+        q.append(q_phase)
+        qdot.append(qdot_phase)
+        tau.append(np.array(data["tau"][i], dtype=float))
+    return times, q, qdot, tau
+
+
+def _stored_phase_index(times: list, t: float, first_node: bool) -> int:
+    """
+    The stored phase that gives the value at t, at a boundary it is the next phase for the first node of a new
+    phase and the previous one otherwise
+    """
+    starts = [time[0] for time in times]
+    index = int(np.searchsorted(starts, t, side="right")) - 1
+    if not first_node and index > 0 and t <= times[index - 1][-1]:
+        index -= 1
+    return min(max(index, 0), len(times) - 1)
+
+
+def sample_states(times: list, values: list, t: np.ndarray) -> np.ndarray:
+    """
+    Linear interpolation of the states of the stored phases at the nodes of a new phase
+
+    Parameters
+    ----------
+    times: list
+        The times of the stored phases
+    values: list
+        The states of the stored phases, of shape (nb_states, nb_nodes)
+    t: np.ndarray
+        The times of the nodes of the new phase
+
+    Returns
+    -------
+    The states at t, of shape (nb_states, len(t))
+    """
+    samples = np.zeros((values[0].shape[0], len(t)))
+    for j, t_j in enumerate(t):
+        k = _stored_phase_index(times, t_j, first_node=j == 0)
+        samples[:, j] = [np.interp(t_j, times[k], row) for row in values[k]]
+    return samples
+
+
+def sample_controls(times: list, values: list, t: np.ndarray) -> np.ndarray:
+    """
+    The piecewise constant controls of the stored phases at the shooting nodes of a new phase
+
+    Parameters
+    ----------
+    times: list
+        The times of the stored phases
+    values: list
+        The controls of the stored phases, of shape (nb_controls, nb_shooting) or (nb_controls, nb_shooting + 1)
+        with a last column of NaN
+    t: np.ndarray
+        The times of the shooting nodes of the new phase
+
+    Returns
+    -------
+    The controls at t, of shape (nb_controls, len(t))
+    """
+    samples = np.zeros((values[0].shape[0], len(t)))
+    for j, t_j in enumerate(t):
+        k = _stored_phase_index(times, t_j, first_node=True)
+        nb_intervals = min(values[k].shape[1], len(times[k]) - 1)
+        interval = int(np.searchsorted(times[k], t_j, side="right")) - 1
+        samples[:, j] = values[k][:, min(max(interval, 0), nb_intervals - 1)]
+    return samples
+
+
+def resample(
+    data: dict,
+    phase_time: tuple,
+    n_shooting: tuple,
+    holonomic_models: dict = None,
+    boundaries: list = None,
+) -> list[dict]:
+    """
+    Sample a stored solution on the nodes of a new phase layout
+
+    Parameters
+    ----------
+    data: dict
+        The stored solution, with the lists "time", "q", "qdot" and "tau" of each phase
+    phase_time: tuple
+        The durations of the new phases
+    n_shooting: tuple
+        The numbers of shooting nodes of the new phases
+    holonomic_models: dict
+        The holonomic model of each holonomic phase of the stored solution, by phase index
+    boundaries: list
+        The times of the stored trajectory where the new phases start and end (nb_phases + 1 values), by default
+        the new phases cover the stored trajectory in proportion of their durations
+
+    Returns
+    -------
+    For each new phase, a dict with "q" and "qdot" of all the joints at the n_shooting + 1 nodes and "tau" at the
+    n_shooting shooting nodes
+    """
+    if len(phase_time) != len(n_shooting):
+        raise ValueError("phase_time and n_shooting should have the same number of phases")
+
+    times, q, qdot, tau = stored_phases(data, holonomic_models)
+    if boundaries is None:
+        boundaries = np.concatenate(([0], np.cumsum(phase_time))) / np.sum(phase_time) * times[-1][-1]
+    if len(boundaries) != len(phase_time) + 1:
+        raise ValueError(f"boundaries should have {len(phase_time) + 1} values, not {len(boundaries)}")
+
+    guesses = []
+    for i, (duration, nb_shooting) in enumerate(zip(phase_time, n_shooting)):
+        t = np.linspace(boundaries[i], boundaries[i + 1], nb_shooting + 1)
+        # the velocities are rescaled when the stored motion is played over a different duration
+        time_scale = (boundaries[i + 1] - boundaries[i]) / duration
+        guesses.append(
+            {
+                "q": sample_states(times, q, t),
+                "qdot": sample_states(times, qdot, t) * time_scale,
+                "tau": sample_controls(times, tau, t[:-1]),
+            }
+        )
+    return guesses
+
+
+def warm_start_from_spec(
+    data: dict, spec: SaltoSpec, holonomic_models: dict = None, boundaries: list = None
+) -> list[dict]:
+    """
+    The initial guess of each phase of a salto (see salto_builder.build_ocp) from a stored solution
+
+    Parameters
+    ----------
+    data: dict
+        The stored solution, with the lists "time", "q", "qdot" and "tau" of each phase
+    spec: SaltoSpec
+        The new salto
+    holonomic_models: dict
+        The holonomic model of each holonomic phase of the stored solution, by phase index
+    boundaries: list
+        The times of the stored trajectory where the new phases start and end, see resample
+
+    Returns
+    -------
+    For each phase, a dict with the states of the phase ("q" and "qdot", or "q_u" and "qdot_u" for a holonomic
+    phase) and "tau"
+    """
+    guesses = resample(
+        data,
+        tuple(phase.phase_time for phase in spec.phases),
+        tuple(phase.n_shooting for phase in spec.phases),
+        holonomic_models,
+        boundaries,
+    )
+    for phase, guess in zip(spec.phases, guesses):
+        if phase.phase_type != "holonomic":
+            continue
+        model = shared_model(phase, spec)
+        state_mapping = shared_mapping(("q", "qdot"), model.independent_joint_index, model.nb_q)
+        guess["q_u"] = state_mapping["q"].to_first.map(guess.pop("q"))
+        guess["qdot_u"] = state_mapping["qdot"].to_first.map(guess.pop("qdot"))
+    return guesses
+
+
+def stored_initial_guess(data: dict, spec: SaltoSpec) -> list[dict]:
+    """
+    The stored solution as the initial guess of each phase of a salto with the same layout
+
+    Parameters
+    ----------
+    data: dict
+        The stored solution, with the lists "q", "qdot" and "tau" of each phase (q_u and qdot_u for a holonomic phase)
+    spec: SaltoSpec
+        The salto, with the same phases and n_shooting as the stored solution
+
+    Returns
+    -------
+    For each phase, a dict with the states of the phase and "tau"
+    """
+    if len(data["q"]) != len(spec.phases):
+        raise ValueError(f"The stored solution has {len(data['q'])} phases, the salto has {len(spec.phases)}")
+
+    guesses = []
+    for i, phase in enumerate(spec.phases):
+        q = np.array(data["q"][i], dtype=float)
+        if q.shape[1] != phase.n_shooting + 1:
+            raise ValueError(
+                f"The phase {i} of the stored solution has {q.shape[1] - 1} shooting nodes, not {phase.n_shooting}, "
+                f"use warm_start_from_spec to resample it"
+            )
+        tau = np.array(data["tau"][i], dtype=float)[:, : phase.n_shooting]
+        q_key, qdot_key = ("q_u", "qdot_u") if phase.phase_type == "holonomic" else ("q", "qdot")
+        guesses.append({q_key: q, qdot_key: np.array(data["qdot"][i], dtype=float), "tau": tau})
+    return guesses
+
+
+def build_primal_dual_warm_start(
+    data: dict, spec: SaltoSpec, solver: Solver.IPOPT, precision: float = 1e-8
+) -> tuple[OptimalControlProgram, tuple]:
+    """
+    Build the OCP of a salto with the same layout as a stored solution, initialized with its primal values (states,
+    controls and phase durations) and its lagrange multipliers
+
+    Parameters
+    ----------
+    data: dict
+        The stored solution, with "time", "q", "qdot", "tau", "lam_x" and "lam_g" (see Save.save_results_CL)
+    spec: SaltoSpec
+        The salto, with the same phases, n_shooting and constraints as the stored solution (the bounds, the weights
+        or the poses can differ)
+    solver: Solver.IPOPT
+        The solver, its warm start options are set
+    precision: float
+        The mu_init and the (mult) bound push and frac of the warm start, IPOPT would otherwise push the stored
+        point away from its active bounds
+
+    Returns
+    -------
+    The ocp, to be solved with solver, and the models of the phases
+    """
+    # the durations of the stored solution are the initial guess of the time parameters
+    phases = [
+        dataclasses.replace(phase, phase_time=float(np.ptp(np.array(data["time"][i], dtype=float))))
+        for i, phase in enumerate(spec.phases)
+    ]
+    spec = dataclasses.replace(spec, phases=phases)
+    ocp, bio_model = build_ocp(spec, warm_start=stored_initial_guess(data, spec))
+
+    # the interface is created here, ocp.solve reuses it, so that the multipliers are given to the solver
+    # (casadi has no initial guess of the multipliers of the parameters, lam_p cannot be used)
+    ocp.ocp_solver = IpoptInterface(ocp)
+    lam_x = np.array(data["lam_x"], dtype=float)
+    lam_g = np.array(data["lam_g"], dtype=float)
+
+    # a multiplier is paired with a variable or a constraint by its position, the layouts must be the same
+    nb_variables = ocp.variables_vector.shape[0]
+    nb_constraints = ocp.ocp_solver.dispatch_bounds()[0].shape[0]
+    if lam_x.size != nb_variables or lam_g.size != nb_constraints:
+        raise ValueError(
+            f"The stored solution has {lam_x.size} variables and {lam_g.size} constraints, the new problem has "
+            f"{nb_variables} and {nb_constraints}: the multipliers cannot be reused, use warm_start_from_spec for a "
+            f"primal warm start"
+        )
+    ocp.ocp_solver.lam_x = lam_x
+    ocp.ocp_solver.lam_g = lam_g
+
+    solver.set_warm_start_options(precision)
+    solver.set_bound_push(precision)
+    solver.set_bound_frac(precision)
+    return ocp, bio_model